@@ -0,0 +1,215 @@
+"""
+Offline end-to-end benchmarks against a local stand-in server.
+
+    python benchmarks/bench_offline.py [--runs 5] [--segments 60] [--segment-kb 256]
+                                       [--latency-ms 20] [--fail-rate 0.05]
+                                       [--save-baseline] [--tolerance 0.25]
+
+Starts benchmarks/server.py on 127.0.0.1 and measures:
+  * analysis latency of SmartScraper on hdfilmizle-style and nested-iframe pages,
+    and of a yt-dlp analysis through DownloadManager
+  * bulk analysis of a 50-episode season listing (BulkAnalyzer)
+  * native HLS download throughput, clean and with injected segment failures
+  * multi-connection range download throughput
+plus the peak Python heap (tracemalloc) of every scenario.
+
+Results are compared with benchmarks/baseline_offline.json when it exists;
+a metric that is more than --tolerance worse than the baseline fails the run.
+No network access is needed.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Never let a system proxy turn the local server into a network request
+os.environ['NO_PROXY'] = os.environ['no_proxy'] = '127.0.0.1,localhost'
+
+from server import FixtureServer, StreamConfig  # noqa: E402
+from src.core.bulk import BulkAnalyzer  # noqa: E402
+from src.core.down_manager import DownloadManager  # noqa: E402
+from src.core.hls import HlsDownloader  # noqa: E402
+from src.core.range_dl import RangeDownloader  # noqa: E402
+from src.core.scraper import SmartScraper  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_offline.json')
+
+# Direction of "better" for each reported metric
+HIGHER_IS_BETTER = {'throughput_mbps'}
+
+
+def measure(fn, runs):
+    """Runs fn `runs` times. Returns (median seconds, peak traced MiB, last result)."""
+    durations = []
+    peak = 0
+    result = None
+    for _ in range(runs):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(durations), peak / (1024 * 1024), result
+
+
+def bench_analysis(server, runs):
+    results = {}
+
+    def scan(path, max_depth):
+        scraper = SmartScraper()
+        scraper.MAX_DEPTH = max_depth
+        found = scraper.deep_scan(f"{server.base_url}{path}")
+        if not found['video_url']:
+            raise RuntimeError(f"Scraper found no video on {path}")
+        return found
+
+    for name, path, depth in (('analyze_parts', '/site/episode', 1), ('analyze_nested', '/site/nested', 2)):
+        seconds, peak, _ = measure(lambda: scan(path, depth), runs)
+        results[name] = {'latency_ms': round(seconds * 1000, 1), 'peak_mem_mb': round(peak, 2)}
+
+    # yt-dlp analysis of a direct file: dominated by per-call YoutubeDL overhead (see ydl_pool)
+    manager = DownloadManager()
+    manager.analyze_url(f"{server.base_url}/files/video.mp4", use_cache=False)  # Warm-up: import + first instance
+    seconds, peak, _ = measure(lambda: manager.analyze_url(f"{server.base_url}/files/video.mp4", use_cache=False), runs)
+    results['analyze_ytdlp'] = {'latency_ms': round(seconds * 1000, 1), 'peak_mem_mb': round(peak, 2)}
+
+    # Whole season listing through BulkAnalyzer: should cost a few episodes, not all of them
+    def series():
+        analyzer = BulkAnalyzer(scrape_only=True, host_rate=None)
+        found = list(analyzer.analyze(analyzer.expand(f"{server.base_url}/site/series")))
+        if len(found) != server.config.episodes or any(r['error'] for r in found):
+            raise RuntimeError("Bulk analysis missed episodes")
+        return found
+
+    seconds, peak, _ = measure(series, runs)
+    results['analyze_series'] = {'latency_ms': round(seconds * 1000, 1), 'peak_mem_mb': round(peak, 2)}
+    return results
+
+
+def bench_hls(server, runs, concurrency, tmp_dir, fail_rate):
+    results = {}
+    master = f"{server.base_url}/photostack.net/v/bench/master.m3u8"
+
+    def download():
+        server.reset()
+        engine = HlsDownloader(concurrency=concurrency)
+        _, playlist, _, _ = engine.resolve(master, max_height=1080)
+        out = os.path.join(tmp_dir, 'hls.ts')
+        size = engine.download_playlist(playlist, out)
+        os.remove(out)
+        return size
+
+    scenarios = [('hls_clean', 0.0)]
+    if fail_rate:
+        scenarios.append(('hls_faulty', fail_rate))
+    for name, rate in scenarios:
+        server.config.fail_rate = rate
+        seconds, peak, size = measure(download, runs)
+        results[name] = {
+            'latency_ms': round(seconds * 1000, 1),
+            'throughput_mbps': round(size / seconds / (1024 * 1024), 2),
+            'peak_mem_mb': round(peak, 2),
+        }
+    server.config.fail_rate = 0.0
+    return results
+
+
+def bench_range(server, runs, connections, tmp_dir):
+    def download():
+        out = os.path.join(tmp_dir, 'range.mp4')
+        size = RangeDownloader(connections=connections).download(f"{server.base_url}/files/video.mp4", out)
+        os.remove(out)
+        return size
+
+    seconds, peak, size = measure(download, runs)
+    return {'range_download': {
+        'latency_ms': round(seconds * 1000, 1),
+        'throughput_mbps': round(size / seconds / (1024 * 1024), 2),
+        'peak_mem_mb': round(peak, 2),
+    }}
+
+
+def compare(results, baseline, tolerance):
+    """Prints a comparison table. Returns the list of regressed 'scenario.metric' names."""
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(scenario, {}).get(metric)
+            if not old:
+                print(f"  {scenario:<16} {metric:<16} {value:>10}")
+                continue
+            change = (value - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ''
+            if worse > tolerance:
+                flag = '  REGRESSION'
+                regressions.append(f"{scenario}.{metric}")
+            print(f"  {scenario:<16} {metric:<16} {value:>10}  (baseline {old}, {change:+.0%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--segments', type=int, default=60)
+    parser.add_argument('--segment-kb', type=int, default=256)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="Server delay before each segment")
+    parser.add_argument('--fail-rate', type=float, default=0.05, help="Share of segments whose first request fails")
+    parser.add_argument('--file-mb', type=int, default=32, help="Size of the direct file for the range download")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    # The engines log every segment; keep the report readable
+    logging.getLogger("StreamDownloader").setLevel(logging.ERROR)
+
+    config = StreamConfig(segments=args.segments, segment_size=args.segment_kb * 1024,
+                          latency=args.latency_ms / 1000, file_size=args.file_mb * 1024 * 1024,
+                          dead_mirror_latency=1.0)
+    server = FixtureServer(config).start()
+    tmp_dir = tempfile.mkdtemp(prefix='streamdl-bench-')
+    print(f"Fixture server on {server.base_url}, {args.runs} runs per scenario")
+
+    try:
+        results = {}
+        results.update(bench_analysis(server, args.runs))
+        results.update(bench_hls(server, args.runs, args.concurrency, tmp_dir, args.fail_rate))
+        results.update(bench_range(server, args.runs, args.concurrency, tmp_dir))
+    finally:
+        server.stop()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"FAIL: {len(regressions)} metric(s) regressed more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Startup-time benchmark for the headless CLI.
+
+    python benchmarks/bench_startup.py [--runs 10] [--max-ms 400]
+
+Measures `python -m src.cli --help` wall time and checks that importing the
+CLI does not pull in the GUI stack or yt_dlp. Exits non-zero on regression.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must never be loaded just by starting the CLI
+HEAVY_MODULES = ['yt_dlp', 'customtkinter', 'tkinter', 'requests', 'src.gui.app']
+
+
+def time_help(runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'src.cli', '--help'], cwd=ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def loaded_heavy_modules():
+    code = ("import sys, src.cli; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [m for m in out.stdout.strip().split(',') if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=400.0, help="Fail if the median exceeds this")
+    args = parser.parse_args()
+
+    heavy = loaded_heavy_modules()
+    samples = time_help(args.runs)
+    median = statistics.median(samples)
+
+    print(f"cli --help: median {median:.1f} ms, min {min(samples):.1f} ms, max {max(samples):.1f} ms ({args.runs} runs)")
+    ok = True
+    if heavy:
+        print(f"FAIL: importing src.cli loaded heavy modules: {', '.join(heavy)}")
+        ok = False
+    if median > args.max_ms:
+        print(f"FAIL: median startup {median:.1f} ms exceeds budget of {args.max_ms:.0f} ms")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Local stand-in server for the offline benchmarks.
+
+Serves fixture pages that mimic the sites SmartScraper targets and synthetic
+HLS / direct-file streams, all from 127.0.0.1 so no network is needed:
+
+    /site/episode            hdfilmizle-style page with `let parts = [...]`
+    /site/nested             iframe -> iframe -> player chain
+    /site/series             season listing linking /site/series/1-sezon-<N>-bolum
+                             (hdfilmizle-style episode pages)
+    /embed/vidrame/<id>      vidrame-style player using EE.dd("...") obfuscation
+                             and photostack-style subtitles
+    /photostack.net/v/<id>/master.m3u8, /<id>/media.m3u8, /<id>/seg<N>.ts
+                             (ids starting with 'live' serve a sliding live window
+                             whose media sequence advances every live_segment seconds)
+    /files/video.mp4         direct file with byte-range support
+"""
+import base64
+import codecs
+import hashlib
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StreamConfig:
+    """Knobs for the synthetic streams."""
+
+    def __init__(self, segments=60, segment_size=256 * 1024, latency=0.02, fail_rate=0.0,
+                 page_latency=0.01, dead_mirror_latency=2.0, file_size=32 * 1024 * 1024, episodes=50,
+                 fault='error', broken_segments=(), live_segment=1.0, live_window=6, live_end=None,
+                 file_fail_requests=()):
+        self.segments = segments
+        self.segment_size = segment_size
+        self.latency = latency                  # Seconds before each segment response
+        self.fail_rate = fail_rate              # Share of segments that fail their first request
+        self.fault = fault                      # How they fail: 'error' (503), 'html' (error page with a 200),
+                                                # 'truncated' (connection drops mid-body) or 'garbage' (bad TS packets)
+        self.broken_segments = set(broken_segments)  # Segment indexes that fail every time
+        self.page_latency = page_latency
+        self.dead_mirror_latency = dead_mirror_latency
+        self.file_size = file_size
+        self.file_fail_requests = set(file_fail_requests)  # Request numbers (1-based) of the direct file answered with 503
+        self.episodes = episodes                # Links on the /site/series listing
+        self.live_segment = live_segment        # Live streams: seconds per segment (also the target duration)
+        self.live_window = live_window          # Live streams: segments listed in the playlist
+        self.live_end = live_end                # Live streams: segment count after which #EXT-X-ENDLIST appears
+
+
+def encode_vidrame(url):
+    """
+    Inverse of extractors.vidrame.decode: Reverse -> ROT13 -> Base64, with
+    '/' written as 'd'. A Base64 'd' can't survive that, so a cache-buster is
+    appended until the encoding is unambiguous.
+    """
+    for n in range(1000):
+        candidate = url if n == 0 else f"{url}{'&' if '?' in url else '?'}v={n}"
+        raw = codecs.encode(candidate[::-1], 'rot_13').encode('latin1')
+        enc = base64.b64encode(raw).decode('ascii').rstrip('=')
+        if 'd' not in enc:
+            return enc.replace('/', 'd').replace('+', '-')
+    raise ValueError(f"Could not encode {url}")
+
+
+def _segment_bytes(index, size):
+    # MPEG-TS looking payload: 188-byte packets starting with the 0x47 sync byte
+    packet = bytes([0x47]) + hashlib.sha1(str(index).encode()).digest() * 10
+    packet = packet[:188]
+    return (packet * (size // 188 + 1))[:size]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "BenchFixture/1.0"
+
+    def log_message(self, fmt, *args):
+        pass  # Keep benchmark output clean
+
+    @property
+    def cfg(self):
+        return self.server.config
+
+    @property
+    def base(self):
+        return f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        hits = self.server.count(path)
+
+        if path == '/site/episode':
+            return self._page(self._hdfilmizle_page())
+        if path == '/site/series':
+            return self._page(self._series_page())
+        if path.startswith('/site/series/'):
+            return self._page(self._hdfilmizle_page(path.rsplit('-', 2)[1]))
+        if path == '/site/nested':
+            return self._page(f'<html><iframe src="{self.base}/site/nested/inner"></iframe></html>')
+        if path == '/site/nested/inner':
+            return self._page('<div><iframe data-src="/embed/vidrame/nested"></iframe></div>')
+        if path == '/site/dead':
+            time.sleep(self.cfg.dead_mirror_latency)
+            return self._page('<html>nothing here</html>')
+        if path.startswith('/embed/vidrame/'):
+            return self._page(self._vidrame_page(path.rsplit('/', 1)[1]))
+        if path.startswith('/photostack.net/v/'):
+            return self._stream(path)
+        if path == '/files/video.mp4':
+            if hits in self.cfg.file_fail_requests:
+                return self._send(503, b'try again', 'text/plain')
+            return self._file()
+        self._send(404, b'not found', 'text/plain')
+
+    # --- Pages ---
+
+    def _series_page(self):
+        links = ''.join(f'<li><a class="episode" href="/site/series/1-sezon-{n}-bolum">Episode {n}</a></li>'
+                        for n in range(1, self.cfg.episodes + 1))
+        return f'<html><body><a href="/about">About</a><ul>{links}</ul></body></html>'
+
+    def _hdfilmizle_page(self, episode='1'):
+        # First part is a slow dead mirror, second the real player
+        dead = f'{self.base}/site/dead'
+        live = f'{self.base}/embed/vidrame/ep{episode}'
+        return (f'<html><head><title>Episode {episode}</title></head><body><script>'
+                f'let parts = [{{"id":1,"data":"<iframe src=\\"{dead}\\" frameborder=0>"}},'
+                f'{{"id":2,"data":"<iframe src=\\"{live}\\" frameborder=0>"}}];'
+                '</script></body></html>')
+
+    def _vidrame_page(self, vid):
+        sub = f"{self.base}/photostack.net/v/{vid}/subs_English.vtt"
+        mp4 = encode_vidrame(f"{self.base}/files/video.mp4")
+        return ('<html><script>'
+                f'var player = new Player({{ file: EE.dd("{mp4}"), '
+                f'tracks: [{{ kind: "captions", src: "{sub}" }}] }});'
+                '</script></html>')
+
+    def _page(self, html):
+        time.sleep(self.cfg.page_latency)
+        self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+
+    # --- Streams ---
+
+    def _stream(self, path):
+        name = path.rsplit('/', 1)[1]
+        if name == 'master.m3u8':
+            body = ('#EXTM3U\n'
+                    '#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"\n'
+                    'media.m3u8?q=360\n'
+                    '#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080,CODECS="avc1.640028,mp4a.40.2"\n'
+                    'media.m3u8?q=1080\n')
+            return self._send(200, body.encode(), 'application/vnd.apple.mpegurl')
+        if name == 'media.m3u8' and path.split('/')[-2].startswith('live'):
+            return self._send(200, self._live_playlist().encode(), 'application/vnd.apple.mpegurl')
+        if name == 'media.m3u8':
+            lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:4', '#EXT-X-MEDIA-SEQUENCE:0']
+            for i in range(self.cfg.segments):
+                lines += ['#EXTINF:4.0,', f'seg{i}.ts']
+            lines.append('#EXT-X-ENDLIST')
+            return self._send(200, ('\n'.join(lines) + '\n').encode(), 'application/vnd.apple.mpegurl')
+        if name.endswith('.vtt'):
+            return self._send(200, b'WEBVTT\n\n00:00:01.000 --> 00:00:02.000\nHello\n', 'text/vtt')
+        if name.startswith('seg') and name.endswith('.ts'):
+            index = int(name[3:-3])
+            time.sleep(self.cfg.latency)
+            if index in self.cfg.broken_segments or self.server.should_fail(path):
+                return self._fault(_segment_bytes(index, self.cfg.segment_size))
+            return self._send(200, _segment_bytes(index, self.cfg.segment_size), 'video/mp2t')
+        self._send(404, b'not found', 'text/plain')
+
+    def _live_playlist(self):
+        # One new segment every live_segment seconds since the server started
+        cfg = self.cfg
+        produced = int((time.monotonic() - self.server.started) / cfg.live_segment) + 1
+        if cfg.live_end:
+            produced = min(produced, cfg.live_end)
+        first = max(0, produced - cfg.live_window)
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{max(1, round(cfg.live_segment))}',
+                 f'#EXT-X-MEDIA-SEQUENCE:{first}']
+        for i in range(first, produced):
+            lines += [f'#EXTINF:{cfg.live_segment:.3f},', f'seg{i}.ts']
+        if cfg.live_end and produced >= cfg.live_end:
+            lines.append('#EXT-X-ENDLIST')
+        return '\n'.join(lines) + '\n'
+
+    def _fault(self, body):
+        fault = self.cfg.fault
+        if fault == 'html':
+            return self._send(200, b'<!DOCTYPE html><html><body>502 Bad Gateway</body></html>', 'video/mp2t')
+        if fault == 'garbage':
+            return self._send(200, body[:1000] + bytes(len(body) - 1000), 'video/mp2t')
+        if fault == 'truncated':
+            self.send_response(200)
+            self.send_header('Content-Type', 'video/mp2t')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self._send(503, b'try again', 'text/plain')
+
+    def _file(self):
+        size = self.cfg.file_size
+        rng = self.headers.get('Range')
+        start, end = 0, size - 1
+        status = 200
+        if rng and rng.startswith('bytes='):
+            first, _, last = rng[6:].partition('-')
+            start = int(first or 0)
+            end = min(int(last) if last else size - 1, size - 1)
+            status = 206
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+
+        block = _segment_bytes(0, 64 * 1024)
+        remaining = end - start + 1
+        while remaining > 0:
+            n = min(remaining, len(block))
+            self.wfile.write(block[:n])
+            remaining -= n
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        super().__init__((host, port), FixtureHandler)
+        self.config = config or StreamConfig()
+        self.requests = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.started = time.monotonic()
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            return self.requests[path]
+
+    def should_fail(self, path):
+        """Deterministically fails the first request for fail_rate of the segments."""
+        if not self.config.fail_rate:
+            return False
+        bucket = int(hashlib.md5(path.encode()).hexdigest(), 16) % 1000
+        if bucket >= self.config.fail_rate * 1000:
+            return False
+        with self._lock:
+            if path in self._failed:
+                return False
+            self._failed.add(path)
+            return True
+
+    def handle_error(self, request, client_address):
+        # Clients abandon responses on purpose (probes, cancelled crawls)
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self._failed.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    srv = FixtureServer(port=8765).start()
+    print(f"Serving fixtures on {srv.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        srv.stop()
@@ -0,0 +1,320 @@
+"""
+Headless command line entry point.
+
+    python -m src.cli analyze URL [--scrape-only] [--json]
+    python -m src.cli download URL [-o PATH] [-f FORMAT] [--engine native]
+    python -m src.cli download LIVE_URL [--duration 2h] [--rollover 30m | --rollover-size 2G] [--from-start]
+    python -m src.cli batch FILE [-d DIR] [--max-concurrent N] [--per-host N]
+    python -m src.cli --limit-rate 2M batch FILE [--job-rate 500K]
+    python -m src.cli batch FILE -f auto [--target-time 45m]
+    python -m src.cli --backend process batch FILE
+    python -m src.cli bulk SERIES_URL [--json] [--download -d DIR]
+
+Never imports the GUI stack, and heavy modules (yt_dlp, requests) are only
+loaded by the subcommands that need them, so --help and scrape-only runs
+start quickly on display-less servers.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+# Allow `python src/cli.py` as well as `python -m src.cli`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_FORMAT = "bestvideo+bestaudio/best"
+DEFAULT_TEMPLATE = "%(title)s.%(ext)s"
+
+
+def _default_output(url, output_dir, engine):
+    """yt-dlp fills in the title itself; the native engine needs a concrete file name."""
+    if engine != 'native':
+        return os.path.join(output_dir, DEFAULT_TEMPLATE)
+    path = url.split('?')[0].rstrip('/')
+    parts = [p for p in path.split('/') if p and not p.endswith('.m3u8')]
+    name = re.sub(r'[^\w.-]+', '_', parts[-1] if parts else 'video')
+    return os.path.join(output_dir, f"{name}.mp4")
+
+
+def _print_progress(d):
+    if d['status'] == 'downloading':
+        pct = d.get('_percent_str') or ''
+        eta = d.get('_eta_str') or ''
+        sys.stdout.write(f"\r  {pct.strip():>7} | ETA {eta.strip()}   ")
+        sys.stdout.flush()
+    elif d['status'] == 'finished':
+        sys.stdout.write("\n")
+
+
+def cmd_analyze(args):
+    if args.scrape_only:
+        from src.core.scraper import SmartScraper
+        result = SmartScraper().deep_scan(args.url)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print(f"Video: {result['video_url'] or '-'}")
+            for sub in result['subs']:
+                print(f"Subtitle: {sub}")
+        return 0 if result['video_url'] else 1
+
+    from src.core.down_manager import DownloadManager
+    info = DownloadManager().analyze_url(args.url, use_cache=not args.no_cache, refresh=args.refresh)
+    if args.json:
+        print(json.dumps(info, indent=2, default=str))
+        return 0
+
+    print(f"Title: {info.get('title', 'Unknown Title')}")
+    print(f"Target: {info.get('url') or info.get('webpage_url') or args.url}")
+    seen = set()
+    for f in sorted(info.get('formats') or [], key=lambda x: x.get('height') or 0, reverse=True):
+        h = f.get('height')
+        if h and f.get('vcodec') != 'none' and h not in seen:
+            seen.add(h)
+            print(f"  {f['format_id']:<20} {h}p  {f.get('ext')}")
+    for sub in info.get('_external_subs') or []:
+        print(f"Subtitle: {sub}")
+    return 0
+
+
+def cmd_download(args):
+    from src.core.down_manager import DownloadManager
+    output = args.output or _default_output(args.url, os.getcwd(), args.engine)
+    try:
+        DownloadManager().download_stream(args.url, args.format, output, _print_progress,
+                                          engine=args.engine, concurrency=args.concurrency,
+                                          max_height=args.max_height, rate_limit=args.job_rate,
+                                          stream_remux=args.stream_remux, reuse=not args.no_reuse,
+                                          target_time=args.target_time, mirrors=args.mirror,
+                                          hash_segments=args.hash_segments, **_live_options(args))
+    except Exception as e:
+        print(f"Download failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _read_batch(path):
+    """
+    Batch file format, one job per line:  URL [OUTPUT] [FORMAT]
+    Blank lines and lines starting with '#' are ignored.
+    """
+    jobs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split()
+            jobs.append((fields[0], fields[1] if len(fields) > 1 else None, fields[2] if len(fields) > 2 else None))
+    return jobs
+
+
+def _manager_factory(args):
+    if args.backend == 'process':
+        from src.core.process_pool import ProcessDownloadManager
+        return ProcessDownloadManager
+    from src.core.down_manager import DownloadManager
+    return DownloadManager
+
+
+def _job_options(args):
+    return dict(engine=args.engine, concurrency=args.concurrency, max_height=args.max_height,
+                rate_limit=args.job_rate, stream_remux=args.stream_remux, reuse=not args.no_reuse,
+                target_time=args.target_time, hash_segments=args.hash_segments, **_live_options(args))
+
+
+def _live_options(args):
+    return dict(live_duration=args.duration, rollover_time=args.rollover, rollover_size=args.rollover_size,
+                live_from_start=args.from_start)
+
+
+def _open_queue(args, per_host):
+    from src.core.download_queue import DownloadQueue
+
+    def on_update(job):
+        if job.status in ('running', 'done', 'failed', 'cancelled'):
+            extra = f" ({job.error})" if job.error else ""
+            print(f"[#{job.id}] {job.status}: {job.url}{extra}")
+
+    return DownloadQueue(max_concurrent=args.max_concurrent, per_host_limit=per_host, on_update=on_update,
+                         manager_factory=_manager_factory(args))
+
+
+def _finish_queue(queue):
+    try:
+        queue.wait()
+    except KeyboardInterrupt:
+        print("Cancelling...")
+        queue.shutdown(cancel=True)
+        queue.wait(timeout=10)
+        return 130
+
+    failed = [j for j in queue.jobs() if j.status != 'done']
+    print(f"Finished: {len(queue.jobs()) - len(failed)} done, {len(failed)} not completed.")
+    return 1 if failed else 0
+
+
+def cmd_batch(args):
+    queue = _open_queue(args, args.per_host)
+    for url, output, fmt in _read_batch(args.file):
+        queue.add(url, fmt or args.format, output or _default_output(url, args.output_dir, args.engine),
+                  **_job_options(args))
+    return _finish_queue(queue)
+
+
+def cmd_bulk(args):
+    from src.core.bulk import BulkAnalyzer, download_target, episode_filename
+
+    analyzer = BulkAnalyzer(manager_factory=None if args.backend == 'thread' else _manager_factory(args),
+                            max_workers=args.workers, per_host=args.per_host, host_rate=args.host_rate,
+                            scrape_only=args.scrape_only, use_cache=not args.no_cache)
+    urls = args.urls if args.no_expand else analyzer.expand_all(args.urls)
+    queue = _open_queue(args, 2) if args.download else None
+
+    failed = 0
+    try:
+        for n, result in enumerate(analyzer.analyze(urls), 1):
+            info, error = result['info'], result['error']
+            failed += bool(error)
+            if args.json:
+                print(json.dumps({'url': result['url'], 'index': result['index'], 'elapsed': round(result['elapsed'], 3),
+                                  'error': str(error) if error else None, 'info': None if error else info}, default=str),
+                      flush=True)
+            elif error:
+                print(f"[{n}/{len(urls)}] FAILED {result['url']}: {error}", flush=True)
+            else:
+                title = info.get('title') or info.get('video_url') or '-'
+                print(f"[{n}/{len(urls)}] {result['elapsed']:.1f}s {title} <- {result['url']}", flush=True)
+
+            if queue and not error:
+                queue.add(download_target(info, result['url']), args.format,
+                          os.path.join(args.output_dir, episode_filename(result)),
+                          subtitles=info.get('_external_subs') or info.get('subs') or [],
+                          mirrors=info.get('_mirrors') or info.get('mirrors') or [], is_live=bool(info.get('is_live')),
+                          **_job_options(args))
+    except KeyboardInterrupt:
+        analyzer.cancel()
+        if queue:
+            queue.shutdown(cancel=True)
+        return 130
+
+    if queue:
+        code = _finish_queue(queue)
+        return code or (1 if failed else 0)
+    return 1 if failed else 0
+
+
+def cmd_gui(args):
+    from src.main import main as gui_main
+    gui_main()
+    return 0
+
+
+def _add_download_options(p):
+    p.add_argument('-f', '--format', default=DEFAULT_FORMAT,
+                   help="yt-dlp format string, or 'auto' to pick the best quality the connection can handle")
+    p.add_argument('--target-time', metavar='DURATION',
+                   help="With -f auto: finish each download within this time, e.g. 45m or 2h")
+    p.add_argument('--engine', choices=['ffmpeg', 'native'], default='ffmpeg',
+                   help="HLS downloader: ffmpeg via yt-dlp, or the native parallel segment engine")
+    p.add_argument('--concurrency', type=int, default=8, help="Parallel segments (native engine)")
+    p.add_argument('--max-height', type=int, default=None, help="Highest variant height (native engine)")
+    p.add_argument('--job-rate', metavar='RATE', help="Bandwidth cap per download, e.g. 500K or 2M")
+    p.add_argument('--stream-remux', action='store_true',
+                   help="Write the mp4 in one pass without intermediate files (native engine: no resume)")
+    p.add_argument('--hash-segments', action='store_true',
+                   help="Native engine: hash every segment so a resume re-verifies the partial file")
+    p.add_argument('--no-reuse', action='store_true',
+                   help="Always download, even if the same media was downloaded before")
+    p.add_argument('--duration', metavar='DURATION', help="Live streams: stop recording after e.g. 90m or 2h")
+    p.add_argument('--rollover', metavar='DURATION', help="Live streams: start a new file every e.g. 30m")
+    p.add_argument('--rollover-size', metavar='SIZE', help="Live streams: start a new file every e.g. 500M or 2G")
+    p.add_argument('--from-start', action='store_true',
+                   help="Live streams: also record what the stream still offers from before now (DVR)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="StreamDownloader (headless)")
+    parser.add_argument('--metrics-textfile', metavar='PATH',
+                        help="Also write job metrics to a Prometheus textfile (node exporter)")
+    parser.add_argument('--backend', choices=['thread', 'process'], default='thread',
+                        help="Run batch jobs in threads, or in a pool of worker processes (one per core)")
+    parser.add_argument('--limit-rate', metavar='RATE',
+                        help="Total bandwidth for all downloads, e.g. 2M (shared fairly between jobs)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('analyze', help="Resolve a page or stream URL")
+    p.add_argument('url')
+    p.add_argument('--scrape-only', action='store_true', help="Only run SmartScraper (no yt-dlp)")
+    p.add_argument('--json', action='store_true', help="Print the raw result as JSON")
+    p.add_argument('--no-cache', action='store_true', help="Bypass the analysis cache")
+    p.add_argument('--refresh', action='store_true', help="Re-analyze and overwrite the cache entry")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser('download', help="Download a single URL")
+    p.add_argument('url')
+    p.add_argument('-o', '--output', help=f"Output path (default: ./{DEFAULT_TEMPLATE.replace('%', '%%')})")
+    p.add_argument('--mirror', action='append', metavar='URL',
+                   help="Another URL serving the same stream; the fastest one is used (repeatable)")
+    _add_download_options(p)
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser('batch', help="Download every URL listed in a file")
+    p.add_argument('file', help="One job per line: URL [OUTPUT] [FORMAT]")
+    p.add_argument('-d', '--output-dir', default=os.getcwd())
+    p.add_argument('--max-concurrent', type=int, default=3)
+    p.add_argument('--per-host', type=int, default=2)
+    _add_download_options(p)
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser('bulk', help="Analyze every episode of a series / playlist page at once")
+    p.add_argument('urls', nargs='+', metavar='URL', help="Listing pages, playlists or episode URLs")
+    p.add_argument('--no-expand', action='store_true', help="Treat the URLs as episodes, don't look for links")
+    p.add_argument('--scrape-only', action='store_true', help="Only run SmartScraper (no yt-dlp)")
+    p.add_argument('--json', action='store_true', help="Print one JSON result per line as they finish")
+    p.add_argument('--no-cache', action='store_true', help="Bypass the analysis cache")
+    p.add_argument('--workers', type=int, default=12, help="Analyses running at once")
+    p.add_argument('--per-host', type=int, default=8, help="Analyses running at once against one host")
+    p.add_argument('--host-rate', type=float, default=8.0, help="Analyses started per second per host")
+    p.add_argument('--download', action='store_true', help="Queue each episode as soon as it is analyzed")
+    p.add_argument('-d', '--output-dir', default=os.getcwd())
+    p.add_argument('--max-concurrent', type=int, default=3)
+    _add_download_options(p)
+    p.set_defaults(func=cmd_bulk)
+
+    p = sub.add_parser('gui', help="Start the graphical interface")
+    p.set_defaults(func=cmd_gui)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.metrics_textfile:
+        from src.utils.metrics import metrics_exporter
+        metrics_exporter.textfile = args.metrics_textfile
+    if args.limit_rate or getattr(args, 'job_rate', None):
+        from src.core.bandwidth import bandwidth, parse_rate
+        try:
+            bandwidth.set_global_limit(parse_rate(args.limit_rate))
+            args.job_rate = parse_rate(getattr(args, 'job_rate', None))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+    if any(getattr(args, name, None) for name in ('target_time', 'duration', 'rollover', 'rollover_size')):
+        from src.core.bandwidth import parse_rate
+        from src.core.quality import parse_duration
+        try:
+            args.target_time = parse_duration(args.target_time)
+            args.duration = parse_duration(args.duration)
+            args.rollover = parse_duration(args.rollover)
+            args.rollover_size = parse_rate(args.rollover_size)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
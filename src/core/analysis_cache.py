@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from src.utils.config import CACHE_DIR
+from src.utils.logger import log
+
+
+class AnalysisCache:
+    """
+    Persistent on-disk cache for analyze_url results (one JSON file per URL).
+    Entries expire after a TTL that is shortened to the earliest expiry of any
+    signed CDN link inside the info dict, and the directory is kept under a
+    size budget by evicting the least recently used entries.
+    """
+
+    DEFAULT_TTL = 3 * 60 * 60          # Signed stream links usually live a few hours
+    EXPIRY_MARGIN = 5 * 60             # Don't hand out links that are about to die
+    MAX_BYTES = 50 * 1024 * 1024
+
+    # Query parameters CDNs commonly use for signed-link expiry (unix timestamps)
+    EXPIRY_PARAMS = ('expires', 'expire', 'exp', 'e', 'validto', 'valid_to')
+    # Tracking noise that doesn't change the page content
+    IGNORED_PARAMS = ('fbclid', 'gclid', 'ref')
+
+    def __init__(self, cache_dir=None, ttl=DEFAULT_TTL, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, "analysis")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def normalize_url(cls, url):
+        """Lowercases scheme/host, drops fragments and tracking params, sorts the query."""
+        parts = urlsplit(url.strip())
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                 if not k.lower().startswith('utm_') and k.lower() not in cls.IGNORED_PARAMS]
+        path = parts.path or '/'
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+    def _path_for(self, url):
+        key = hashlib.sha1(self.normalize_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url):
+        """Returns the cached info dict or None if missing/expired."""
+        path = self._path_for(url)
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+
+            if entry.get('expires_at', 0) <= time.time():
+                self._remove(path)
+                return None
+
+            # Touch for LRU ordering
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+
+        log.info(f"Analysis cache hit: {url}")
+        return entry['info']
+
+    def put(self, url, info):
+        """Stores an info dict. Unserializable values are stored as strings."""
+        ttl = self._ttl_for(info)
+        if ttl <= 0:
+            return
+
+        entry = {
+            'url': self.normalize_url(url),
+            'stored_at': time.time(),
+            'expires_at': time.time() + ttl,
+            'info': info,
+        }
+        path = self._path_for(url)
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, default=str)
+                os.replace(tmp, path)
+            except (OSError, TypeError, ValueError) as e:
+                log.warning(f"Could not write analysis cache entry: {e}")
+                self._remove(tmp)
+                return
+            self._evict()
+
+    def invalidate(self, url):
+        with self._lock:
+            self._remove(self._path_for(url))
+
+    def clear(self):
+        with self._lock:
+            for path in self._entries():
+                self._remove(path)
+
+    def _ttl_for(self, info):
+        """Default TTL, shortened to the earliest signed-link expiry found in the info."""
+        ttl = self.ttl
+        now = time.time()
+        for url in self._iter_urls(info):
+            query = dict((k.lower(), v) for k, v in parse_qsl(urlsplit(url).query))
+            for name in self.EXPIRY_PARAMS:
+                value = query.get(name, '')
+                # Only trust values that look like unix timestamps
+                if value.isdigit() and len(value) == 10:
+                    ttl = min(ttl, int(value) - now - self.EXPIRY_MARGIN)
+        return ttl
+
+    def _iter_urls(self, info):
+        if info.get('url'):
+            yield info['url']
+        for f in info.get('formats') or []:
+            if f.get('url'):
+                yield f['url']
+        for sub in info.get('_external_subs') or []:
+            yield sub
+
+    def _entries(self):
+        try:
+            return [os.path.join(self.cache_dir, n) for n in os.listdir(self.cache_dir) if n.endswith('.json')]
+        except OSError:
+            return []
+
+    def _evict(self):
+        """Drops least recently used entries until the directory is under max_bytes."""
+        entries = []
+        for path in self._entries():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        while entries and total > self.max_bytes:
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,203 @@
+import re
+import time
+import threading
+from src.utils.logger import log
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket in bytes per second. rate=None means unlimited.
+
+    consume(n) takes n tokens and, if that leaves the bucket in debt, sleeps
+    until the debt is paid back. Concurrent consumers therefore queue up behind
+    each other and the combined rate stays at `rate`. Sleeps are sliced so a
+    rate change (set_rate) takes effect within SLICE seconds.
+    """
+
+    SLICE = 0.25
+
+    def __init__(self, rate=None, burst=1.0):
+        self.rate = rate
+        self.burst = burst      # Seconds of traffic that may accumulate while idle
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            if not rate:
+                self._tokens = 0.0
+
+    def consume(self, n, cancel=None):
+        with self._lock:
+            if not self.rate:
+                return
+            self._refill()
+            self._tokens -= n
+
+        while True:
+            with self._lock:
+                if not self.rate:
+                    return
+                self._refill()
+                wait = -self._tokens / self.rate
+            if wait <= 0 or (cancel and cancel.is_set()):
+                return
+            time.sleep(min(wait, self.SLICE))
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self._tokens = min(self._tokens + (now - self._stamp) * self.rate, self.rate * self.burst)
+        self._stamp = now
+
+
+class JobThrottle:
+    """
+    Bandwidth share of one download job. Every fetcher working for the job
+    (segment workers, range connections, subtitles, yt-dlp) calls consume().
+    """
+
+    def __init__(self, manager, limit=None, name=None):
+        self.manager = manager
+        self.limit = limit          # Own cap in bytes/s, None = only the global limit applies
+        self.name = name
+        self.bucket = TokenBucket()
+        self.on_rate = None         # Optional callback(rate) on every rebalance, e.g. to forward it to a worker process
+        self.shapeable = True       # False while ffmpeg may be fetching the job; no hook can slow ffmpeg down
+
+    @property
+    def active(self):
+        """True if this job is throttled right now."""
+        return bool(self.bucket.rate)
+
+    def consume(self, n, cancel=None):
+        self.bucket.consume(n, cancel)
+
+    def set_limit(self, limit):
+        """Changes this job's cap at runtime."""
+        self.limit = limit or None
+        if not self.shapeable:
+            log.warning(f"{self.name or 'Download'} may be fetched by ffmpeg (HLS/DASH), which can't be slowed "
+                        "down while it runs; if so, the new limit applies from its next start.")
+        self.manager.rebalance()
+
+    def close(self):
+        self.manager.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def progress_hook(self):
+        """
+        yt-dlp progress hook that throttles by blocking the download thread.
+        Hooks run after every received block, so this applies backpressure to
+        plain HTTP and fragment (HLS/DASH) downloads alike.
+        """
+        seen = {}
+
+        def hook(d):
+            if d.get('status') != 'downloading':
+                return
+            key = d.get('filename')
+            downloaded = d.get('downloaded_bytes') or 0
+            delta = downloaded - seen.get(key, 0)
+            seen[key] = downloaded
+            if delta > 0:
+                # Blocks reach this hook, so yt-dlp's own downloader is running, not ffmpeg
+                self.shapeable = True
+                self.consume(delta)
+        return hook
+
+
+class BandwidthManager:
+    """
+    Global rate limit plus optional per-job caps.
+
+    The global limit is split between the open jobs by water-filling: jobs whose
+    own cap is below an equal share get their cap, the rest share what is left.
+    Shares are recomputed whenever a job opens or closes, or a limit changes,
+    so running downloads speed up or slow down without restarting.
+    """
+
+    def __init__(self, global_limit=None):
+        self.global_limit = global_limit or None
+        self._jobs = []
+        self._lock = threading.Lock()
+
+    def open(self, limit=None, name=None):
+        """Registers a job. Returns its JobThrottle; close() it when the job ends."""
+        throttle = JobThrottle(self, limit or None, name)
+        with self._lock:
+            self._jobs.append(throttle)
+        self.rebalance()
+        return throttle
+
+    def release(self, throttle):
+        with self._lock:
+            if throttle in self._jobs:
+                self._jobs.remove(throttle)
+        self.rebalance()
+
+    def set_global_limit(self, limit):
+        self.global_limit = limit or None
+        log.info(f"Global bandwidth limit: {format_rate(self.global_limit)}")
+        with self._lock:
+            fixed = sum(1 for job in self._jobs if not job.shapeable)
+        if fixed:
+            log.warning(f"{fixed} running download(s) may be fetched by ffmpeg and keep their speed until restarted.")
+        self.rebalance()
+
+    @property
+    def limited(self):
+        return bool(self.global_limit)
+
+    def rebalance(self):
+        with self._lock:
+            jobs = list(self._jobs)
+            remaining = self.global_limit
+
+            # Smallest caps first; uncapped jobs last
+            jobs.sort(key=lambda j: j.limit or float('inf'))
+            for i, job in enumerate(jobs):
+                if remaining is None:
+                    rate = job.limit
+                else:
+                    share = remaining / (len(jobs) - i)
+                    rate = min(job.limit, share) if job.limit else share
+                    remaining -= rate
+                job.bucket.set_rate(rate)
+                if job.on_rate:
+                    job.on_rate(rate)
+
+
+RATE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?(?:/s)?\s*$', re.IGNORECASE)
+
+
+def parse_rate(text):
+    """'500K' / '2.5M' / '1000' -> bytes per second. Empty or '0' -> None (unlimited)."""
+    if text is None or str(text).strip() in ('', '0'):
+        return None
+    m = RATE_PATTERN.match(str(text))
+    if not m:
+        raise ValueError(f"Invalid rate: {text!r} (use e.g. 500K, 2M)")
+    number, unit = m.groups()
+    return int(float(number) * 1024 ** ' kmg'.index(unit.lower() or ' '))
+
+
+def format_rate(rate):
+    if not rate:
+        return 'unlimited'
+    for unit in ('B', 'KiB', 'MiB'):
+        if rate < 1024:
+            return f"{rate:.0f} {unit}/s"
+        rate /= 1024
+    return f"{rate:.1f} GiB/s"
+
+
+bandwidth = BandwidthManager()
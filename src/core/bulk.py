@@ -0,0 +1,193 @@
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from src.core import http_client
+from src.core.down_manager import DownloadManager, DownloadCancelled
+from src.core.extractors.registry import registry
+from src.core.ydl_pool import YdlPool
+from src.utils.logger import log
+
+
+class HostLimiter:
+    """
+    Per-host admission for bulk work: at most `per_host` calls run against one
+    host at a time, and after an initial burst of `per_host` starts, new calls
+    start at most `rate` times per second (None = no pacing), so a 50-episode
+    season doesn't hit the site in one go.
+    """
+
+    def __init__(self, per_host=4, rate=None):
+        self.per_host = per_host
+        self.rate = rate
+        self._running = {}
+        self._due = {}              # Per host: when the start schedule catches up with its burst
+        self._cond = threading.Condition()
+
+    def acquire(self, host, stop=None):
+        """Blocks until `host` has a free slot. Returns False if stop was set while waiting."""
+        with self._cond:
+            while self._running.get(host, 0) >= self.per_host:
+                if stop and stop.is_set():
+                    return False
+                self._cond.wait(0.25)
+            self._running[host] = self._running.get(host, 0) + 1
+
+            # Reserve a start time while holding the lock, then sleep outside it
+            now = time.monotonic()
+            start = now
+            if self.rate:
+                due = max(self._due.get(host, now), now)
+                start = max(now, due - (self.per_host - 1) / self.rate)
+                self._due[host] = due + 1.0 / self.rate
+
+        while not (stop and stop.is_set()):
+            delay = start - time.monotonic()
+            if delay <= 0:
+                return True
+            time.sleep(min(delay, 0.25))
+        self.release(host)
+        return False
+
+    def release(self, host):
+        with self._cond:
+            self._running[host] -= 1
+            self._cond.notify_all()
+
+
+class BulkAnalyzer:
+    """
+    Analyzes a whole series / playlist at once.
+
+    expand() turns a listing page into its episode URLs (site extractors first,
+    then yt-dlp's flat playlist extraction). analyze() runs analyze_url (or only
+    SmartScraper.deep_scan with scrape_only=True) for many URLs concurrently,
+    bounded by max_workers and a HostLimiter, and yields each result as soon as
+    it finishes, so callers can queue downloads while the rest is still running.
+
+    Each result is a dict: {'url', 'index', 'info', 'error', 'elapsed'}; 'info'
+    is what analyze_url / deep_scan returned, 'error' the exception otherwise.
+    """
+
+    MAX_WORKERS = 12
+    PER_HOST = 8            # Episode pages of one series all live on the same host
+    HOST_RATE = 8.0         # Analyses started per second per host, after the first PER_HOST
+
+    def __init__(self, manager_factory=None, max_workers=MAX_WORKERS, per_host=PER_HOST, host_rate=HOST_RATE,
+                 scrape_only=False, use_cache=True):
+        self.max_workers = max_workers
+        self.limiter = HostLimiter(per_host, host_rate)
+        self.scrape_only = scrape_only
+        self.use_cache = use_cache
+        # Thread workers share one YoutubeDL pool sized to them instead of rebuilding per call
+        self.ydl_pool = YdlPool(max_idle=max_workers)
+        self.manager_factory = manager_factory or (lambda: DownloadManager(ydl_pool=self.ydl_pool))
+        self._stop = threading.Event()
+
+    def cancel(self):
+        """Stops starting new analyses; the running ones finish or get cancelled."""
+        self._stop.set()
+
+    def expand(self, url):
+        """Episode URLs behind a listing page or playlist, or [url] if it is a single video."""
+        try:
+            res = http_client.get(url, headers={'Referer': http_client.PAGE_REFERER})
+            res.raise_for_status()
+            episodes = registry.episodes(url, res.text)
+            if episodes:
+                log.info(f"Found {len(episodes)} episode links on {url}")
+                return episodes
+        except Exception as e:
+            log.warning(f"Could not read listing page {url}: {e}")
+
+        if not self.scrape_only:
+            episodes = self._flat_playlist(url)
+            if episodes:
+                log.info(f"yt-dlp listed {len(episodes)} entries for {url}")
+                return episodes
+        return [url]
+
+    def expand_all(self, urls):
+        """expand() for several sources, de-duplicated, in input order."""
+        episodes = []
+        for url in urls:
+            episodes += [u for u in self.expand(url) if u not in episodes]
+        return episodes
+
+    def analyze(self, urls):
+        """Yields one result dict per URL in completion order."""
+        urls = list(dict.fromkeys(urls))
+        self._stop.clear()
+        log.info(f"Bulk analysis of {len(urls)} URLs ({self.max_workers} workers)")
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = {pool.submit(self._analyze_one, url, index): url for index, url in enumerate(urls)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    pending.pop(fut)
+                    result = fut.result()
+                    if result is not None:  # None = skipped after cancel()
+                        yield result
+        finally:
+            # Also reached when the caller stops iterating early
+            self._stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.ydl_pool.clear()
+
+    def _analyze_one(self, url, index):
+        host = (urlparse(url).hostname or '').lower()
+        if not self.limiter.acquire(host, self._stop):
+            return None
+        started = time.perf_counter()
+        result = {'url': url, 'index': index, 'info': None, 'error': None}
+        try:
+            if self.scrape_only:
+                from src.core.scraper import SmartScraper
+                result['info'] = SmartScraper().deep_scan(url)
+                if not result['info']['video_url']:
+                    result['error'] = ValueError("No media links found.")
+            else:
+                result['info'] = self.manager_factory().analyze_url(url, use_cache=self.use_cache)
+        except DownloadCancelled:
+            return None
+        except Exception as e:
+            log.error(f"Bulk analysis failed for {url}: {e}")
+            result['error'] = e
+        finally:
+            self.limiter.release(host)
+        result['elapsed'] = time.perf_counter() - started
+        return result
+
+    def _flat_playlist(self, url):
+        # extract_flat lists playlist entries without resolving every video
+        opts = {'skip_download': True, 'extract_flat': 'in_playlist'}
+        try:
+            with self.ydl_pool.borrow(opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            log.debug(f"No yt-dlp playlist at {url}: {e}")
+            return []
+        if not info or info.get('_type') != 'playlist':
+            return []
+        return [e.get('url') or e.get('webpage_url') for e in info.get('entries') or []
+                if e and (e.get('url') or e.get('webpage_url'))]
+
+
+def download_target(info, url):
+    """URL to hand to download_stream for an analysis result (the stream itself if it was found)."""
+    if 'video_url' in info:  # scrape_only result
+        return info['video_url'] or url
+    target = info.get('original_url', info.get('webpage_url', url))
+    # Same test as the single-download path, so tokenised links ('...m3u8?token=') count too
+    if DownloadManager._is_m3u8(info.get('url') or ''):
+        target = info['url']
+    return target
+
+
+def episode_filename(result, ext='mp4'):
+    """'03 - Title.mp4' for a bulk result; numbered by listing order so episodes sort correctly."""
+    title = (result['info'] or {}).get('title') or 'Episode'
+    title = re.sub(r'[\\/:*?"<>|\s]+', ' ', title).strip() or 'Episode'
+    return f"{result['index'] + 1:02d} - {title[:120]}.{ext}"
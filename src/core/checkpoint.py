@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import hashlib
+from src.utils.logger import log
+
+
+class HlsCheckpoint:
+    """
+    Resume manifest for native HLS downloads, stored next to the output file.
+
+    Records the playlist URL, the chosen variant (and its MediaStore content
+    key) and, per track ('video',
+    'audio'), every completed segment with its byte offset and length inside
+    the track's part file. A restarted job verifies those segments against the
+    part file and only fetches what is missing.
+
+    With hashing=True each segment's sha256 is recorded too, and a resume
+    re-reads the part file and refetches from the first segment whose bytes
+    no longer match (e.g. after a crash mid-write or disk trouble).
+    """
+
+    VERSION = 1
+    SAVE_INTERVAL = 2.0   # Seconds between manifest writes (each one fsyncs)
+
+    def __init__(self, output_path, hashing=False):
+        self.path = f"{output_path}.checkpoint.json"
+        self.hashing = hashing
+        self.data = None
+        self._last_save = 0.0
+
+    # --- Lifecycle ---
+
+    def load(self, playlist_url):
+        """
+        Loads an existing manifest for the same playlist URL.
+        Returns True when there is something to resume.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+
+        if data and data.get('version') == self.VERSION and data.get('playlist_url') == playlist_url:
+            self.data = data
+            log.info(f"Found checkpoint: {self.path}")
+            return True
+
+        self.data = {'version': self.VERSION, 'playlist_url': playlist_url, 'variant': None, 'tracks': {}}
+        return False
+
+    @property
+    def variant(self):
+        return self.data.get('variant') if self.data else None
+
+    def set_variant(self, variant):
+        self.data['variant'] = variant
+        self.save(force=True)
+
+    def content_key(self, media_url):
+        """MediaStore content key recorded for media_url, so a resume doesn't refetch segments to compute it."""
+        recorded = self.data.get('content_key') if self.data else None
+        return recorded['key'] if recorded and recorded.get('media_url') == media_url else None
+
+    def set_content_key(self, media_url, key):
+        self.data['content_key'] = {'media_url': media_url, 'key': key}
+        self.save(force=True)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def save(self, force=False):
+        """Atomically writes the manifest (throttled unless force=True)."""
+        now = time.time()
+        if not force and now - self._last_save < self.SAVE_INTERVAL:
+            return
+        self._last_save = now
+
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    # --- Tracks ---
+
+    def begin_track(self, name, media_url, part_path, segment_count):
+        """
+        Prepares a track for (re)download and returns (resume_index, resume_offset).
+        Segments are verified against the part file; anything after the first
+        missing or truncated segment is discarded and fetched again.
+        """
+        track = self.data['tracks'].get(name)
+        if not track or track.get('segment_count') != segment_count or not os.path.exists(part_path):
+            if track:
+                log.warning(f"Checkpoint for '{name}' does not match the current playlist, starting over.")
+            self.data['tracks'][name] = {
+                'media_url': media_url,
+                'part': os.path.basename(part_path),
+                'segment_count': segment_count,
+                'init_length': None,
+                'segments': {},
+                'complete': False,
+            }
+            self.save(force=True)
+            return 0, 0
+
+        # Signed segment URLs may have been re-issued, the layout is what matters
+        track['media_url'] = media_url
+        size = os.path.getsize(part_path)
+
+        offset = 0
+        if track.get('init_length') is not None:
+            if track['init_length'] > size:
+                track['init_length'] = None
+                track['segments'] = {}
+                return 0, 0
+            offset = track['init_length']
+
+        index = 0
+        segments = track['segments']
+        with open(part_path, 'rb') as part:
+            while str(index) in segments:
+                seg_offset, length, *digest = segments[str(index)]
+                if seg_offset != offset or seg_offset + length > size:
+                    break
+                if digest and self.hashing:
+                    part.seek(seg_offset)
+                    if hashlib.sha256(part.read(length)).hexdigest() != digest[0]:
+                        log.warning(f"Segment {index} of '{name}' does not match its recorded hash, refetching from there.")
+                        break
+                offset += length
+                index += 1
+
+        # Forget anything beyond the verified prefix
+        for key in [k for k in segments if int(k) >= index]:
+            del segments[key]
+        track['complete'] = track['complete'] and index == segment_count
+        self.save(force=True)
+
+        if index:
+            log.info(f"Resuming '{name}' at segment {index}/{segment_count} ({offset} bytes verified).")
+        return index, offset
+
+    def mark_init(self, name, length):
+        self.data['tracks'][name]['init_length'] = length
+        self.save()
+
+    def mark_segment(self, name, index, offset, length, digest=None):
+        self.data['tracks'][name]['segments'][str(index)] = [offset, length] + ([digest] if digest else [])
+        self.save()
+
+    def mark_complete(self, name):
+        self.data['tracks'][name]['complete'] = True
+        self.save(force=True)
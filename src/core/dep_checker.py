@@ -1,99 +1,323 @@
 import os
-import sys
+import json
+import struct
 import shutil
+import hashlib
 import zipfile
-import requests
+import zlib
 import threading
-from src.utils.config import BIN_DIR, FFMPEG_EXE, FFPROBE_EXE, FFMPEG_ZIP_URL, ensure_dires
+from concurrent.futures import ThreadPoolExecutor
+from src.core import http_client
+from src.utils.config import (BIN_DIR, BUNDLED_FFMPEG, BUNDLED_FFPROBE, FFMPEG_ZIP_URL, FFMPEG_SHA256_URL,
+                              ensure_dires, find_binary)
 from src.utils.logger import log
 
+# Zip structures (see APPNOTE.TXT): end of central directory, central directory entry, local file header
+EOCD_SIG = b'PK\x05\x06'
+EOCD_STRUCT = struct.Struct('<4s4H2LH')
+CDIR_STRUCT = struct.Struct('<4s6H3L5H2L')
+LOCAL_STRUCT = struct.Struct('<4s5H3L2H')
+
+
 class DependencyManager:
     """
     Manages external dependencies like FFmpeg.
     Ensures they exist in the local app data so the user doesn't need to install them manually.
+
+    A manifest next to the binaries records their size, mtime and SHA-256, so a
+    valid install is recognised without downloading anything (and, as long as
+    size and mtime are unchanged, without hashing; check_ffmpeg may still hash
+    ~160 MB, so call it off the UI thread).
+
+    The archive's published SHA-256 covers the whole zip, so when it is
+    available setup does a resumable full archive download and verifies it
+    before installing. Without a published checksum only the two binaries are
+    fetched out of the remote zip (byte ranges, decompressed straight to disk,
+    checked against the zip's CRC-32s); servers without range support get the
+    full archive download too.
     """
 
+    CHUNK_SIZE = 1024 * 1024
+    TAIL_SIZE = 256 * 1024          # Enough for the central directory of the essentials zip
+    MANIFEST = os.path.join(BIN_DIR, "ffmpeg.manifest.json")
+    ARCHIVE_PART = os.path.join(BIN_DIR, "ffmpeg_release.zip.part")
+
+    # Member suffix inside the zip -> install path
+    TARGETS = {
+        'bin/ffmpeg.exe': BUNDLED_FFMPEG,
+        'bin/ffprobe.exe': BUNDLED_FFPROBE,
+    }
+
+    def __init__(self):
+        self.session = http_client.get_session()
+        self._progress_lock = threading.Lock()
+
     def check_ffmpeg(self) -> bool:
-        """Video conversion requires FFmpeg. Checks if it exists."""
-        return os.path.exists(FFMPEG_EXE) and os.path.exists(FFPROBE_EXE)
+        """
+        Video conversion requires FFmpeg. Checks for a verified bundled copy or one on PATH.
+        Can hash the bundled binaries, so don't call it on the UI thread.
+        """
+        if os.path.exists(BUNDLED_FFMPEG) or os.path.exists(BUNDLED_FFPROBE):
+            return self._verify_install()
+        return bool(shutil.which('ffmpeg') and shutil.which('ffprobe'))
 
     def download_ffmpeg(self, progress_callback=None):
         """
-        Downloads FFmpeg extract only the binaries, and cleans up.
+        Downloads FFmpeg, extracts only the binaries and records their checksums.
         This runs in a blocking manner, usually called from a background thread.
-        
+
         Args:
             progress_callback (function): Optional callback(float) for progress 0.0 to 1.0
         """
+        if os.name != 'nt':
+            raise Exception("Automatic FFmpeg setup is only available on Windows. "
+                            "Please install ffmpeg with your package manager.")
         ensure_dires()
-        
-        zip_path = os.path.join(BIN_DIR, "ffmpeg_temp.zip")
-        
+
+        if self._verify_install():
+            log.info("FFmpeg already installed and verified, skipping download.")
+            if progress_callback: progress_callback(1.0)
+            return
+
         log.info(f"Downloading FFmpeg from {FFMPEG_ZIP_URL}...")
-        
         try:
-            # 1. Download Content
-            with requests.get(FFMPEG_ZIP_URL, stream=True) as r:
-                r.raise_for_status()
-                total_length = r.headers.get('content-length')
-                
-                with open(zip_path, 'wb') as f:
-                    if total_length is None: # No content length header
-                        f.write(r.content)
-                        if progress_callback: progress_callback(0.5)
-                    else:
-                        dl = 0
-                        total_length = int(total_length)
-                        for data in r.iter_content(chunk_size=4096):
-                            dl += len(data)
-                            f.write(data)
-                            if progress_callback:
-                                # Mapping download to 0.0 - 0.8 range of total process
-                                percent = (dl / total_length) * 0.8
-                                progress_callback(percent)
-            
-            log.info("Download complete. Extracting...")
-            
-            # 2. Extract specific files
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                # The zip structure is usually ffmpeg-version-essentials/bin/ffmpeg.exe
-                # We need to find the paths inside the zip dynamically
-                ffmpeg_src = None
-                ffprobe_src = None
-                
-                for name in zf.namelist():
-                    if name.endswith("bin/ffmpeg.exe"):
-                        ffmpeg_src = name
-                    elif name.endswith("bin/ffprobe.exe"):
-                        ffprobe_src = name
-                
-                if not ffmpeg_src or not ffprobe_src:
-                    raise Exception("Could not find ffmpeg.exe or ffprobe.exe in the downloaded zip!")
+            # 1. A published checksum covers the whole archive, so only a full
+            #    (resumable) download can be verified against it before installing
+            expected = self._remote_sha256()
+            # 2. No checksum: fetch just the two binaries out of the remote zip (CRC-32 checked)
+            if expected or not self._extract_remote_members(progress_callback):
+                # 3. Full download (resumed if a part exists), verified, then extracted
+                self._download_archive(progress_callback, expected)
+                self._extract_archive()
 
-                # Extract specifically to target
-                with zf.open(ffmpeg_src) as src, open(FFMPEG_EXE, 'wb') as dst:
-                    shutil.copyfileobj(src, dst)
-                
-                with zf.open(ffprobe_src) as src, open(FFPROBE_EXE, 'wb') as dst:
-                    shutil.copyfileobj(src, dst)
-            
-            if progress_callback: progress_callback(0.9)
-
-            # 3. Cleanup
-            log.info("Cleaning up zip file...")
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-            
+            # 3. Remember checksums so the next start skips all of this
+            self._write_manifest()
             if progress_callback: progress_callback(1.0)
             log.info("FFmpeg setup complete.")
 
         except Exception as e:
             log.error(f"Failed to setup FFmpeg: {e}")
-            # Cleanup on failure
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
+            for path in self.TARGETS.values():
+                if os.path.exists(f"{path}.part"):
+                    os.remove(f"{path}.part")
             raise e
 
     def get_ffmpeg_path(self):
         """Returns the path to the ffmpeg executable."""
-        return FFMPEG_EXE
+        return find_binary(BUNDLED_FFMPEG, "ffmpeg")
+
+    # --- Checksum cache ---
+
+    def _verify_install(self):
+        """
+        True if both bundled binaries exist and match the manifest. Files whose
+        size and mtime are unchanged are trusted without re-hashing; an install
+        from before the manifest existed is adopted as-is.
+        """
+        paths = list(self.TARGETS.values())
+        if not all(os.path.exists(p) for p in paths):
+            return False
+
+        manifest = self._read_manifest()
+        if not manifest:
+            log.info("Recording checksums of existing FFmpeg install.")
+            self._write_manifest()
+            return True
+
+        for path in paths:
+            entry = manifest.get(os.path.basename(path))
+            if not entry:
+                return False
+            st = os.stat(path)
+            if st.st_size != entry['size']:
+                log.warning(f"{path} has the wrong size, FFmpeg will be re-downloaded.")
+                return False
+            if st.st_mtime_ns != entry['mtime_ns'] and _sha256(path) != entry['sha256']:
+                log.warning(f"{path} failed checksum verification, FFmpeg will be re-downloaded.")
+                return False
+        return True
+
+    def _read_manifest(self):
+        try:
+            with open(self.MANIFEST, 'r', encoding='utf-8') as f:
+                return json.load(f).get('files', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        files = {}
+        for path in self.TARGETS.values():
+            st = os.stat(path)
+            files[os.path.basename(path)] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': _sha256(path)}
+        tmp = f"{self.MANIFEST}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'source': FFMPEG_ZIP_URL, 'files': files}, f, indent=2)
+        os.replace(tmp, self.MANIFEST)
+
+    # --- Remote member extraction ---
+
+    def _extract_remote_members(self, progress_callback):
+        """
+        Reads the zip's central directory with a tail range request and streams
+        only the wanted members through zlib into their install paths, checking
+        each against its CRC-32. Returns False if the server can't do ranges.
+        """
+        res = self.session.get(FFMPEG_ZIP_URL, headers={'Range': f'bytes=-{self.TAIL_SIZE}'},
+                               timeout=http_client.DEFAULT_TIMEOUT, stream=True)
+        if res.status_code != 206:
+            res.close()
+            log.info("Server does not support range requests, downloading the full archive.")
+            return False
+
+        size = int(res.headers['Content-Range'].rsplit('/', 1)[1])
+        tail = res.content
+        members = self._find_members(tail, size)
+        if members is None:
+            return False
+
+        total = sum(m['compressed_size'] for m in members)
+        done = [0]
+
+        def on_bytes(n):
+            with self._progress_lock:
+                done[0] += n
+                if progress_callback:
+                    progress_callback(done[0] / total * 0.95)
+
+        # Both binaries at once, each on its own connection
+        with ThreadPoolExecutor(max_workers=len(members)) as pool:
+            for fut in [pool.submit(self._fetch_member, m, on_bytes) for m in members]:
+                fut.result()
+        return True
+
+    def _find_members(self, tail, size):
+        """Parses the central directory found in `tail` (the last bytes of a `size` byte zip)."""
+        pos = tail.rfind(EOCD_SIG)
+        if pos < 0:
+            return None
+        _, _, _, _, count, cd_size, cd_offset, _ = EOCD_STRUCT.unpack_from(tail, pos)
+        if cd_offset == 0xFFFFFFFF:
+            return None  # Zip64, let zipfile handle it
+        start = cd_offset - (size - len(tail))
+        if start < 0:
+            return None  # Central directory larger than our tail fetch
+
+        members = {}
+        pos = start
+        for _ in range(count):
+            (_, _, _, flags, method, _, _, crc, csize, usize,
+             name_len, extra_len, comment_len, _, _, _, offset) = CDIR_STRUCT.unpack_from(tail, pos)
+            pos += CDIR_STRUCT.size
+            name = tail[pos:pos + name_len].decode('utf-8', errors='replace')
+            pos += name_len + extra_len + comment_len
+
+            for suffix, target in self.TARGETS.items():
+                if name.endswith(suffix) and method in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) and not flags & 1:
+                    members[suffix] = {'name': name, 'method': method, 'crc': crc, 'offset': offset,
+                                       'compressed_size': csize, 'size': usize, 'target': target}
+
+        if len(members) != len(self.TARGETS):
+            raise Exception("Could not find ffmpeg.exe or ffprobe.exe in the downloaded zip!")
+        return list(members.values())
+
+    def _fetch_member(self, member, on_bytes):
+        # The local header's extra field can differ from the central one, so read it first
+        first = member['offset']
+        head = self._get_range(first, first + LOCAL_STRUCT.size - 1).content
+        name_len, extra_len = LOCAL_STRUCT.unpack(head)[-2:]
+        data_start = first + LOCAL_STRUCT.size + name_len + extra_len
+        data_end = data_start + member['compressed_size'] - 1
+
+        part = f"{member['target']}.part"
+        inflater = zlib.decompressobj(-zlib.MAX_WBITS) if member['method'] == zipfile.ZIP_DEFLATED else None
+        crc = 0
+        with self._get_range(data_start, data_end, stream=True) as res, open(part, 'wb') as out:
+            for chunk in res.iter_content(chunk_size=self.CHUNK_SIZE):
+                on_bytes(len(chunk))
+                data = inflater.decompress(chunk) if inflater else chunk
+                crc = zlib.crc32(data, crc)
+                out.write(data)
+            if inflater:
+                data = inflater.flush()
+                crc = zlib.crc32(data, crc)
+                out.write(data)
+
+        if crc != member['crc'] or os.path.getsize(part) != member['size']:
+            os.remove(part)
+            raise Exception(f"Checksum mismatch for {member['name']}")
+        os.replace(part, member['target'])
+        log.info(f"Extracted {member['name']} -> {member['target']}")
+
+    def _get_range(self, first, last, stream=False):
+        res = self.session.get(FFMPEG_ZIP_URL, headers={'Range': f'bytes={first}-{last}'},
+                               timeout=http_client.DEFAULT_TIMEOUT, stream=stream)
+        if res.status_code != 206:
+            res.close()
+            raise Exception(f"Range request failed with HTTP {res.status_code}")
+        return res
+
+    # --- Full archive fallback ---
+
+    def _download_archive(self, progress_callback, expected=None):
+        """
+        Downloads the whole zip into ARCHIVE_PART, resuming a previous partial
+        download, and checks it against the published SHA-256 `expected`.
+        """
+        have = os.path.getsize(self.ARCHIVE_PART) if os.path.exists(self.ARCHIVE_PART) else 0
+        headers = {'Range': f'bytes={have}-'} if have else None
+
+        with http_client.get(FFMPEG_ZIP_URL, headers=headers, stream=True) as r:
+            if r.status_code == 416:
+                log.info("Partial archive is already complete.")
+                return
+            r.raise_for_status()
+            if have and r.status_code == 206:
+                log.info(f"Resuming FFmpeg download at {have} bytes.")
+                mode = 'ab'
+            else:
+                have, mode = 0, 'wb'
+
+            length = r.headers.get('content-length')
+            total = have + int(length) if length else None
+            dl = have
+            with open(self.ARCHIVE_PART, mode) as f:
+                for data in r.iter_content(chunk_size=self.CHUNK_SIZE):
+                    dl += len(data)
+                    f.write(data)
+                    if progress_callback and total:
+                        # Mapping download to 0.0 - 0.8 range of total process
+                        progress_callback(dl / total * 0.8)
+
+        if expected and _sha256(self.ARCHIVE_PART) != expected:
+            os.remove(self.ARCHIVE_PART)
+            raise Exception("Downloaded FFmpeg archive failed checksum verification.")
+
+    def _remote_sha256(self):
+        """Published SHA-256 of the archive, or None if it can't be fetched."""
+        try:
+            res = http_client.get(FFMPEG_SHA256_URL)
+            res.raise_for_status()
+            return res.text.split()[0].lower()
+        except Exception as e:
+            log.warning(f"Could not fetch FFmpeg checksum, relying on the zip's CRC-32s: {e}")
+            return None
+
+    def _extract_archive(self):
+        log.info("Download complete. Extracting...")
+        with zipfile.ZipFile(self.ARCHIVE_PART, 'r') as zf:
+            for suffix, target in self.TARGETS.items():
+                name = next((n for n in zf.namelist() if n.endswith(suffix)), None)
+                if not name:
+                    raise Exception("Could not find ffmpeg.exe or ffprobe.exe in the downloaded zip!")
+                with zf.open(name) as src, open(f"{target}.part", 'wb') as dst:
+                    shutil.copyfileobj(src, dst, self.CHUNK_SIZE)
+                os.replace(f"{target}.part", target)
+        os.remove(self.ARCHIVE_PART)
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
@@ -1,27 +1,114 @@
-import yt_dlp
 import os
+import time
+import subprocess
 import threading
-from src.utils.config import BIN_DIR
+from src.core import http_client
+from src.core.analysis_cache import AnalysisCache
+from src.core.bandwidth import bandwidth
+from src.core.http_client import STREAM_HEADERS
+from src.core.integrity import backoff_delay
+from src.core.media_store import MediaStore
+from src.core.ydl_pool import ydl_pool as default_ydl_pool
+from src.core.playlist import is_master_playlist, parse_master_playlist, parse_media_playlist, build_formats
+from src.utils.config import BUNDLED_FFMPEG, find_binary
 from src.utils.logger import log
+from src.utils.metrics import JobMetrics, metrics_exporter
+
+
+class DownloadCancelled(Exception):
+    """Raised out of download_stream when cancel() was requested mid-download."""
+
 
 class DownloadManager:
     """
     Wrapper around yt_dlp to handle operations programmatically.
     """
-    def __init__(self):
+
+    RETRIES = 10    # Per request / fragment, with jittered exponential backoff in between
+
+    def __init__(self, cache=None, store=None, ydl_pool=None):
+        self._cancel_requested = False
+        self._active_engine = None
+        self._throttle = None
+        self._store_keys = None     # Identity keys of the running download; None = store disabled
+        self._mirrors = None        # MirrorSet of the running download, if it has mirrors
+        self.cache = cache if cache is not None else AnalysisCache()
+        self.store = store if store is not None else MediaStore()
+        self.ydl_pool = ydl_pool if ydl_pool is not None else default_ydl_pool
+        self.last_metrics = None
+
+    def cancel(self):
+        """
+        Requests the running download_stream call to stop.
+        Safe to call from any thread; the download raises DownloadCancelled.
+        """
+        self._cancel_requested = True
+        if self._active_engine:
+            self._active_engine.cancel()
+
+    def set_rate_limit(self, limit):
+        """Changes the bandwidth cap (bytes/s, None = no own cap) of the running download."""
+        if self._throttle:
+            self._throttle.set_limit(limit)
+
+    def _raise_cancelled(self):
+        # Reset so the manager can be reused for the next download
         self._cancel_requested = False
+        log.info("Download cancelled.")
+        raise DownloadCancelled("Download cancelled.")
+
+    def _check_cancel(self, d):
+        # yt-dlp aborts the download when a progress hook raises
+        if self._cancel_requested:
+            raise DownloadCancelled("Download cancelled.")
 
     def get_ffmpeg_path(self):
-        # We assume dep_checker has run and ffmpeg is in BIN_DIR
-        return os.path.join(BIN_DIR, "ffmpeg.exe")
+        # Bundled copy from dep_checker if present, else the system ffmpeg
+        return find_binary(BUNDLED_FFMPEG, "ffmpeg")
 
-    def analyze_url(self, url):
+    def analyze_url(self, url, use_cache=True, refresh=False):
         """
         Fetches metadata for the given URL without downloading.
         Returns a dictionary or raises Exception.
+
+        Results are cached on disk (see AnalysisCache). use_cache=False bypasses
+        the cache entirely, refresh=True re-analyzes and overwrites the entry.
+        """
+        metrics = JobMetrics('analyze', url)
+        try:
+            if use_cache and not refresh:
+                with metrics.phase('cache_lookup'):
+                    cached = self.cache.get(url)
+                if cached is not None:
+                    metrics.incr('cache_hits')
+                    metrics.finish('done')
+                    return cached
+
+            info = self._extract_info(url, metrics)
+            if use_cache:
+                self.cache.put(url, info)
+            metrics.finish('done')
+            return info
+        except Exception:
+            metrics.finish('failed')
+            raise
+        finally:
+            self.last_metrics = metrics
+            metrics_exporter.record(metrics)
+
+    def _extract_info(self, url, metrics):
+        """
+        Runs yt-dlp, falling back to SmartScraper when yt-dlp finds nothing usable.
+        Direct .m3u8 links are read natively with a single GET.
         """
         log.info(f"Analyzing URL: {url}")
-        
+        if self._is_m3u8(url):
+            try:
+                with metrics.phase('native_m3u8'):
+                    return self._analyze_m3u8(url)
+            except Exception as e:
+                log.warning(f"Native playlist analysis failed, using yt-dlp: {e}")
+
         # Options for extraction
         ydl_opts = {
             'quiet': True,
@@ -31,7 +118,7 @@ class DownloadManager:
         }
 
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with metrics.phase('ytdlp_extract'), self.ydl_pool.borrow(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
                 
                 
@@ -55,60 +142,225 @@ class DownloadManager:
             
             # Fallback: Try to find the m3u8 link directly
             from src.core.scraper import SmartScraper
-            scraper = SmartScraper()
-            scan_result = scraper.deep_scan(url)
+            scraper = SmartScraper(metrics=metrics)
+            with metrics.phase('scraper'):
+                scan_result = scraper.deep_scan(url)
             
             if scan_result['video_url']:
                 log.info(f"Found direct stream link: {scan_result['video_url']}")
-                # Recursive call with the found m3u8
-                # We merge found subs into the result if possible, 
-                # but yt-dlp might not see them if we just give it the m3u8. 
-                # We'll need to handle subs separately or inject them?
-                # For now, let's just analyze the m3u8.
-                # Need headers for the m3u8 request usually (Referer/User-Agent)
-                # We can inject them into yt-dlp options
-                m3u8_headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Referer': 'https://vidrame.pro/', # Best guess for m3u8 protection
-                    'Origin': 'https://vidrame.pro'
-                }
-                
-                # Create a new options dict with headers
-                fallback_opts = ydl_opts.copy()
-                fallback_opts['http_headers'] = m3u8_headers
-                
-                with yt_dlp.YoutubeDL(fallback_opts) as ydl:
-                    info = ydl.extract_info(scan_result['video_url'], download=False)
-                    # Hack: set the title to the original page title if possible? 
-                    # info['title'] usually comes generic from m3u8.
-                    
-                    # Store found external subs in a custom field to return to UI
-                    info['_external_subs'] = scan_result['subs']
-                    return info
+                info = None
+                if self._is_m3u8(scan_result['video_url']):
+                    # The variant list is a small text file; no need for a second yt-dlp run
+                    try:
+                        with metrics.phase('native_m3u8'):
+                            info = self._analyze_m3u8(scan_result['video_url'])
+                    except Exception as native_error:
+                        log.warning(f"Native playlist analysis failed, using yt-dlp: {native_error}")
+
+                if info is None:
+                    # Need headers for the m3u8 request usually (Referer/User-Agent)
+                    fallback_opts = ydl_opts.copy()
+                    fallback_opts['http_headers'] = dict(STREAM_HEADERS)
+                    with metrics.phase('fallback_extract'), self.ydl_pool.borrow(fallback_opts) as ydl:
+                        info = ydl.extract_info(scan_result['video_url'], download=False)
+
+                # Store found external subs in a custom field to return to UI
+                info['_external_subs'] = scan_result['subs']
+                info['_mirrors'] = scan_result['mirrors']
+                return info
             else:
                 log.error("Smart Scraper could not find media links.")
                 raise e
 
-    def download_stream(self, url, format_id, output_path, progress_hook=None):
+    def download_stream(self, url, format_id, output_path, progress_hook=None,
+                        engine='ffmpeg', concurrency=8, max_height=None, subtitles=None, rate_limit=None,
+                        stream_remux=False, reuse=True, target_time=None, mirrors=None, hash_segments=False,
+                        live_duration=None, rollover_time=None, rollover_size=None, live_from_start=False,
+                        is_live=None):
         """
         Downloads the specified format. 
         Runs blocking (should be called in a thread).
         
         Args:
             url (str): The video URL
-            format_id (str): The specific format string (e.g. "137+140")
+            format_id (str): The specific format string (e.g. "137+140"), or 'auto'
+                             to pick the highest quality the measured throughput
+                             allows (see quality.QualitySelector).
             output_path (str): Full path for the output file (without extension if using merge)
                              OR with extension. yt-dlp handles templates.
             progress_hook (func): Callback for progress dict.
+            engine (str): 'ffmpeg' (default, via yt-dlp) or 'native' for the parallel
+                          segment downloader. 'native' applies to m3u8 URLs and
+                          direct media files (multi-connection range download).
+            concurrency (int): Parallel segment fetches / connections for the native engine.
+            max_height (int): Variant height limit for the native engine (None = best).
+            subtitles (list): Subtitle URLs, fetched concurrently with the video and
+                              saved next to it as '<name>_sub_<idx>.<ext>'.
+            rate_limit (int): Bandwidth cap for this job in bytes/s, on top of the
+                              global limit (see bandwidth.BandwidthManager).
+            stream_remux (bool): Produce the mp4 in one pass. The native engine pipes
+                                 segments straight into ffmpeg (no .part files, so no
+                                 resume); the ffmpeg engine writes mp4 directly
+                                 instead of MPEG-TS plus a fixup remux.
+            reuse (bool): Look the media up in the MediaStore first and hardlink /
+                          copy an identical finished download instead of fetching
+                          it again; finished downloads are recorded for next time.
+            target_time (float): With format 'auto', seconds the download should
+                                 finish in; the job's bandwidth share is the budget.
+            mirrors (list): Other URLs serving the same stream (analyze_url's
+                            '_mirrors'). All are raced and the fastest is used;
+                            the native HLS engine switches mirrors mid-download
+                            when the active one fails or slows down.
+            hash_segments (bool): Native HLS: record a sha256 per segment in the
+                                  checkpoint and re-verify the part file on resume.
+            live_duration (float): Live HLS: stop recording after this many seconds
+                                   of media (None = until the stream ends or cancel()).
+            rollover_time (float): Live HLS: start a new numbered file every this
+                                   many seconds of media.
+            rollover_size (int): Live HLS: start a new numbered file once the
+                                 current one reaches this many bytes.
+            live_from_start (bool): Live HLS: also record the part of the stream the
+                                    playlist still offers (DVR window) instead of
+                                    starting at the live edge.
+            is_live (bool): The analysis result's 'is_live', if known.
+
+        A live HLS stream (no #EXT-X-ENDLIST) is recorded by the native engine
+        (see live.LiveRecorder) into '<name>.ts' or '<name>.mp4' (fMP4 streams),
+        or '<name>_001.ts', ... when rolling over; no remux is done. With the
+        ffmpeg engine that happens when is_live or a live option is given;
+        the playlist isn't fetched up front just to find out.
+
+        Returns the list of saved subtitle paths.
         """
         ffmpeg_location = self.get_ffmpeg_path()
         log.info(f"Starting download: {url} | Format: {format_id} | FFmpeg: {ffmpeg_location}")
+        if self._cancel_requested:
+            # Cancelled before it even started (e.g. from a queue)
+            self._raise_cancelled()
 
         # Ensure output directory exists
         out_dir = os.path.dirname(output_path)
         if out_dir and not os.path.exists(out_dir):
             os.makedirs(out_dir)
 
+        # Every fetcher of this job draws from the same bandwidth share
+        self._throttle = bandwidth.open(rate_limit, name=url)
+
+        # Subtitles run as their own stage alongside the video
+        sub_batch = None
+        if subtitles:
+            from src.core.subtitles import SubtitleFetcher
+            sub_batch = SubtitleFetcher(throttle=self._throttle).start(subtitles, os.path.splitext(output_path)[0])
+
+        live = {'max_duration': live_duration, 'rollover_time': rollover_time, 'rollover_size': rollover_size,
+                'from_start': live_from_start, 'is_live': is_live}
+        metrics = JobMetrics('download', url)
+        try:
+            if format_id == 'auto':
+                with metrics.phase('auto_quality'):
+                    format_id, max_height = self._auto_format(url, engine, max_height, target_time)
+            self._store_keys = [MediaStore.url_key(url, format_id, max_height)] if reuse else None
+
+            with metrics.phase('video'):
+                if not self._reuse_stored(output_path, metrics):
+                    if mirrors:
+                        with metrics.phase('mirror_race'):
+                            url = self._race_mirrors(url, mirrors)
+                    self._download_video(url, format_id, output_path, progress_hook, engine, concurrency, max_height,
+                                         metrics, stream_remux, hash_segments, live)
+            self._record_stored(output_path)
+            metrics.finish('done')
+        except DownloadCancelled:
+            metrics.finish('cancelled')
+            raise
+        except Exception:
+            metrics.finish('failed')
+            raise
+        finally:
+            with metrics.phase('subtitles_wait'):
+                saved_subs = sub_batch.wait() if sub_batch else []
+            self._throttle.close()
+            self._throttle = None
+            self._store_keys = None
+            self._mirrors = None
+            self.last_metrics = metrics
+            metrics_exporter.record(metrics)
+        return saved_subs
+
+    def _auto_format(self, url, engine, max_height, target_time):
+        """Resolves format 'auto' to (format string, max_height) by probing the stream host."""
+        from src.core.quality import QualitySelector
+        info = self.analyze_url(url)
+        budget = self._throttle.bucket.rate if self._throttle else None
+        chosen, _ = QualitySelector(headers=info.get('http_headers') or STREAM_HEADERS).select(info, target_time, budget)
+        if not chosen:
+            return "bestvideo+bestaudio/best", max_height
+        if engine == 'native' and chosen.get('height'):
+            max_height = chosen['height']
+        if chosen.get('acodec') == 'none':
+            return f"{chosen['format_id']}+bestaudio/best", max_height
+        return f"{chosen['format_id']}/best", max_height
+
+    def _race_mirrors(self, url, mirrors):
+        """Ranks url and its mirrors by a probe race. Returns the winner; the ranking goes to self._mirrors."""
+        from src.core.mirrors import MirrorRace, MirrorSet
+        ranked = MirrorRace(headers=STREAM_HEADERS).rank([url] + list(mirrors))
+        self._mirrors = MirrorSet(ranked) if len(ranked) > 1 else None
+        if ranked[0][0] != url:
+            log.info(f"Fastest mirror: {ranked[0][0]}")
+        return ranked[0][0]
+
+    def _reuse_stored(self, output_path, metrics, keys=None):
+        """Materializes a finished download matching keys (default: the job's keys). True on a hit."""
+        keys = keys or self._store_keys
+        if not keys:
+            return False
+        entry = self.store.lookup(keys)
+        if not entry:
+            return False
+        metrics.incr(f"store_{self.store.materialize(entry, output_path)}")
+        return True
+
+    def _record_stored(self, output_path):
+        # yt-dlp output templates only resolve to a file name inside yt-dlp, skip those
+        if self._store_keys and os.path.isfile(output_path):
+            try:
+                self.store.record(self._store_keys, output_path)
+            except OSError as e:
+                log.warning(f"Could not record download in the media store: {e}")
+
+    def _download_video(self, url, format_id, output_path, progress_hook, engine, concurrency, max_height, metrics,
+                        stream_remux=False, hash_segments=False, live=None):
+        """Picks the engine for url and runs it. See download_stream."""
+        ffmpeg_location = self.get_ffmpeg_path()
+
+        if engine == 'native' and self._is_direct_media(url):
+            try:
+                self._download_direct(url, output_path, progress_hook, concurrency, metrics)
+                log.info("Download finished successfully.")
+                return
+            except Exception:
+                if self._cancel_requested:
+                    self._raise_cancelled()
+                raise
+
+        # Known live streams (or live options) go to the native recorder with either engine:
+        # ffmpeg can't poll incrementally, split the recording or stop after a duration
+        if '.m3u8' in url and (engine == 'native' or any((live or {}).values())):
+            try:
+                self._download_native_hls(url, output_path, progress_hook, concurrency, max_height, metrics, stream_remux,
+                                          hash_segments, live)
+                log.info("Download finished successfully.")
+                return
+            except Exception as e:
+                if self._cancel_requested:
+                    self._raise_cancelled()
+                if not isinstance(e, ValueError):
+                    raise
+
+                # Playlist features the native engine doesn't handle (e.g. encryption)
+                log.warning(f"Native HLS unavailable ({e}). Falling back to ffmpeg.")
+
         ydl_opts = {
             'format': format_id,
             'outtmpl': output_path,  # Output template
@@ -116,9 +368,13 @@ class DownloadManager:
             'noplaylist': True,
             'merge_output_format': 'mp4', # Force merge to mp4 if video+audio
             'quiet': True,
-            # Network Robustness
-            'retries': float('inf'),
-            'fragment_retries': float('inf'),
+            # Network Robustness: bounded, backed-off retries so a broken source fails with an error
+            # instead of looping forever, and a fragment that never arrives fails the job rather
+            # than leaving a silent gap in the file
+            'retries': self.RETRIES,
+            'fragment_retries': self.RETRIES,
+            'skip_unavailable_fragments': False,
+            'retry_sleep_functions': {'http': backoff_delay, 'fragment': backoff_delay},
             'file_access_retries': 10,
             # HLS Optimization
             'hls_use_mpegts': True,
@@ -127,13 +383,314 @@ class DownloadManager:
                 'hls': 'ffmpeg',
             },
             # Progress hooks
-            'progress_hooks': [progress_hook] if progress_hook else [],
+            'progress_hooks': [self._check_cancel, self._metrics_progress_hook(metrics)] + ([progress_hook] if progress_hook else []),
+            'postprocessor_hooks': [self._metrics_postprocessor_hook(metrics)],
         }
 
+        if stream_remux:
+            # MPEG-TS output needs a second ffmpeg pass (FixupM3u8) to become mp4
+            ydl_opts['hls_use_mpegts'] = False
+
+        if self._throttle:
+            # Always hooked (a no-op while the job is unlimited), so a limit set mid-download still applies
+            ydl_opts['progress_hooks'].insert(1, self._throttle.progress_hook())
+            if self._throttle.limit or bandwidth.limited:
+                # ffmpeg fetches segments itself and can't be throttled, so stay on
+                # yt-dlp's own downloaders where the throttle hook sees every block
+                del ydl_opts['downloader']
+            else:
+                # Unlimited at start: keep ffmpeg's speed for HLS/DASH, which runtime limits can't reach.
+                # Plain HTTP still goes through yt-dlp; its first block marks the job shapeable again.
+                self._throttle.shapeable = False
+
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with self.ydl_pool.borrow(ydl_opts) as ydl:
                 ydl.download([url])
             log.info("Download finished successfully.")
         except Exception as e:
+            # yt-dlp wraps hook exceptions in its own DownloadError
+            if self._cancel_requested:
+                self._raise_cancelled()
             log.error(f"Download failed: {e}")
             raise e
+
+    @staticmethod
+    def _metrics_progress_hook(metrics):
+        """Counts bytes of every finished file yt-dlp downloads (video + audio)."""
+        def hook(d):
+            if d['status'] == 'finished':
+                metrics.incr('bytes', d.get('total_bytes') or d.get('downloaded_bytes') or 0)
+        return hook
+
+    @staticmethod
+    def _metrics_postprocessor_hook(metrics):
+        """Times yt-dlp post-processing (the ffmpeg merge) per postprocessor."""
+        started = {}
+
+        def hook(d):
+            name = d.get('postprocessor', 'postprocess')
+            if d['status'] == 'started':
+                started[name] = time.perf_counter()
+            elif d['status'] == 'finished' and name in started:
+                metrics.add_phase(f"merge_{name}", time.perf_counter() - started.pop(name))
+        return hook
+
+    def _analyze_m3u8(self, m3u8_url):
+        """
+        Builds the info dict for an HLS playlist from one GET, without yt-dlp.
+        A master playlist yields one format per variant and audio rendition plus
+        its subtitle renditions; a media playlist yields a single format.
+        """
+        res = http_client.get(m3u8_url, headers=STREAM_HEADERS)
+        res.raise_for_status()
+        text = res.text
+        if not text.lstrip('\ufeff').startswith('#EXTM3U'):
+            raise ValueError("Response is not an HLS playlist.")
+
+        name = os.path.splitext(os.path.basename(m3u8_url.split('?', 1)[0]))[0] or 'video'
+        info = {
+            'id': name,
+            'title': name,
+            'url': m3u8_url,
+            'webpage_url': m3u8_url,
+            'original_url': m3u8_url,
+            'extractor': 'native_hls',
+            'protocol': 'm3u8_native',
+            'ext': 'mp4',
+            'http_headers': dict(STREAM_HEADERS),
+        }
+
+        if is_master_playlist(text):
+            master = parse_master_playlist(text, res.url)
+            info['formats'], info['subtitles'] = build_formats(master, m3u8_url)
+            log.info(f"Native playlist analysis: {len(master['variants'])} variants, {len(master['media'])} renditions")
+            if master['variants']:
+                # Live or not is only written in the media playlists; one variant tells for all
+                try:
+                    variant = http_client.get(master['variants'][0]['url'], headers=STREAM_HEADERS)
+                    variant.raise_for_status()
+                    media = parse_media_playlist(variant.text, variant.url)
+                    info['duration'] = sum(seg['duration'] for seg in media['segments']) or None
+                    info['is_live'] = not media['endlist']
+                except Exception as e:
+                    log.debug(f"Could not read variant playlist: {e}")
+        else:
+            media = parse_media_playlist(text, res.url)
+            info['formats'] = [{'format_id': '0', 'url': m3u8_url, 'manifest_url': m3u8_url,
+                                'ext': 'mp4', 'protocol': 'm3u8_native'}]
+            info['subtitles'] = {}
+            info['duration'] = sum(seg['duration'] for seg in media['segments']) or None
+            info['is_live'] = not media['endlist']
+        return info
+
+    @staticmethod
+    def _is_m3u8(url):
+        return url.split('?', 1)[0].lower().endswith('.m3u8')
+
+    @staticmethod
+    def _is_direct_media(url):
+        path = url.split('?', 1)[0].lower()
+        return path.endswith(('.mp4', '.mkv', '.webm', '.m4v'))
+
+    def _download_direct(self, url, output_path, progress_hook, connections, metrics):
+        """Direct media file over several byte-range connections (single stream if unsupported)."""
+        from src.core.range_dl import RangeDownloader
+        rd = RangeDownloader(connections=connections, headers=STREAM_HEADERS, progress_hook=progress_hook, metrics=metrics,
+                             throttle=self._throttle)
+        self._active_engine = rd
+        if self._cancel_requested:
+            # Cancelled while probing, racing mirrors, etc., before there was an engine to stop
+            self._active_engine = None
+            self._raise_cancelled()
+        try:
+            rd.download(url, output_path)
+        finally:
+            self._active_engine = None
+
+    def _download_native_hls(self, url, output_path, progress_hook, concurrency, max_height, metrics, stream_remux=False,
+                             hash_segments=False, live=None):
+        """
+        Fetches the playlist with HlsDownloader, then remuxes the raw segments
+        into output_path with ffmpeg (stream copy, no re-encode).
+        Progress is checkpointed next to the output, so a crashed or cancelled
+        job picks up at the first missing segment when started again.
+        With stream_remux the segments are piped into ffmpeg instead (see _stream_remux).
+        A live playlist is handed to _record_live instead.
+        """
+        from src.core.hls import HlsDownloader
+        from src.core.checkpoint import HlsCheckpoint
+        hls = HlsDownloader(concurrency=concurrency, headers=STREAM_HEADERS, progress_hook=progress_hook, metrics=metrics,
+                            throttle=self._throttle, mirrors=self._mirrors)
+        self._active_engine = hls
+        if self._cancel_requested:
+            self._active_engine = None
+            self._raise_cancelled()
+
+        checkpoint = HlsCheckpoint(output_path, hashing=hash_segments)
+        resumed = checkpoint.load(url)
+
+        media_url, playlist, audio_url, variant = hls.resolve(url, max_height, prefer=checkpoint.variant)
+
+        if not playlist['endlist']:
+            # Nothing to resume or deduplicate in a stream that is still being produced
+            self._store_keys = None
+            checkpoint.remove()
+            try:
+                self._record_live(hls, media_url, playlist, audio_url, output_path, metrics, live or {})
+            finally:
+                self._active_engine = None
+            return
+
+        if self._store_keys is not None and not playlist['key']:
+            # Same episode via another page or mirror: identical first segments.
+            # A resume already has the key; fetching those segments again would be wasted.
+            content_key = checkpoint.content_key(media_url) if resumed else None
+            if not content_key:
+                content_key = MediaStore.content_key(playlist, hls.prefetch(playlist, MediaStore.FINGERPRINT_SEGMENTS))
+            if self._reuse_stored(output_path, metrics, [content_key]):
+                self._active_engine = None
+                checkpoint.remove()
+                return
+            self._store_keys.append(content_key)
+            if not stream_remux:
+                if not resumed and self.store.adopt_partial(content_key, output_path, url):
+                    checkpoint.load(url)
+                self.store.record_partial(content_key, output_path)
+            checkpoint.set_content_key(media_url, content_key)
+
+        if variant:
+            checkpoint.set_variant({'height': variant['height'], 'bandwidth': variant['bandwidth'], 'url': media_url})
+
+        base = os.path.splitext(output_path)[0]
+        video_part = f"{base}.video.part"
+        audio_part = f"{base}.audio.part"
+        parts = [video_part]
+
+        if stream_remux and self._can_stream_remux(audio_url):
+            try:
+                audio_playlist = hls.load_media_playlist(audio_url) if audio_url else None
+                with metrics.phase('stream_remux'):
+                    self._stream_remux(hls, playlist, audio_playlist, output_path)
+            finally:
+                self._active_engine = None
+            checkpoint.remove()
+            return
+
+        try:
+            hls.download_playlist(playlist, video_part, checkpoint, 'video')
+            if audio_url:
+                log.info(f"Fetching separate audio rendition: {audio_url}")
+                hls.download_playlist(hls.load_media_playlist(audio_url), audio_part, checkpoint, 'audio')
+                parts.append(audio_part)
+            with metrics.phase('merge'):
+                self._remux(parts, output_path)
+        finally:
+            self._active_engine = None
+
+        # Only a finished file invalidates the resume data
+        checkpoint.remove()
+        for p in (video_part, audio_part):
+            if os.path.exists(p):
+                os.remove(p)
+
+    def _record_live(self, hls, media_url, playlist, audio_url, output_path, metrics, live):
+        """Records a live media playlist with LiveRecorder (see download_stream for the options)."""
+        from src.core.live import LiveRecorder
+        if audio_url:
+            log.warning("Live stream keeps its audio in a separate rendition; recording the video track only.")
+        if '%(' in output_path:
+            # yt-dlp output template (ffmpeg engine default); the recorder needs a real name
+            output_path = os.path.join(os.path.dirname(output_path), f"live_{time.strftime('%Y%m%d_%H%M%S')}")
+        recorder = LiveRecorder(hls, output_path, max_duration=live.get('max_duration'),
+                                rollover_time=live.get('rollover_time'), rollover_size=live.get('rollover_size'),
+                                from_start=live.get('from_start', False))
+        self._active_engine = recorder
+        with metrics.phase('live'):
+            files = recorder.record(media_url, playlist)
+        metrics.incr('live_files', len(files))
+        return files
+
+    def _can_stream_remux(self, audio_url):
+        if not os.path.exists(self.get_ffmpeg_path()):
+            log.warning("FFmpeg missing, streaming remux unavailable; using segment files.")
+            return False
+        if audio_url and os.name == 'nt':
+            # A second input pipe needs an inheritable fd (pass_fds), which Windows lacks
+            log.info("Separate audio track on Windows, using segment files for the remux.")
+            return False
+        return True
+
+    def _stream_remux(self, hls, playlist, audio_playlist, output_path):
+        """
+        Feeds segments into ffmpeg as they arrive: video on stdin, a separate
+        audio rendition on a second pipe. The mp4 is written in one pass, so no
+        intermediate files exist and peak disk usage is the output size.
+        """
+        cmd = [self.get_ffmpeg_path(), '-y', '-loglevel', 'error', '-i', 'pipe:0']
+        audio_r = audio_w = None
+        if audio_playlist:
+            audio_r, audio_w = os.pipe()
+            cmd += ['-i', f'pipe:{audio_r}', '-map', '0', '-map', '1']
+        cmd += ['-c', 'copy', '-bsf:a', 'aac_adtstoasc', '-f', 'mp4', output_path]
+
+        log.info("Streaming segments into FFmpeg...")
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+                                pass_fds=(audio_r,) if audio_r is not None else ())
+        errors = []
+
+        def feed(media, sink, track):
+            try:
+                hls.download_playlist(media, output_path, track=track, sink=sink)
+            except Exception as e:
+                errors.append(e)
+                hls.cancel()  # Stop the other track too
+            finally:
+                try:
+                    sink.close()  # EOF tells ffmpeg this input is complete
+                except OSError:
+                    pass
+
+        audio_thread = None
+        if audio_playlist:
+            os.close(audio_r)  # ffmpeg holds its own copy
+            audio_thread = threading.Thread(target=feed, args=(audio_playlist, os.fdopen(audio_w, 'wb'), 'audio'), daemon=True)
+            audio_thread.start()
+        feed(playlist, proc.stdin, 'video')
+        if audio_thread:
+            audio_thread.join()
+
+        if errors and not isinstance(errors[0], BrokenPipeError):
+            proc.kill()
+            proc.wait()
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise errors[0]
+
+        stderr = proc.stderr.read().decode('utf-8', errors='replace')
+        proc.stderr.close()
+        if proc.wait() != 0:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise Exception(f"FFmpeg remux failed: {stderr.strip()[-300:]}")
+
+    def _remux(self, inputs, output_path):
+        """Stream-copies one or more raw inputs into a single mp4."""
+        ffmpeg = self.get_ffmpeg_path()
+        if not os.path.exists(ffmpeg):
+            if len(inputs) > 1:
+                raise Exception("FFmpeg is required to merge separate audio and video streams.")
+            log.warning("FFmpeg missing, keeping raw stream without remux.")
+            os.replace(inputs[0], output_path)
+            return
+
+        cmd = [ffmpeg, '-y', '-loglevel', 'error']
+        for p in inputs:
+            cmd += ['-i', p]
+        for i in range(len(inputs)):
+            cmd += ['-map', str(i)]
+        cmd += ['-c', 'copy', '-bsf:a', 'aac_adtstoasc', output_path]
+
+        log.info("Remuxing segments with FFmpeg...")
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise Exception(f"FFmpeg remux failed: {proc.stderr.strip()[-300:]}")
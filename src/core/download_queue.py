@@ -0,0 +1,260 @@
+import itertools
+import threading
+from urllib.parse import urlparse
+from src.core.down_manager import DownloadManager, DownloadCancelled
+from src.utils.logger import log
+
+
+class DownloadJob:
+    """
+    One queued (url, format, path) download and its current state.
+    Status is one of: queued, running, paused, done, failed, cancelled.
+    """
+
+    def __init__(self, job_id, url, format_id, output_path, priority=0, progress_hook=None, options=None, meta=None):
+        self.id = job_id
+        self.url = url
+        self.format_id = format_id
+        self.output_path = output_path
+        self.priority = priority
+        self.progress_hook = progress_hook
+        self.options = options or {}   # Extra kwargs for DownloadManager.download_stream
+        self.meta = meta or {}         # Free-form caller data (e.g. selected subtitles)
+        self.host = (urlparse(url).hostname or '').lower()
+        self.status = 'queued'
+        self.error = None
+
+        self._manager = None
+        self._pause_requested = False
+
+    def __repr__(self):
+        return f"<DownloadJob #{self.id} {self.status} {self.url}>"
+
+
+class DownloadQueue:
+    """
+    Runs many download jobs with a global concurrency limit plus a per-host limit,
+    so a whole season doesn't open 20 streams against the same CDN at once.
+    Higher priority jobs start first; equal priorities run in insertion order.
+    Shared by the GUI and headless entry points.
+    """
+
+    def __init__(self, max_concurrent=3, per_host_limit=2, on_update=None, manager_factory=DownloadManager,
+                 progress_bus=None):
+        self.max_concurrent = max_concurrent
+        self.per_host_limit = per_host_limit
+        self.on_update = on_update     # Callback(job) on every status change, called from worker threads
+        self.manager_factory = manager_factory
+        self.progress_bus = progress_bus  # Optional ProgressBus; jobs publish into it by id
+
+        self._jobs = {}
+        self._running_per_host = {}
+        self._active = 0
+        self._paused = False
+        self._shutdown = False
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    # --- Public API ---
+
+    def add(self, url, format_id, output_path, priority=0, progress_hook=None, meta=None, **options):
+        """Queues a download. Returns the DownloadJob."""
+        with self._cond:
+            job = DownloadJob(next(self._ids), url, format_id, output_path, priority, progress_hook, options, meta)
+            self._jobs[job.id] = job
+            self._cond.notify_all()
+        log.info(f"Queued job #{job.id} (priority {priority}): {url}")
+        self._notify(job)
+        return job
+
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs.values())
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def set_limits(self, max_concurrent=None, per_host_limit=None):
+        """Adjusts limits at runtime. Running jobs are never interrupted."""
+        with self._cond:
+            if max_concurrent is not None:
+                self.max_concurrent = max_concurrent
+            if per_host_limit is not None:
+                self.per_host_limit = per_host_limit
+            self._cond.notify_all()
+
+    def set_rate_limit(self, job_id, limit):
+        """
+        Changes one job's bandwidth cap (bytes/s, None = no own cap). Applies to
+        the running download immediately and to later restarts of the job.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            job.options['rate_limit'] = limit
+            if job.status == 'running':
+                job._manager.set_rate_limit(limit)
+
+    def pause(self):
+        """Stops starting new jobs. Running jobs continue."""
+        with self._cond:
+            self._paused = True
+        log.info("Download queue paused.")
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+        log.info("Download queue resumed.")
+
+    def pause_job(self, job_id):
+        """
+        Pauses a single job. A running job is stopped and keeps its partial
+        files so resume_job() continues where it left off.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            if job.status == 'queued':
+                job.status = 'paused'
+            elif job.status == 'running':
+                job._pause_requested = True
+                job._manager.cancel()
+                return
+            else:
+                return
+        self._notify(job)
+
+    def resume_job(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job.status != 'paused':
+                return
+            job.status = 'queued'
+            job._pause_requested = False
+            self._cond.notify_all()
+        self._notify(job)
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            if job.status in ('queued', 'paused'):
+                job.status = 'cancelled'
+            elif job.status == 'running':
+                job._pause_requested = False
+                job._manager.cancel()
+                return
+            else:
+                return
+        self._notify(job)
+
+    def kill(self, job_id):
+        """
+        Force-stops a stuck running job. With the process backend its worker is
+        terminated (partial files stay for a resume); otherwise this is cancel().
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job.status != 'running':
+                return
+            job._pause_requested = False
+            kill = getattr(job._manager, 'kill', None) or job._manager.cancel
+        kill()
+
+    def cancel_all(self):
+        for job in self.jobs():
+            self.cancel(job.id)
+
+    def wait(self, timeout=None):
+        """Blocks until nothing is queued or running (paused jobs are ignored)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._active == 0 and not self._pending(), timeout)
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            self.cancel_all()
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+
+    # --- Scheduling ---
+
+    def _pending(self):
+        return [j for j in self._jobs.values() if j.status == 'queued']
+
+    def _next_runnable(self):
+        """Highest priority queued job whose host still has a free slot."""
+        if self._paused or self._active >= self.max_concurrent:
+            return None
+        for job in sorted(self._pending(), key=lambda j: (-j.priority, j.id)):
+            if self._running_per_host.get(job.host, 0) < self.per_host_limit:
+                return job
+        return None
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while not self._shutdown:
+                job = self._next_runnable()
+                if job is None:
+                    self._cond.wait()
+                    continue
+
+                job.status = 'running'
+                job._manager = self.manager_factory()
+                self._active += 1
+                self._running_per_host[job.host] = self._running_per_host.get(job.host, 0) + 1
+                threading.Thread(target=self._run_job, args=(job,), daemon=True).start()
+
+    def _run_job(self, job):
+        self._notify(job)
+        log.info(f"Starting job #{job.id}: {job.url}")
+        try:
+            job._manager.download_stream(job.url, job.format_id, job.output_path, self._hook_for(job), **job.options)
+            status = 'done'
+        except DownloadCancelled:
+            status = 'paused' if job._pause_requested else 'cancelled'
+        except Exception as e:
+            job.error = e
+            status = 'failed'
+            log.error(f"Job #{job.id} failed: {e}")
+
+        with self._cond:
+            job.status = status
+        log.info(f"Job #{job.id} {status}.")
+        # Callback first: wait() must not return before the last job's update has been delivered
+        self._notify(job)
+        with self._cond:
+            self._active -= 1
+            self._running_per_host[job.host] -= 1
+            self._cond.notify_all()
+
+    def _hook_for(self, job):
+        hooks = []
+        if self.progress_bus:
+            hooks.append(self.progress_bus.hook_for(job.id))
+        if job.progress_hook:
+            hooks.append(job.progress_hook)
+        if len(hooks) < 2:
+            return hooks[0] if hooks else None
+
+        def hook(d):
+            for h in hooks:
+                h(d)
+        return hook
+
+    def _notify(self, job):
+        if self.progress_bus:
+            self.progress_bus.publish(job.id, status=job.status)
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                log.error(f"Queue update callback failed: {e}")
@@ -0,0 +1,51 @@
+from urllib.parse import urljoin
+
+
+class Extractor:
+    """
+    Site rules for SmartScraper.
+
+    HOSTS are the domains the extractor is indexed under ('example.com' also
+    matches subdomains, 'example.*' any TLD, for sites that hop domains).
+    MARKERS are plain substrings that identify the site's player on pages
+    served from other hosts (mirrors, embeds); they are checked with `in`,
+    never with a regex, so unknown pages stay cheap.
+
+    Each step returns None / [] when the extractor has nothing to say, and
+    the scraper moves on to the next extractor in the chain.
+    """
+
+    name = 'base'
+    HOSTS = ()
+    MARKERS = ()
+
+    def find_video(self, html, page_url):
+        """Direct stream URL (.m3u8 / media file) on the page."""
+        return None
+
+    def find_subs(self, html, page_url):
+        """Subtitle URLs on the page."""
+        return []
+
+    def infer_video(self, subs):
+        """Stream URL derived from subtitle URLs when the page hides the video."""
+        return None
+
+    def find_candidates(self, html, page_url):
+        """Embedded pages (iframes, JS links) worth crawling next."""
+        return []
+
+    def mirrors(self, video_url):
+        """Other URLs serving the same stream (sibling CDN hosts), for MirrorRace."""
+        return []
+
+    def find_episodes(self, html, page_url):
+        """Episode page URLs on a series / season listing, in page order."""
+        return []
+
+
+def absolutize(url, base_url):
+    """Resolves protocol-relative / relative links and unescapes JSON slashes."""
+    if not url.startswith('http'):
+        url = urljoin(base_url, url)
+    return url.replace('\\/', '/')
@@ -0,0 +1,64 @@
+import re
+from urllib.parse import urlsplit, urldefrag
+from src.core.extractors.base import Extractor, absolutize
+
+M3U8_PATTERNS = [
+    re.compile(r'["\']((?:https?:)?(?://|\\/\\/)[^"\']+\.m3u8[^"\']*)["\']'),
+    re.compile(r'source\s*:\s*["\']((?:https?:)?(?://|\\/\\/)[^"\']+\.m3u8[^"\']*)["\']'),
+    re.compile(r'file\s*:\s*["\']((?:https?:)?(?://|\\/\\/)[^"\']+\.m3u8[^"\']*)["\']'),
+]
+
+SUB_PATTERNS = [
+    re.compile(r'["\']((?:https?:)?(?://|\\/\\/)[^"\']+\.(?:vtt|srt)[^"\']*)["\']'),
+    re.compile(r'kind\s*:\s*["\']captions["\'].*?src\s*:\s*["\']([^"\']+)["\']'),
+]
+
+IFRAME_PATTERN = re.compile(r'<iframe[^>]+(?:src|data-src)=["\']([^"\']+)["\']')
+
+# Player configs: file: "https://..." / source: "https://..."
+PLAYER_FILE_PATTERN = re.compile(r'(?:file|source)\s*:\s*["\'](https?://[^"\']+)["\']', re.IGNORECASE)
+
+LINK_PATTERN = re.compile(r'<a\s[^>]*?href=["\']([^"\']+)["\']', re.IGNORECASE)
+
+# Episode links on listings: /dizi-1-sezon-3-bolum, /show/episode-3, /s01e03, ?ep=3
+EPISODE_PATTERN = re.compile(r'\d+[-_.]?(?:bolum|episode)\b|\b(?:bolum|episode|ep)[-_=]?\d+\b|\bs\d+e\d+\b',
+                             re.IGNORECASE)
+
+
+class GenericExtractor(Extractor):
+    """Site-independent rules; always last in the chain."""
+
+    name = 'generic'
+
+    def find_video(self, html, page_url):
+        for pattern in M3U8_PATTERNS:
+            match = pattern.search(html)
+            if match:
+                return absolutize(match.group(1), page_url)
+        return None
+
+    def find_subs(self, html, page_url):
+        subs = []
+        for pattern in SUB_PATTERNS:
+            for sub in pattern.findall(html):
+                sub = absolutize(sub, page_url)
+                if sub not in subs:
+                    subs.append(sub)
+        return subs
+
+    def find_candidates(self, html, page_url):
+        return IFRAME_PATTERN.findall(html) + PLAYER_FILE_PATTERN.findall(html)
+
+    def find_episodes(self, html, page_url):
+        # Same-site links only; ads and "related series" widgets point elsewhere
+        host = urlsplit(page_url).hostname
+        page = urldefrag(page_url)[0]
+        episodes = []
+        for href in LINK_PATTERN.findall(html):
+            url = urldefrag(absolutize(href, page_url))[0]
+            parts = urlsplit(url)
+            if parts.hostname != host or url == page or url in episodes:
+                continue
+            if EPISODE_PATTERN.search(parts.path + '?' + parts.query):
+                episodes.append(url)
+        return episodes
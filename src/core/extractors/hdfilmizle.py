@@ -0,0 +1,20 @@
+import re
+from src.core.extractors.base import Extractor
+
+# let parts = [{"id":..., "data":"<iframe src=\"...\" ... >"}]
+PARTS_PATTERN = re.compile(r'let\s+parts\s*=\s*(\[\{.*?\}\]);', re.DOTALL | re.IGNORECASE)
+PART_SRC_PATTERN = re.compile(r'src=\\"(https?:[^"\\]+)\\"')
+
+
+class HdfilmizleExtractor(Extractor):
+    """hdfilmizle: player mirrors are iframes inside the JSON 'parts' variable."""
+
+    name = 'hdfilmizle'
+    HOSTS = ('hdfilmizle.*',)
+    MARKERS = ('let parts',)
+
+    def find_candidates(self, html, page_url):
+        match = PARTS_PATTERN.search(html)
+        if not match:
+            return []
+        return PART_SRC_PATTERN.findall(match.group(1))
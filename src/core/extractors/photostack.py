@@ -0,0 +1,34 @@
+import re
+from src.core.extractors.base import Extractor
+from src.utils.logger import log
+
+SUB_ID_PATTERN = re.compile(r'photostack\.net/v/([^/]+)/')
+# https://p2.photostack.net/v/<id>/master.m3u8 -> numbered sibling hosts serve the same files
+HOST_PATTERN = re.compile(r'^(https?://)p(\d+)(\.photostack\.net/.*)$')
+
+
+class PhotostackExtractor(Extractor):
+    """photostack: subtitles live next to the stream, so master.m3u8 can be inferred from them."""
+
+    name = 'photostack'
+    HOSTS = ('photostack.net',)
+    MARKERS = ('photostack.net/v/',)
+    MIRROR_HOSTS = 4        # p1 .. pN
+
+    def infer_video(self, subs):
+        for sub in subs:
+            m = SUB_ID_PATTERN.search(sub)
+            if m:
+                # Infer master.m3u8 link. Use split to get https://p2.photostack.net
+                base_host = sub.split('/v/')[0]
+                inferred = f"{base_host}/v/{m.group(1)}/master.m3u8"
+                log.info(f"Inferred video from subtitles: {inferred}")
+                return inferred
+        return None
+
+    def mirrors(self, video_url):
+        m = HOST_PATTERN.match(video_url)
+        if not m:
+            return []
+        scheme, number, rest = m.groups()
+        return [f"{scheme}p{n}{rest}" for n in range(1, self.MIRROR_HOSTS + 1) if str(n) != number]
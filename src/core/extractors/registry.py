@@ -0,0 +1,95 @@
+from urllib.parse import urlsplit
+from src.core.extractors.generic import GenericExtractor
+from src.core.extractors.hdfilmizle import HdfilmizleExtractor
+from src.core.extractors.photostack import PhotostackExtractor
+from src.core.extractors.vidrame import VidrameExtractor
+
+# Explicit list instead of module discovery so PyInstaller bundles every extractor.
+# To support a new site, add an Extractor subclass module and list it here.
+SITE_EXTRACTORS = [
+    HdfilmizleExtractor,
+    VidrameExtractor,
+    PhotostackExtractor,
+]
+
+
+class ExtractorRegistry:
+    """
+    Picks the extractors for a page.
+
+    Site extractors are indexed by host: a page only runs the rules of the
+    extractors registered for its domain (or a parent domain, or 'name.*' for
+    sites that change TLDs), so each added site costs other sites one dict
+    lookup per domain label. Pages on unknown hosts (mirrors, embeds) fall back
+    to the extractors whose MARKERS appear in the HTML. The generic rules
+    always run last.
+
+    Subtitle based inference is routed the same way, by the subtitle hosts,
+    since subtitles usually live on the stream's CDN rather than the page host.
+    """
+
+    def __init__(self, extractors=None, generic=None):
+        self._by_host = {}
+        self._by_marker = []
+        self.generic = generic or GenericExtractor()
+        for extractor in extractors or []:
+            self.register(extractor)
+
+    def register(self, extractor):
+        for host in extractor.HOSTS:
+            self._by_host.setdefault(host.lower(), []).append(extractor)
+        if extractor.MARKERS:
+            self._by_marker.append(extractor)
+
+    def chain(self, url, html):
+        """Extractors to run on `html` fetched from `url`, most specific first."""
+        matched = self._match_host(urlsplit(url).hostname or '')
+        if not matched:
+            matched = [e for e in self._by_marker if any(m in html for m in e.MARKERS)]
+        return matched + [self.generic]
+
+    def chain_for_subs(self, subs):
+        """Extractors that may infer a stream from these subtitle URLs."""
+        matched = []
+        for sub in subs:
+            for extractor in self._match_host(urlsplit(sub).hostname or ''):
+                if extractor not in matched:
+                    matched.append(extractor)
+        if not matched:
+            matched = [e for e in self._by_marker if any(m in sub for sub in subs for m in e.MARKERS)]
+        return matched
+
+    def mirrors(self, video_url):
+        """Equivalent stream URLs on other hosts, as known by the matching site extractors."""
+        extractors = self._match_host(urlsplit(video_url).hostname or '')
+        if not extractors:
+            extractors = [e for e in self._by_marker if any(m in video_url for m in e.MARKERS)]
+        urls = []
+        for extractor in extractors:
+            urls += [u for u in extractor.mirrors(video_url) if u != video_url and u not in urls]
+        return urls
+
+    def episodes(self, url, html):
+        """Episode links on a listing page, from the most specific extractor that finds any."""
+        for extractor in self.chain(url, html):
+            episodes = extractor.find_episodes(html, url)
+            if episodes:
+                return episodes
+        return []
+
+    def _match_host(self, host):
+        # 'www.hdfilmizle.to' -> keys 'www.hdfilmizle.to', 'hdfilmizle.to', 'to'
+        # plus the any-TLD keys 'www.hdfilmizle.*', 'hdfilmizle.*'
+        matched = []
+        labels = host.lower().split('.')
+        keys = ['.'.join(labels[i:]) for i in range(len(labels))]
+        if len(labels) > 1:
+            keys += ['.'.join(labels[i:-1]) + '.*' for i in range(len(labels) - 1)]
+        for key in keys:
+            for extractor in self._by_host.get(key, ()):
+                if extractor not in matched:
+                    matched.append(extractor)
+        return matched
+
+
+registry = ExtractorRegistry([cls() for cls in SITE_EXTRACTORS])
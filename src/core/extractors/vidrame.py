@@ -0,0 +1,51 @@
+import re
+import base64
+import codecs
+from src.core.extractors.base import Extractor
+from src.utils.logger import log
+
+# file: EE.dd("...")
+EE_PATTERN = re.compile(r'EE\.dd\(\s*["\']([^"\']+)["\']\s*\)')
+
+
+class VidrameExtractor(Extractor):
+    """vidrame: the stream link is obfuscated with EE.dd(...)."""
+
+    name = 'vidrame'
+    HOSTS = ('vidrame.*',)
+    MARKERS = ('EE.dd(',)
+
+    def find_candidates(self, html, page_url):
+        links = []
+        for enc_str in EE_PATTERN.findall(html):
+            try:
+                decrypted = decode(enc_str)
+                if decrypted and ('.m3u8' in decrypted or '.mp4' in decrypted):
+                    links.append(decrypted)
+            except Exception as e:
+                log.error(f"Failed to decrypt Vidrame string: {e}")
+        return links
+
+
+def decode(encoded_str):
+    """
+    Decodes the Vidrame/Player obfuscation.
+    Logic: Reverse(ROT13(Base64Decode(str.replace('d', '/'))))
+    """
+    # 1. Custom replacement
+    # The obfuscator replaced '/' with 'd' (and '+' with '-') AFTER encoding,
+    # so we reverse it here.
+    s = encoded_str.replace('-', '+').replace('d', '/')
+
+    # 2. Padding
+    padding = 4 - (len(s) % 4)
+    if padding != 4:
+        s += '=' * padding
+
+    try:
+        # 3. Base64 Decode
+        decoded_str = base64.b64decode(s).decode('latin1')
+        # 4. ROT13, 5. Reverse
+        return codecs.decode(decoded_str, 'rot_13')[::-1]
+    except Exception:
+        return None
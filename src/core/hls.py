@@ -0,0 +1,321 @@
+import time
+import hashlib
+import threading
+import contextlib
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from src.core import http_client
+from src.core.integrity import CorruptSegment, HostUnavailable, SegmentError, SegmentVerifier, backoff_delay, host_breaker
+from src.core.playlist import is_master_playlist, parse_master_playlist, parse_media_playlist
+from src.utils.logger import log
+
+
+class HlsDownloader:
+    """
+    Native HLS segment engine.
+    Parses the media playlist and fetches several segments at once from a bounded
+    worker pool, writing them to the output file strictly in playlist order.
+    Used instead of ffmpeg's 'hls' downloader, which fetches one segment at a time.
+
+    Every segment is verified before it is written (see integrity.SegmentVerifier).
+    A bad or failed segment is refetched on its own with jittered exponential
+    backoff, behind a per-host circuit breaker; once one exhausts its retries the
+    download stops and raises a SegmentError listing what could not be fetched.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, concurrency=8, headers=None, progress_hook=None, metrics=None, retries=10, timeout=http_client.DEFAULT_TIMEOUT,
+                 throttle=None, mirrors=None):
+        self.concurrency = max(1, int(concurrency))
+        self.progress_hook = progress_hook
+        self.metrics = metrics
+        self.throttle = throttle    # Optional bandwidth.JobThrottle shared by all segment workers
+        self.mirrors = mirrors      # Optional mirrors.MirrorSet; segments fail over to the next mirror
+        self.retries = retries
+        self.timeout = timeout
+        self.verifier = SegmentVerifier()
+        self._cancel = threading.Event()
+        self._halt = threading.Event()  # Set on cancel and when a segment has failed for good
+        self._prefetched = {}       # (url, byterange) -> data fetched ahead by prefetch()
+
+        # Shared keep-alive pool; our headers go on each request
+        self.session = http_client.get_session()
+        self.headers = http_client.merge_headers(http_client.DEFAULT_HEADERS, headers)
+
+    def cancel(self):
+        """Stops scheduling new segments. The running download raises once it notices."""
+        self._cancel.set()
+        self._halt.set()
+
+    def resolve(self, url, max_height=None, prefer=None):
+        """
+        Returns (media_playlist_url, parsed_media_playlist, audio_playlist_url, variant).
+        If url points to a master playlist, the highest variant not taller than
+        max_height is chosen, unless `prefer` (a previously chosen variant, e.g. from
+        a checkpoint) still exists. audio_playlist_url is set when that variant keeps
+        its audio in a separate rendition.
+        """
+        text = self._get_text(url)
+        if not is_master_playlist(text):
+            return url, parse_media_playlist(text, url), None, None
+
+        master = parse_master_playlist(text, url)
+        variant = None
+        if prefer:
+            variant = next((v for v in master['variants']
+                            if v['height'] == prefer.get('height') and v['bandwidth'] == prefer.get('bandwidth')), None)
+        variant = variant or self.pick_variant(master['variants'], max_height)
+        if not variant:
+            raise ValueError("Master playlist has no playable variants.")
+        log.info(f"Selected HLS variant: {variant.get('height')}p @ {variant['bandwidth']} bps")
+
+        audio_url = None
+        if variant.get('audio'):
+            renditions = [m for m in master['media']
+                          if m['type'] == 'AUDIO' and m['group_id'] == variant['audio'] and m['url']]
+            if renditions:
+                default = [m for m in renditions if m['default']]
+                audio_url = (default or renditions)[0]['url']
+
+        media_url = variant['url']
+        return media_url, self.load_media_playlist(media_url), audio_url, variant
+
+    def load_media_playlist(self, url):
+        """Fetches and parses a media playlist."""
+        return parse_media_playlist(self._get_text(url), url)
+
+    @staticmethod
+    def pick_variant(variants, max_height=None):
+        """Highest resolution (then bandwidth) variant that fits under max_height."""
+        candidates = variants
+        if max_height:
+            candidates = [v for v in variants if not v['height'] or v['height'] <= max_height]
+            if not candidates:
+                # Nothing small enough, fall back to the smallest one available
+                candidates = sorted(variants, key=lambda v: (v['height'] or 0, v['bandwidth']))[:1]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda v: (v['height'] or 0, v['bandwidth']))
+
+    def prefetch(self, playlist, count):
+        """
+        Fetches the first `count` segments (init section first, if any) and keeps
+        them for download_playlist, so inspecting them costs no extra traffic.
+        Returns their data in playlist order.
+        """
+        heads = ([playlist['init']] if playlist['init'] else []) + playlist['segments'][:count]
+        with ThreadPoolExecutor(max_workers=max(1, len(heads))) as pool:
+            data = list(pool.map(lambda segment: self._fetch(segment, init=segment is playlist['init']), heads))
+        for segment, chunk in zip(heads, data):
+            self._prefetched[(segment['url'], segment.get('byterange'))] = chunk
+        return data
+
+    def download_playlist(self, playlist, output_path, checkpoint=None, track='video', sink=None):
+        """
+        Downloads every segment of a parsed media playlist into output_path.
+        Blocking (should be called in a thread).
+
+        With an HlsCheckpoint, already verified segments in output_path are kept
+        and only the missing ones are fetched; progress is recorded as we go.
+        With a sink (a writable binary stream such as ffmpeg's stdin) segments
+        are written there in order instead; output_path only labels progress.
+        """
+        if playlist['key']:
+            # Decryption is left to ffmpeg; the caller falls back to it.
+            raise ValueError(f"Encrypted HLS ({playlist['key'].get('METHOD')}) is not supported by the native downloader.")
+
+        segments = playlist['segments']
+        if not segments:
+            raise ValueError("Media playlist contains no segments.")
+
+        total = len(segments)
+        # Keep a bounded window in flight so a slow head segment can't pile up the whole file in memory
+        window = self.concurrency * 2
+        start = time.time()
+
+        first, offset = 0, 0
+        if checkpoint:
+            first, offset = checkpoint.begin_track(track, playlist.get('url'), output_path, total)
+        downloaded = offset
+        # Prefetched segments the checkpoint already has would otherwise sit in memory for good
+        for segment in segments[:first] + ([playlist['init']] if playlist['init'] and offset else []):
+            self._prefetched.pop((segment['url'], segment.get('byterange')), None)
+
+        log.info(f"Native HLS: {total} segments ({first} already done), {self.concurrency} connections -> {output_path}")
+
+        target = contextlib.nullcontext(sink) if sink is not None else open(output_path, 'r+b' if offset else 'wb')
+        with target as f, ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            if sink is None:
+                f.seek(offset)
+                f.truncate()
+
+            if playlist['init'] and not offset:
+                try:
+                    data = self._fetch(playlist['init'], init=True)
+                except SegmentError as e:
+                    self._halt.set()
+                    raise SegmentError(track, [dict(e.failures[0], index='init')]) from None
+                f.write(data)
+                offset += len(data)
+                downloaded += len(data)
+                if checkpoint:
+                    checkpoint.mark_init(track, len(data))
+
+            futures = {}
+            next_submit = first
+            try:
+                for idx in range(first, total):
+                    while next_submit < total and next_submit < idx + window:
+                        futures[next_submit] = pool.submit(self._fetch, segments[next_submit])
+                        next_submit += 1
+
+                    try:
+                        data = futures.pop(idx).result()
+                    except SegmentError as e:
+                        raise self._segment_report(track, idx, e, futures) from None
+                    if self._cancel.is_set():
+                        raise Exception("Download cancelled.")
+                    f.write(data)
+                    if checkpoint:
+                        f.flush()
+                        checkpoint.mark_segment(track, idx, offset, len(data),
+                                                hashlib.sha256(data).hexdigest() if checkpoint.hashing else None)
+                    offset += len(data)
+                    downloaded += len(data)
+
+                    self._report(idx + 1, total, downloaded, start, output_path)
+            finally:
+                for fut in futures.values():
+                    fut.cancel()
+                if checkpoint:
+                    f.flush()
+                    checkpoint.save(force=True)
+
+        if checkpoint:
+            checkpoint.mark_complete(track)
+
+        self._emit({
+            'status': 'finished',
+            'downloaded_bytes': downloaded,
+            'total_bytes': downloaded,
+            'filename': output_path,
+            'elapsed': time.time() - start,
+        })
+        return downloaded
+
+    def fetch(self, segment, init=False):
+        """Fetches one verified segment with this engine's retries, mirrors and throttle."""
+        return self._fetch(segment, init)
+
+    def _fetch(self, segment, init=False):
+        """
+        Fetches and verifies a single segment. Network errors and corrupt payloads
+        are retried up to self.retries times, then a SegmentError is raised.
+        """
+        headers = self.headers
+        if segment.get('byterange'):
+            length, offset = segment['byterange']
+            headers = http_client.merge_headers(headers, {'Range': f"bytes={offset}-{offset + length - 1}"})
+
+        data = self._prefetched.pop((segment['url'], segment.get('byterange')), None)
+        if data is not None:
+            return data
+
+        last_error = None
+        tries = 0
+        for attempt in range(self.retries + 1):
+            url, mirror = self.mirrors.url_for(segment['url']) if self.mirrors else (segment['url'], None)
+            host = urlsplit(url).hostname
+            try:
+                if not host_breaker.wait(host, self._halt) or self._halt.is_set():
+                    raise Exception("Download cancelled." if self._cancel.is_set() else "Download stopped.")
+            except HostUnavailable as e:
+                last_error = e
+                break
+            tries += 1
+            try:
+                started = time.perf_counter()
+                data, content_length = self._read(url, headers)
+                self.verifier.check(data, segment, content_length, init)
+                host_breaker.success(host)
+                if self.mirrors:
+                    self.mirrors.report_success(mirror, len(data), time.perf_counter() - started)
+                if self.metrics:
+                    self.metrics.observe('segment_latency', time.perf_counter() - started)
+                    self.metrics.incr('bytes', len(data))
+                    self.metrics.incr('segments')
+                return data
+            except (requests.RequestException, CorruptSegment) as e:
+                last_error = e
+                host_breaker.failure(host)
+                if self.metrics:
+                    self.metrics.incr('corrupt_segments' if isinstance(e, CorruptSegment) else 'retries')
+                log.warning(f"Segment fetch failed ({attempt + 1}/{self.retries + 1}): {url} - {e}")
+                if self.mirrors:
+                    self.mirrors.report_failure(mirror)
+                    if self.mirrors.active != mirror:
+                        continue  # Retry right away on the next mirror
+                if attempt < self.retries:
+                    self._halt.wait(backoff_delay(attempt))
+        raise SegmentError('video', [{'index': segment.get('index'), 'url': segment['url'],
+                                      'attempts': tries, 'error': last_error}])
+
+    def _segment_report(self, track, index, error, futures):
+        """
+        Stops the other workers and builds one SegmentError with every segment
+        that failed for good so far (the one at `index` plus finished ones in the window).
+        """
+        self._halt.set()
+        failures = [dict(error.failures[0], index=index)]
+        for idx, fut in sorted(futures.items()):
+            if fut.done() and not fut.cancelled() and isinstance(fut.exception(), SegmentError):
+                failures.append(dict(fut.exception().failures[0], index=idx))
+        log.error(f"Giving up on {len(failures)} {track} segment(s) after {self.retries + 1} attempts each.")
+        return SegmentError(track, failures)
+
+    def _read(self, url, headers):
+        """Returns (body, Content-Length or None)."""
+        # Streamed in small reads so a bandwidth limit throttles the socket, not just the bookkeeping
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as res:
+            res.raise_for_status()
+            chunks = []
+            for chunk in res.iter_content(chunk_size=self.READ_SIZE):
+                if self.throttle:
+                    self.throttle.consume(len(chunk), self._cancel)
+                chunks.append(chunk)
+            # Compressed bodies are decoded by iter_content, so their header length doesn't apply
+            length = res.headers.get('Content-Length')
+            encoded = res.headers.get('Content-Encoding', 'identity') != 'identity'
+            return b''.join(chunks), int(length) if length and length.isdigit() and not encoded else None
+
+    def _get_text(self, url):
+        res = self.session.get(url, headers=self.headers, timeout=self.timeout)
+        res.raise_for_status()
+        return res.text
+
+    def _report(self, done, total, downloaded, start, output_path):
+        elapsed = max(time.time() - start, 1e-6)
+        speed = downloaded / elapsed
+        estimate = int(downloaded / done * total)
+        eta = int((estimate - downloaded) / speed) if speed else None
+        percent = done / total * 100
+
+        self._emit({
+            'status': 'downloading',
+            'downloaded_bytes': downloaded,
+            'total_bytes_estimate': estimate,
+            'fragment_index': done,
+            'fragment_count': total,
+            'elapsed': elapsed,
+            'speed': speed,
+            'eta': eta,
+            'filename': output_path,
+            '_percent_str': f"{percent:.1f}%",
+            '_eta_str': time.strftime('%H:%M:%S', time.gmtime(eta)) if eta is not None else 'Unknown',
+        })
+
+    def _emit(self, d):
+        if self.progress_hook:
+            self.progress_hook(d)
@@ -0,0 +1,71 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared HTTP layer for the scraper, segment/range downloaders, subtitle fetches
+# and dependency setup. One keep-alive pool per host means TLS handshakes are
+# paid once per host instead of once per request.
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+}
+
+# Headers the scraped CDN streams expect (Referer/Origin protection)
+STREAM_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Referer': 'https://vidrame.pro/', # Best guess for m3u8 protection
+    'Origin': 'https://vidrame.pro'
+}
+
+# Referer used for top-level page fetches (looks like a search click-through)
+PAGE_REFERER = 'https://google.com/'
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 20)
+
+POOL_HOSTS = 16        # Distinct hosts kept alive at once
+POOL_PER_HOST = 32     # Connections kept alive per host (segment workers across jobs)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the process-wide pooled session.
+    Do not mutate its headers; pass per-request headers instead.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _build_session():
+    session = requests.Session()
+    # Only retry connection setup here; read/status retries belong to the callers
+    retry = Retry(total=None, connect=3, read=0, status=0, backoff_factor=0.5)
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def merge_headers(*dicts):
+    """Combines header dicts left to right, skipping None."""
+    merged = {}
+    for d in dicts:
+        if d:
+            merged.update(d)
+    return merged
+
+
+def get(url, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """GET through the shared pool with the default timeout."""
+    return get_session().get(url, headers=headers, timeout=timeout, **kwargs)
@@ -0,0 +1,184 @@
+import time
+import random
+import threading
+from src.utils.logger import log
+
+TS_PACKET = 188
+TS_SYNC = 0x47
+
+# Boxes a media segment / init section may start with (ISO BMFF, CMAF)
+MP4_BOXES = {b'ftyp', b'styp', b'sidx', b'moof', b'mdat', b'moov', b'prft', b'emsg', b'free', b'skip', b'uuid'}
+
+
+class CorruptSegment(Exception):
+    """A segment arrived complete as far as HTTP is concerned, but its payload is not media."""
+
+
+class HostUnavailable(Exception):
+    """The host's circuit breaker has tripped too often; callers should give up instead of waiting."""
+
+
+class SegmentError(Exception):
+    """
+    Segments that could not be fetched intact within their retry budget.
+    `failures` is a list of {'index', 'url', 'attempts', 'error'}.
+    """
+
+    def __init__(self, track, failures):
+        self.track = track
+        self.failures = failures
+        lines = [f"  #{f['index']} {f['url']} ({f['attempts'] or 'no'} attempts): {f['error']}" for f in failures[:10]]
+        if len(failures) > 10:
+            lines.append(f"  ... and {len(failures) - 10} more")
+        super().__init__(f"{len(failures)} segment(s) of the {track} track could not be fetched intact:\n"
+                         + "\n".join(lines)
+                         + "\nFinished segments are kept; starting the download again resumes from there.")
+
+
+class SegmentVerifier:
+    """
+    Cheap sanity checks on a fetched HLS segment, run before it is written:
+
+    - length: a byte-range segment must be exactly its range, and any response
+      must match its Content-Length (truncated bodies)
+    - error pages: HTML / JSON served with a 200 instead of media
+    - MPEG-TS: every whole 188-byte packet starts with the 0x47 sync byte
+    - fMP4: the top-level boxes tile the payload exactly and a media segment
+      carries an 'mdat'
+
+    Payloads that are neither TS nor fMP4 (ADTS audio, WebVTT, ...) only get the
+    length and error page checks, so unusual but valid streams still download.
+    """
+
+    def check(self, data, segment, content_length=None, init=False):
+        """Raises CorruptSegment if data can't be the segment."""
+        if not data:
+            raise CorruptSegment("empty response")
+        if content_length is not None and len(data) != content_length:
+            raise CorruptSegment(f"truncated: {len(data)} of {content_length} bytes")
+        if segment.get('byterange') and len(data) != segment['byterange'][0]:
+            raise CorruptSegment(f"got {len(data)} bytes for a {segment['byterange'][0]} byte range")
+
+        head = data[:64].lstrip().lower()
+        if head.startswith((b'<!doctype', b'<html', b'<?xml', b'<head', b'<body', b'{')):
+            raise CorruptSegment("server returned an HTML/JSON page instead of media")
+
+        if data[0] == TS_SYNC:
+            self._check_ts(data)
+        elif data[4:8] in MP4_BOXES:
+            self._check_mp4(data, init)
+
+    @staticmethod
+    def _check_ts(data):
+        # Every 188th byte is a sync byte; bytes.strip runs this in C. A trailing
+        # partial packet is tolerated (players drop it), truncation is caught by length.
+        syncs = data[:len(data) - len(data) % TS_PACKET:TS_PACKET]
+        if syncs.strip(bytes([TS_SYNC])):
+            bad = next(i for i, b in enumerate(syncs) if b != TS_SYNC)
+            raise CorruptSegment(f"MPEG-TS sync byte missing at packet {bad}")
+
+    @staticmethod
+    def _check_mp4(data, init):
+        pos, boxes = 0, set()
+        while pos < len(data):
+            if len(data) - pos < 8:
+                raise CorruptSegment(f"fMP4 box header cut off at byte {pos}")
+            size = int.from_bytes(data[pos:pos + 4], 'big')
+            kind = data[pos + 4:pos + 8]
+            if size == 1 and len(data) - pos >= 16:
+                size = int.from_bytes(data[pos + 8:pos + 16], 'big')
+            elif size == 0:
+                size = len(data) - pos  # Box runs to the end
+            if size < 8 or not kind.isalnum() and kind not in MP4_BOXES:
+                raise CorruptSegment(f"invalid fMP4 box {kind!r} at byte {pos}")
+            if pos + size > len(data):
+                raise CorruptSegment(f"fMP4 box {kind.decode('latin1')} truncated ({len(data) - pos} of {size} bytes)")
+            boxes.add(kind)
+            pos += size
+        if not init and b'mdat' not in boxes and b'moov' not in boxes:
+            raise CorruptSegment("fMP4 segment has no 'mdat' box")
+
+
+class HostBreaker:
+    """
+    Per-host circuit breaker shared by every download.
+
+    After THRESHOLD consecutive failures against a host, requests to it are
+    held back for a cooldown (doubling on every further trip, up to
+    MAX_COOLDOWN). When the cooldown ends a single trial request goes through;
+    a success closes the breaker, a failure opens it again. This keeps dozens
+    of segment workers from hammering a CDN node that is down.
+
+    After MAX_TRIPS trips in a row, callers waiting on the open breaker get
+    HostUnavailable instead of waiting for the next trial, so a dead host ends
+    the download in about half a minute rather than never.
+    """
+
+    THRESHOLD = 5
+    COOLDOWN = 2.0
+    MAX_COOLDOWN = 60.0
+    MAX_TRIPS = 4
+    TRIAL_TIMEOUT = 30.0    # A trial that never reports back (cancelled job) frees the slot after this
+
+    def __init__(self):
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host, stop=None):
+        """
+        Blocks while the host's breaker is open. Returns False if stop was set.
+        Only one caller gets through per cooldown (the trial request). Raises
+        HostUnavailable once the breaker has tripped MAX_TRIPS times in a row.
+        """
+        while True:
+            with self._lock:
+                state = self._hosts.get(host)
+                if not state or state['open_until'] is None:
+                    return True
+                now = time.monotonic()
+                delay = state['open_until'] - now
+                trial = state['trial']
+                if delay <= 0 and (trial is None or now - trial > self.TRIAL_TIMEOUT):
+                    state['trial'] = now
+                    return True
+                if state['trips'] >= self.MAX_TRIPS:
+                    raise HostUnavailable(f"host {host} keeps failing ({state['failures']} failures in a row), "
+                                          f"gave up after {state['trips']} cooldowns")
+            if stop and stop.wait(min(max(delay, 0.05), 0.5)):
+                return False
+            if not stop:
+                time.sleep(min(max(delay, 0.05), 0.5))
+
+    def success(self, host):
+        with self._lock:
+            state = self._hosts.pop(host, None)
+        if state and state['open_until'] is not None:
+            log.info(f"Host {host} recovered, resuming requests.")
+
+    def failure(self, host):
+        with self._lock:
+            state = self._hosts.setdefault(host, {'failures': 0, 'trips': 0, 'open_until': None, 'trial': None})
+            state['failures'] += 1
+            if state['trial'] is not None or (state['open_until'] is None and state['failures'] >= self.THRESHOLD):
+                cooldown = min(self.COOLDOWN * 2 ** state['trips'], self.MAX_COOLDOWN)
+                state['trips'] += 1
+                state['trial'] = None
+                state['open_until'] = time.monotonic() + cooldown
+                log.warning(f"Host {host} failed {state['failures']} times in a row, pausing requests for {cooldown:.0f}s.")
+
+    def is_open(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            return bool(state and state['open_until'] is not None)
+
+
+def backoff_delay(n, base=0.5, cap=10.0):
+    """
+    Exponential backoff with jitter: 0.5-1x of base * 2^n, capped, for the n-th
+    retry (0-based). Also used as a yt-dlp retry_sleep_function, which is
+    called as func(n=...), so the parameter name is part of the interface.
+    """
+    return min(base * 2 ** n, cap) * random.uniform(0.5, 1.0)
+
+
+host_breaker = HostBreaker()
@@ -0,0 +1,199 @@
+import os
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from src.core.integrity import HostUnavailable, SegmentError
+from src.utils.logger import log
+
+
+class LiveRecorder:
+    """
+    Records a live (or DVR / event) HLS media playlist.
+
+    The playlist is reloaded every target duration (half of it when nothing new
+    appeared, as RFC 8216 asks) and only segments whose media sequence is above
+    the last one written are fetched, through the HlsDownloader so they get its
+    verification, retries, mirrors and bandwidth share. Segments are appended to
+    the output as they arrive: a growing .ts for MPEG-TS streams, a fragmented
+    .mp4 (init section + fragments) for fMP4 ones. Both stay playable while the
+    recording runs.
+
+    Only the last sequence number and the open file are kept between polls, so
+    memory stays flat over a multi-hour capture. With rollover_time (seconds of
+    media) or rollover_size (bytes) the recording is split into numbered files.
+
+    The recording ends when the playlist gets #EXT-X-ENDLIST, after max_duration
+    seconds of media, or on cancel() (the files written so far are kept).
+    """
+
+    LIVE_EDGE_SEGMENTS = 3      # Start this many segments behind the live edge (RFC 8216 6.3.3)
+    MAX_MISSED = 5              # Segments in a row that may stay broken before the recording gives up
+    MAX_RELOAD_FAILURES = 10    # Playlist reloads in a row that may fail
+
+    def __init__(self, hls, output_path, max_duration=None, rollover_time=None, rollover_size=None, from_start=False):
+        self.hls = hls
+        self.output_path = output_path
+        self.max_duration = max_duration
+        self.rollover_time = rollover_time
+        self.rollover_size = rollover_size
+        self.from_start = from_start    # DVR: also record the window the playlist still offers
+        self.files = []
+        self._file = None
+        self._file_started = 0.0        # Media seconds at which the current file began
+        self._init = None
+        self._ext = '.ts'
+        self._stop = threading.Event()
+
+    def cancel(self):
+        """Stops recording after the segments in flight; the files written so far stay."""
+        self._stop.set()
+        self.hls.cancel()
+
+    def record(self, media_url, playlist=None):
+        """
+        Blocks until the recording ends (should be called in a thread).
+        Returns the list of files written.
+        """
+        playlist = playlist or self.hls.load_media_playlist(media_url)
+        if playlist['key']:
+            # Decryption is left to ffmpeg; the caller falls back to it.
+            raise ValueError(f"Encrypted HLS ({playlist['key'].get('METHOD')}) is not supported by the live recorder.")
+
+        self._ext = '.mp4' if playlist['init'] else '.ts'
+        if playlist['init']:
+            self._init = self.hls.fetch(playlist['init'], init=True)
+
+        start = time.time()
+        log.info(f"Recording live stream {media_url} -> {os.path.splitext(self.output_path)[0]}{self._ext}")
+        pool = ThreadPoolExecutor(max_workers=self.hls.concurrency)
+        try:
+            written, recorded = self._poll(media_url, playlist, pool, start)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if self._file:
+                self._file.close()
+                self._file = None
+
+        self.hls._emit({
+            'status': 'finished',
+            'downloaded_bytes': written,
+            'total_bytes': written,
+            'filename': self.files[-1] if self.files else self.output_path,
+            'elapsed': time.time() - start,
+        })
+        log.info(f"Live recording finished: {recorded:.0f}s in {len(self.files)} file(s).")
+        return self.files
+
+    def _poll(self, media_url, playlist, pool, start):
+        """The polling loop. Returns (bytes written, seconds of media recorded)."""
+        segments = playlist['segments'] if self.from_start else playlist['segments'][-self.LIVE_EDGE_SEGMENTS:]
+        last_seq = segments[0]['sequence'] - 1 if segments else playlist['media_sequence'] - 1
+        written, recorded, missed, reload_failures = 0, 0.0, 0, 0
+
+        while True:
+            # 1. Only what was appended since the last poll
+            fresh = [s for s in playlist['segments'] if s['sequence'] > last_seq]
+            if fresh and fresh[0]['sequence'] > last_seq + 1:
+                gap = fresh[0]['sequence'] - last_seq - 1
+                log.warning(f"Live window moved past {gap} segment(s) before they could be fetched.")
+                if self.hls.metrics:
+                    self.hls.metrics.incr('live_missed_segments', gap)
+
+            # 2. Fetched concurrently, written in sequence order, one window at a time
+            for i in range(0, len(fresh), self.hls.concurrency):
+                window = fresh[i:i + self.hls.concurrency]
+                futures = [pool.submit(self._fetch, s) for s in window]
+                for segment, fut in zip(window, futures):
+                    data = fut.result()
+                    last_seq = segment['sequence']
+                    if data is None:
+                        missed += 1
+                        if missed > self.MAX_MISSED:
+                            raise Exception(f"Live recording stopped: {missed} segments in a row could not be fetched.")
+                        continue
+                    missed = 0
+                    self._write(data, recorded)
+                    written += len(data)
+                    recorded += segment['duration']
+                    self._report(written, recorded, start)
+                    if self.max_duration and recorded >= self.max_duration:
+                        return written, recorded
+
+            # 3. End of the event, or wait for the playlist to grow
+            if playlist['endlist']:
+                log.info("Live stream ended (#EXT-X-ENDLIST).")
+                return written, recorded
+            target = playlist['target_duration'] or 6.0
+            if self._stop.wait(target if fresh else target / 2):
+                raise Exception("Download cancelled.")
+
+            # 4. Reload; a few failed reloads are normal on busy live origins
+            try:
+                playlist = self.hls.load_media_playlist(media_url)
+                reload_failures = 0
+            except requests.RequestException as e:
+                reload_failures += 1
+                log.warning(f"Live playlist reload failed ({reload_failures}/{self.MAX_RELOAD_FAILURES}): {e}")
+                if reload_failures >= self.MAX_RELOAD_FAILURES:
+                    raise
+                playlist = dict(playlist, segments=[], endlist=False)
+
+    def _fetch(self, segment):
+        """Segment data, or None if it stayed broken (a live recording skips it and goes on)."""
+        try:
+            return self.hls.fetch(segment)
+        except SegmentError as e:
+            error = e.failures[0]['error']
+            if isinstance(error, HostUnavailable):
+                raise
+            log.error(f"Skipping live segment {segment['sequence']}: {error}")
+            if self.hls.metrics:
+                self.hls.metrics.incr('live_missed_segments')
+            return None
+
+    def _write(self, data, recorded):
+        if self._file and self._should_roll(recorded):
+            self._file.close()
+            self._file = None
+        if not self._file:
+            path = self._next_path()
+            self._file = open(path, 'wb')
+            self._file_started = recorded
+            self.files.append(path)
+            if self._init:
+                self._file.write(self._init)    # Every fMP4 part needs its own init section
+            log.info(f"Recording into {path}")
+        self._file.write(data)
+        self._file.flush()
+
+    def _should_roll(self, recorded):
+        if self.rollover_time and recorded - self._file_started >= self.rollover_time:
+            return True
+        return bool(self.rollover_size and self._file.tell() >= self.rollover_size)
+
+    def _next_path(self):
+        # 'name.ts' for a single file, 'name_001.ts', 'name_002.ts', ... when rolling over.
+        # Existing files are never overwritten (e.g. a paused recording that was started again).
+        base = os.path.splitext(self.output_path)[0]
+        if not (self.rollover_time or self.rollover_size) and not self.files and not os.path.exists(base + self._ext):
+            return base + self._ext
+        n = len(self.files) + 1
+        while os.path.exists(f"{base}_{n:03d}{self._ext}"):
+            n += 1
+        return f"{base}_{n:03d}{self._ext}"
+
+    def _report(self, written, recorded, start):
+        elapsed = max(time.time() - start, 1e-6)
+        self.hls._emit({
+            'status': 'downloading',
+            'downloaded_bytes': written,
+            'elapsed': elapsed,
+            'speed': written / elapsed,
+            'eta': None,
+            'filename': self.files[-1],
+            'live': True,
+            'recorded_seconds': recorded,
+            '_percent_str': 'LIVE',
+            '_eta_str': f"REC {time.strftime('%H:%M:%S', time.gmtime(recorded))}",
+        })
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from src.core.analysis_cache import AnalysisCache
+from src.utils.config import DATA_DIR
+from src.utils.logger import log
+
+
+class MediaStore:
+    """
+    Content-addressed index of finished downloads (one JSON file per key).
+
+    A download is known under two kinds of keys:
+      * 'url:'     normalized source URL + requested format, checked before anything
+                   is fetched. On media and playlist URLs signed-link tokens are
+                   dropped so a re-issued link to the same stream still matches;
+                   page URLs keep every parameter (there 'hash' or 'e' may well
+                   select the content).
+      * 'content:' media sequence, segment count and a hash of the first segments
+                   of the chosen HLS rendition, which matches the same episode
+                   reached through another listing page or mirror.
+
+    A hit is materialized as a hardlink (same volume), else a copy, or skipped
+    when the target already is that file. Unfinished native HLS downloads are
+    indexed under their content key too, so another job for the same stream
+    starts from a copy of their verified segments instead of from zero.
+    """
+
+    FINGERPRINT_SEGMENTS = 2
+    # Per-request signatures/expiry that change between two links to the same media
+    TOKEN_PARAMS = AnalysisCache.EXPIRY_PARAMS + ('token', 'sig', 'signature', 'hash', 'md5', 'st', 'hdnts', 'policy',
+                                                  'key-pair-id')
+    # Paths whose query carries CDN signatures rather than content selection
+    MEDIA_EXTENSIONS = ('.m3u8', '.mpd', '.mp4', '.m4v', '.m4s', '.mkv', '.webm', '.ts')
+
+    def __init__(self, store_dir=None):
+        self.store_dir = store_dir or os.path.join(DATA_DIR, "store")
+        self._lock = threading.Lock()
+
+    # --- Keys ---
+
+    @classmethod
+    def url_key(cls, url, *qualifiers):
+        """Key for a source URL plus whatever selects the rendition (format id, height limit)."""
+        normalized = AnalysisCache.normalize_url(url)
+        parts = urlsplit(normalized)
+        if parts.path.lower().endswith(cls.MEDIA_EXTENSIONS):
+            query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                     if k.lower() not in cls.TOKEN_PARAMS]
+            normalized = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+        material = '\n'.join([normalized] + [str(q) for q in qualifiers])
+        return 'url:' + hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def content_key(playlist, first_segments):
+        """Key for an HLS rendition: media sequence, length and the bytes of its first segments."""
+        h = hashlib.sha256(f"{playlist.get('media_sequence', 0)}:{len(playlist['segments'])}".encode())
+        for data in first_segments:
+            h.update(hashlib.sha256(data).digest())
+        return 'content:' + h.hexdigest()
+
+    # --- Finished files ---
+
+    def lookup(self, keys):
+        """First finished entry for any of keys whose file is still intact, else None."""
+        for key in keys:
+            entry = self._read(key)
+            if not entry or entry.get('status') != 'done':
+                continue
+            try:
+                st = os.stat(entry['path'])
+            except OSError:
+                self._remove(key)
+                continue
+            if st.st_size != entry['size']:
+                log.warning(f"Stored file changed since download, ignoring: {entry['path']}")
+                self._remove(key)
+                continue
+            return entry
+        return None
+
+    def materialize(self, entry, output_path):
+        """
+        Makes output_path the stored file. Returns 'skip', 'hardlink' or 'copy'.
+        """
+        source = entry['path']
+        if os.path.exists(output_path) and os.path.samefile(source, output_path):
+            log.info(f"Already downloaded: {output_path}")
+            return 'skip'
+
+        tmp = f"{output_path}.store.tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        try:
+            os.link(source, tmp)
+            mode = 'hardlink'
+        except OSError:
+            # Different volume or filesystem without hardlinks
+            shutil.copy2(source, tmp)
+            mode = 'copy'
+        os.replace(tmp, output_path)
+        log.info(f"Reused stored download ({mode}): {source} -> {output_path}")
+        return mode
+
+    def record(self, keys, output_path):
+        """Indexes the finished file at output_path under every key."""
+        st = os.stat(output_path)
+        entry = {'status': 'done', 'path': os.path.abspath(output_path), 'size': st.st_size, 'stored_at': time.time()}
+        for key in keys:
+            self._write(key, entry)
+
+    # --- Unfinished segment caches ---
+
+    def record_partial(self, key, output_path):
+        """Marks output_path's checkpointed segment files as a reusable cache for key."""
+        existing = self._read(key)
+        if existing and existing.get('status') == 'done':
+            return
+        self._write(key, {'status': 'partial', 'path': os.path.abspath(output_path), 'stored_at': time.time()})
+
+    def adopt_partial(self, key, output_path, playlist_url):
+        """
+        Seeds output_path's resume data from another job's unfinished download of
+        the same content: its part files and checkpoint are copied (the other job
+        may still be writing to them) and the checkpoint is pointed at this job's
+        playlist URL. Returns True if something was adopted.
+        """
+        entry = self._read(key)
+        if not entry or entry.get('status') != 'partial':
+            return False
+        source = entry['path']
+        if os.path.abspath(output_path) == source or os.path.exists(f"{output_path}.checkpoint.json"):
+            return False
+
+        try:
+            with open(f"{source}.checkpoint.json", 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            self._remove(key)
+            return False
+
+        src_base, dst_base = os.path.splitext(source)[0], os.path.splitext(output_path)[0]
+        for name, track in checkpoint.get('tracks', {}).items():
+            src_part = f"{src_base}.{name}.part"
+            if not os.path.exists(src_part):
+                return False
+            shutil.copyfile(src_part, f"{dst_base}.{name}.part")
+            track['part'] = os.path.basename(f"{dst_base}.{name}.part")
+
+        checkpoint['playlist_url'] = playlist_url
+        tmp = f"{output_path}.checkpoint.json.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp, f"{output_path}.checkpoint.json")
+        log.info(f"Reusing cached segments of {source}")
+        return True
+
+    # --- Index files ---
+
+    def _path_for(self, key):
+        return os.path.join(self.store_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _read(self, key):
+        with self._lock:
+            try:
+                with open(self._path_for(key), 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return None
+
+    def _write(self, key, entry):
+        path = self._path_for(key)
+        with self._lock:
+            os.makedirs(self.store_dir, exist_ok=True)
+            tmp = f"{path}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(dict(entry, key=key), f)
+                os.replace(tmp, path)
+            except OSError as e:
+                log.warning(f"Could not write media store entry: {e}")
+
+    def _remove(self, key):
+        with self._lock:
+            try:
+                os.remove(self._path_for(key))
+            except OSError:
+                pass
@@ -0,0 +1,162 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.core import http_client
+from src.core.playlist import is_master_playlist, parse_master_playlist, parse_media_playlist
+from src.utils.logger import log
+
+
+class MirrorRace:
+    """
+    Races equivalent stream URLs (same content on different hosts / CDNs).
+
+    Every candidate is probed at once: the playlist request gives the latency,
+    then up to PROBE_BYTES of its first segment (through the first variant of a
+    master playlist) give the throughput. Unreachable candidates drop out; the
+    rest are ranked fastest first. Direct files are probed with a range request.
+    """
+
+    PROBE_BYTES = 1024 * 1024
+    PROBE_SECONDS = 2.0
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, headers=None, timeout=(5, 10)):
+        self.session = http_client.get_session()
+        self.headers = http_client.merge_headers(http_client.DEFAULT_HEADERS, headers)
+        self.timeout = timeout
+
+    def rank(self, urls):
+        """Returns [(url, {'latency', 'throughput'})] fastest first. Falls back to the input order."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if len(urls) < 2:
+            return [(u, {}) for u in urls]
+
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            results = list(zip(urls, pool.map(self._probe, urls)))
+
+        ranked = [(u, s) for u, s in results if s]
+        if not ranked:
+            log.warning("Every mirror failed the probe, keeping the original order.")
+            return [(u, {}) for u in urls]
+        ranked.sort(key=lambda r: (-r[1]['throughput'], r[1]['latency']))
+        for u, s in ranked:
+            log.info(f"Mirror {u}: {s['latency'] * 1000:.0f} ms, {s['throughput'] / 1024 / 1024:.2f} MiB/s")
+        return ranked
+
+    def _probe(self, url):
+        try:
+            started = time.perf_counter()
+            media_url = url
+            if url.split('?', 1)[0].lower().endswith('.m3u8'):
+                text = self._get_text(url)
+                latency = time.perf_counter() - started
+                if is_master_playlist(text):
+                    variants = parse_master_playlist(text, url)['variants']
+                    if not variants:
+                        return None
+                    text = self._get_text(variants[0]['url'])
+                    url = variants[0]['url']
+                segments = parse_media_playlist(text, url)['segments']
+                if not segments:
+                    return None
+                media_url = segments[0]['url']
+                throughput, _ = self._measure(media_url)
+            else:
+                throughput, latency = self._measure(media_url)
+            return {'latency': latency, 'throughput': throughput}
+        except Exception as e:
+            log.warning(f"Mirror probe failed for {url}: {e}")
+            return None
+
+    def _get_text(self, url):
+        res = self.session.get(url, headers=self.headers, timeout=self.timeout)
+        res.raise_for_status()
+        return res.text
+
+    def _measure(self, url):
+        """Returns (bytes/s, seconds to first byte) for the first PROBE_BYTES of url."""
+        headers = http_client.merge_headers(self.headers, {'Range': f'bytes=0-{self.PROBE_BYTES - 1}'})
+        started = time.perf_counter()
+        received = 0
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as res:
+            res.raise_for_status()
+            first_byte = None
+            for chunk in res.iter_content(chunk_size=self.READ_SIZE):
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+                received += len(chunk)
+                if received >= self.PROBE_BYTES or time.perf_counter() - first_byte >= self.PROBE_SECONDS:
+                    break
+        elapsed = max(time.perf_counter() - (first_byte or started), 1e-6)
+        return received / elapsed, (first_byte or time.perf_counter()) - started
+
+
+class MirrorSet:
+    """
+    Ranked mirrors of one stream, shared by the segment workers of a download.
+
+    Segment URLs are written against the primary (first) mirror; url_for()
+    rewrites them onto the active mirror by swapping the directory prefix of
+    the stream URL, which holds for CDNs that mirror the same path layout.
+    A mirror that fails FAILOVER_AFTER fetches in a row, or whose segment
+    throughput sinks below SLOW_SHARE of its raced speed, is demoted and the
+    remaining segments come from the next one.
+    """
+
+    FAILOVER_AFTER = 2
+    SLOW_SHARE = 0.25
+    SLOW_WINDOW = 4         # Consecutive slow segments before switching
+    MIN_SAMPLE = 256 * 1024 # Smaller responses say more about latency than throughput
+
+    def __init__(self, ranked):
+        self.mirrors = [{'prefix': _prefix(url), 'url': url, 'throughput': score.get('throughput'),
+                         'failures': 0, 'slow': 0} for url, score in ranked]
+        self.active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return self.mirrors[self.active]['url']
+
+    def url_for(self, url):
+        """Segment/playlist URL on the active mirror, plus the mirror index to report against."""
+        with self._lock:
+            index = self.active
+        primary = self.mirrors[0]['prefix']
+        if index and url.startswith(primary):
+            url = self.mirrors[index]['prefix'] + url[len(primary):]
+        return url, index
+
+    def report_success(self, index, nbytes, seconds):
+        with self._lock:
+            mirror = self.mirrors[index]
+            mirror['failures'] = 0
+            if not mirror['throughput'] or nbytes < self.MIN_SAMPLE or seconds <= 0:
+                return
+            if nbytes / seconds < mirror['throughput'] * self.SLOW_SHARE:
+                mirror['slow'] += 1
+                if mirror['slow'] >= self.SLOW_WINDOW:
+                    self._failover(index, "is degraded")
+            else:
+                mirror['slow'] = 0
+
+    def report_failure(self, index):
+        with self._lock:
+            mirror = self.mirrors[index]
+            mirror['failures'] += 1
+            if mirror['failures'] >= self.FAILOVER_AFTER:
+                self._failover(index, "keeps failing")
+
+    def _failover(self, index, reason):
+        # Only the active mirror can be demoted; late reports from the old one are ignored
+        if index != self.active or len(self.mirrors) < 2:
+            return
+        self.active = (index + 1) % len(self.mirrors)
+        mirror = self.mirrors[self.active]
+        mirror['failures'] = mirror['slow'] = 0
+        log.warning(f"Mirror {self.mirrors[index]['url']} {reason}, switching to {mirror['url']}")
+
+
+def _prefix(url):
+    """Directory of the stream URL, which segment paths are relative to."""
+    return url.split('?', 1)[0].rsplit('/', 1)[0] + '/'
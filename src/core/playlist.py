@@ -0,0 +1,256 @@
+import re
+from urllib.parse import urljoin
+
+# Attribute lists look like: BANDWIDTH=1280000,RESOLUTION=1280x720,CODECS="avc1.4d401f,mp4a.40.2"
+ATTR_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+def parse_attributes(line):
+    """
+    Parses an HLS attribute list (the part after 'TAG:') into a dict.
+    Quoted values are returned without the quotes.
+    """
+    attrs = {}
+    for key, value in ATTR_PATTERN.findall(line):
+        if value.startswith('"') and value.endswith('"'):
+            value = value[1:-1]
+        attrs[key] = value
+    return attrs
+
+
+def is_master_playlist(text):
+    """A master playlist lists variants instead of media segments."""
+    return '#EXT-X-STREAM-INF' in text
+
+
+def parse_master_playlist(text, base_url):
+    """
+    Parses a master playlist.
+    Returns {'variants': [...], 'media': [...]} where every variant is a dict
+    with 'url', 'bandwidth', 'width', 'height', 'codecs', 'audio' and 'subtitles'
+    (group ids) plus the optional 'average_bandwidth', 'frame_rate' and 'name',
+    and every media entry is an #EXT-X-MEDIA rendition (alternate audio, subtitles).
+    """
+    variants = []
+    media = []
+    pending = None
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            attrs = parse_attributes(line.split(':', 1)[1])
+            width = height = None
+            res = attrs.get('RESOLUTION', '')
+            if 'x' in res:
+                w, h = res.lower().split('x', 1)
+                if w.isdigit() and h.isdigit():
+                    width, height = int(w), int(h)
+            bandwidth = attrs.get('BANDWIDTH', '0')
+            average = attrs.get('AVERAGE-BANDWIDTH', '')
+            pending = {
+                'bandwidth': int(bandwidth) if bandwidth.isdigit() else 0,
+                'average_bandwidth': int(average) if average.isdigit() else None,
+                'width': width,
+                'height': height,
+                'codecs': attrs.get('CODECS'),
+                'audio': attrs.get('AUDIO'),
+                'subtitles': attrs.get('SUBTITLES'),
+                'frame_rate': _to_float(attrs.get('FRAME-RATE')),
+                'name': attrs.get('NAME'),
+            }
+        elif line.startswith('#EXT-X-MEDIA:'):
+            attrs = parse_attributes(line.split(':', 1)[1])
+            uri = attrs.get('URI')
+            media.append({
+                'type': attrs.get('TYPE'),
+                'group_id': attrs.get('GROUP-ID'),
+                'name': attrs.get('NAME'),
+                'language': attrs.get('LANGUAGE'),
+                'default': attrs.get('DEFAULT') == 'YES',
+                'url': urljoin(base_url, uri) if uri else None,
+            })
+        elif not line.startswith('#') and pending is not None:
+            pending['url'] = urljoin(base_url, line)
+            variants.append(pending)
+            pending = None
+
+    return {'variants': variants, 'media': media}
+
+
+def parse_media_playlist(text, base_url):
+    """
+    Parses a media playlist into its segment list.
+    Each segment is a dict with 'url', 'duration', 'sequence' and an optional
+    'byterange' (length, offset) tuple. An #EXT-X-MAP init section is returned
+    separately under 'init' since it must be written before the first segment.
+    """
+    segments = []
+    target_duration = None
+    media_sequence = 0
+    endlist = False
+    key = None
+    init = None
+
+    duration = None
+    byterange = None
+    next_offset = 0
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+
+        if line.startswith('#EXT-X-TARGETDURATION:'):
+            target_duration = float(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-MEDIA-SEQUENCE:'):
+            media_sequence = int(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-ENDLIST'):
+            endlist = True
+        elif line.startswith('#EXT-X-KEY:'):
+            attrs = parse_attributes(line.split(':', 1)[1])
+            if attrs.get('METHOD', 'NONE') != 'NONE':
+                key = attrs
+        elif line.startswith('#EXT-X-MAP:'):
+            attrs = parse_attributes(line.split(':', 1)[1])
+            init = {'url': urljoin(base_url, attrs['URI']), 'byterange': None}
+            if 'BYTERANGE' in attrs:
+                init['byterange'] = _parse_byterange(attrs['BYTERANGE'], 0)
+        elif line.startswith('#EXTINF:'):
+            value = line.split(':', 1)[1].split(',', 1)[0]
+            try:
+                duration = float(value)
+            except ValueError:
+                duration = 0.0
+        elif line.startswith('#EXT-X-BYTERANGE:'):
+            byterange = _parse_byterange(line.split(':', 1)[1], next_offset)
+        elif not line.startswith('#'):
+            if byterange:
+                next_offset = byterange[1] + byterange[0]
+            segments.append({
+                'url': urljoin(base_url, line),
+                'duration': duration or 0.0,
+                'sequence': media_sequence + len(segments),
+                'byterange': byterange,
+            })
+            duration = None
+            byterange = None
+
+    return {
+        'url': base_url,
+        'segments': segments,
+        'target_duration': target_duration,
+        'media_sequence': media_sequence,
+        'endlist': endlist,
+        'key': key,
+        'init': init,
+    }
+
+
+def _parse_byterange(value, default_offset):
+    """'<length>[@<offset>]' -> (length, offset)"""
+    if '@' in value:
+        length, offset = value.split('@', 1)
+        return int(length), int(offset)
+    return int(value), default_offset
+
+
+VIDEO_CODECS = ('avc', 'hvc', 'hev', 'dvh', 'dva', 'vp8', 'vp9', 'vp09', 'av01')
+AUDIO_CODECS = ('mp4a', 'ac-3', 'ec-3', 'opus', 'flac', 'mp3', 'alac', 'vorbis')
+
+# yt-dlp replaces these in format ids, so ours must match for format selection
+FORMAT_ID_UNSAFE = re.compile(r'[\s,/+\[\]()]')
+
+
+def split_codecs(codecs):
+    """'avc1.64001f,mp4a.40.2' -> ('avc1.64001f', 'mp4a.40.2'); 'none' marks a missing track."""
+    vcodec = acodec = None
+    for codec in (codecs or '').split(','):
+        codec = codec.strip()
+        name = codec.lower()
+        if not vcodec and name.startswith(VIDEO_CODECS):
+            vcodec = codec
+        elif not acodec and name.startswith(AUDIO_CODECS):
+            acodec = codec
+    if vcodec and not acodec:
+        acodec = 'none'
+    elif acodec and not vcodec:
+        vcodec = 'none'
+    return vcodec, acodec
+
+
+def build_formats(master, manifest_url, m3u8_id=None):
+    """
+    Turns a parsed master playlist into yt-dlp style (formats, subtitles).
+    Format ids follow yt-dlp's naming for a direct playlist link ('<NAME or kbps>',
+    '<group>-<name>' for audio renditions, optionally prefixed with m3u8_id) so a
+    format picked from this list still selects the same stream when yt-dlp
+    downloads the playlist.
+    """
+    formats = []
+    subtitles = {}
+    audio_groups = {}
+
+    for m in master['media']:
+        if not (m['type'] and m['group_id'] and m['name']):
+            continue
+        if m['type'] == 'SUBTITLES' and m['url']:
+            ext = m['url'].split('?', 1)[0].rsplit('.', 1)[-1].lower()
+            sub = {'url': m['url'], 'ext': 'vtt' if ext == 'm3u8' else ext, 'name': m['name']}
+            if ext == 'm3u8':
+                sub['protocol'] = 'm3u8_native'
+            subtitles.setdefault(m['language'] or 'und', []).append(sub)
+        elif m['type'] == 'AUDIO':
+            audio_groups.setdefault(m['group_id'], []).append(m)
+            if m['url']:
+                formats.append({
+                    'format_id': _format_id(m3u8_id, m['group_id'], m['name']),
+                    'format_note': m['name'],
+                    'url': m['url'],
+                    'manifest_url': manifest_url,
+                    'language': m['language'],
+                    'ext': 'mp4',
+                    'protocol': 'm3u8_native',
+                    'vcodec': 'none',
+                })
+
+    for idx, v in enumerate(master['variants']):
+        bandwidth = v.get('average_bandwidth') or v['bandwidth']
+        tbr = bandwidth / 1000 if bandwidth else None
+        f = {
+            'format_id': _format_id(m3u8_id, v.get('name') or '%d' % (tbr or len(formats))),
+            'url': v['url'],
+            'manifest_url': manifest_url,
+            'tbr': tbr,
+            'ext': 'mp4',
+            'protocol': 'm3u8_native',
+            'fps': v.get('frame_rate'),
+        }
+        if v['height']:
+            f.update({'width': v['width'], 'height': v['height'], 'resolution': f"{v['width']}x{v['height']}"})
+
+        vcodec, acodec = split_codecs(v['codecs'])
+        if vcodec:
+            f['vcodec'] = vcodec
+        if acodec:
+            f['acodec'] = acodec
+        # Audio lives in a separate rendition, like yt-dlp marks it
+        group = audio_groups.get(v['audio']) if v['audio'] and v['codecs'] else None
+        if group and group[0]['url'] and f.get('vcodec') != 'none':
+            f['acodec'] = 'none'
+        formats.append(f)
+
+    return formats, subtitles
+
+
+def _format_id(*parts):
+    return FORMAT_ID_UNSAFE.sub('_', '-'.join(str(p) for p in parts if p))
+
+
+def _to_float(value):
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
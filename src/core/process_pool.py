@@ -0,0 +1,310 @@
+import os
+import json
+import time
+import itertools
+import threading
+import multiprocessing
+from src.core.bandwidth import bandwidth
+from src.core.down_manager import DownloadCancelled
+from src.utils.logger import log
+from src.utils.metrics import metrics_exporter
+
+
+class WorkerPool:
+    """
+    Long-lived worker processes that run DownloadManager calls, one call per
+    worker at a time, so concurrent jobs don't share a GIL.
+
+    Workers are spawned on demand up to `size` (the core count by default) and
+    keep their warm state (YoutubeDL pool, HTTP keep-alive) between calls.
+    Progress, metrics and results come back over each worker's pipe; cancel and
+    rate changes go the other way. kill() terminates one worker (and only its
+    call); a fresh worker replaces it on the next submit.
+    """
+
+    def __init__(self, size=None):
+        self.size = max(1, size or os.cpu_count() or 1)
+        self._ctx = multiprocessing.get_context('spawn')    # fork + threads is unsafe, spawn is the Windows default
+        self._idle = []
+        self._count = 0
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+
+    def submit(self, method, args=(), kwargs=None, progress_hook=None):
+        """Runs DownloadManager.<method>(*args, **kwargs) in a worker. Returns a WorkerTask."""
+        task = WorkerTask(next(self._ids), progress_hook)
+        worker = self._acquire()
+        worker.start(task, method, args, kwargs or {})
+        return task
+
+    def warm(self):
+        """Starts one worker ahead of time; it builds a YoutubeDL in the background."""
+        with self._cond:
+            if self._idle or self._count:
+                return
+            self._count += 1
+        self._release(_Worker(self))
+
+    def kill(self, task):
+        worker = task.worker
+        if worker and not task.done.is_set():
+            log.warning(f"Killing worker process {worker.process.pid} (task #{task.id})")
+            worker.process.kill()
+
+    def shutdown(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                if self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    self._count -= 1  # Died while idle
+                    continue
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                self._cond.wait()
+        return _Worker(self)
+
+    def _release(self, worker):
+        with self._cond:
+            if worker.alive:
+                self._idle.append(worker)
+            else:
+                self._count -= 1
+            self._cond.notify()
+
+
+class WorkerTask:
+    """Handle of one call running in a worker process."""
+
+    def __init__(self, task_id, progress_hook=None):
+        self.id = task_id
+        self.progress_hook = progress_hook
+        self.worker = None
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def send(self, *msg):
+        if self.worker and not self.done.is_set():
+            self.worker.send(msg)
+
+    def wait(self, timeout=None):
+        """Returns the call's result or raises its error."""
+        if not self.done.wait(timeout):
+            raise TimeoutError(f"Task #{self.id} still running")
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class _Worker:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn, child = pool._ctx.Pipe()
+        self.process = pool._ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.task = None
+        self._send_lock = threading.Lock()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def send(self, msg):
+        try:
+            with self._send_lock:
+                self.conn.send(msg)
+        except (OSError, ValueError) as e:
+            log.warning(f"Worker {self.process.pid} unreachable: {e}")
+
+    def start(self, task, method, args, kwargs):
+        task.worker = self
+        self.task = task
+        self.send(('run', method, args, kwargs))
+
+    def stop(self):
+        self.send(('stop',))
+
+    def _read_loop(self):
+        while True:
+            try:
+                msg = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = msg[0]
+            task = self.task
+            if kind == 'progress' and task and task.progress_hook:
+                try:
+                    task.progress_hook(msg[1])
+                except Exception as e:
+                    log.error(f"Progress hook failed: {e}")
+            elif kind == 'metrics':
+                metrics_exporter.record_data(msg[1])
+            elif kind in ('result', 'error') and task:
+                if kind == 'result':
+                    task.result = msg[1]
+                else:
+                    task.error = DownloadCancelled(msg[2]) if msg[1] == 'DownloadCancelled' else Exception(msg[2])
+                self.task = None
+                self.pool._release(self)
+                task.done.set()
+
+        # Process exited (killed or crashed) with a call in flight
+        self.process.join()
+        task = self.task
+        self.task = None
+        if task and not task.done.is_set():
+            task.error = DownloadCancelled(f"Worker process exited (code {self.process.exitcode}).")
+            self.pool._release(self)
+            task.done.set()
+
+
+class ProcessDownloadManager:
+    """
+    DownloadManager stand-in that runs each call in a WorkerPool process.
+    Same interface as far as DownloadQueue and the GUI use it (analyze_url,
+    download_stream, cancel, set_rate_limit), plus kill() for a stuck job.
+
+    Bandwidth shares are still computed here, in the parent's BandwidthManager,
+    and pushed to the worker whenever they change, so the global limit holds
+    across processes.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool or default_pool()
+        self._task = None
+        self._cancel_requested = False
+        self._throttle = None
+
+    def analyze_url(self, url, use_cache=True, refresh=False):
+        return self._run('analyze_url', (url,), {'use_cache': use_cache, 'refresh': refresh})
+
+    def download_stream(self, url, format_id, output_path, progress_hook=None, **options):
+        # Only the parent knows every job, so it owns the bandwidth split
+        self._throttle = bandwidth.open(options.get('rate_limit'), name=url)
+        self._throttle.on_rate = lambda rate: self._task and self._task.send('rate', rate)
+        options['rate_limit'] = self._throttle.bucket.rate
+        try:
+            return self._run('download_stream', (url, format_id, output_path), options, progress_hook)
+        finally:
+            self._throttle.close()
+            self._throttle = None
+
+    def cancel(self):
+        self._cancel_requested = True
+        if self._task:
+            self._task.send('cancel')
+
+    def kill(self):
+        """Terminates the worker running this manager's call. Other jobs are unaffected."""
+        self._cancel_requested = True
+        if self._task:
+            self.pool.kill(self._task)
+
+    def set_rate_limit(self, limit):
+        if self._throttle:
+            self._throttle.set_limit(limit)
+
+    def _run(self, method, args, kwargs, progress_hook=None):
+        if self._cancel_requested:
+            self._cancel_requested = False
+            raise DownloadCancelled("Download cancelled.")
+        self._task = self.pool.submit(method, args, kwargs, progress_hook)
+        if self._cancel_requested:
+            # Cancelled while waiting for a free worker
+            self._task.send('cancel')
+        try:
+            return self._task.wait()
+        finally:
+            self._task = None
+            self._cancel_requested = False
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_pool():
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = WorkerPool()
+    return _default_pool
+
+
+# --- Worker process side ---
+
+PROGRESS_INTERVAL = 0.1     # Seconds between forwarded 'downloading' events
+
+
+def _worker_main(conn):
+    """Entry point of a worker process: runs one call at a time and streams its events back."""
+    from src.core.down_manager import DownloadManager
+    from src.core.ydl_pool import ydl_pool
+
+    send_lock = threading.Lock()
+
+    def send(*msg):
+        with send_lock:
+            conn.send(msg)
+
+    metrics_exporter.sink = lambda data: send('metrics', data)
+    threading.Thread(target=ydl_pool.warm, daemon=True).start()
+
+    manager = DownloadManager()
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        kind = msg[0]
+        if kind == 'run':
+            # A cancel left over from the previous call (lost, late, or a live recording that
+            # stopped cleanly) must not kill this one. Reset here, not in the thread, so a
+            # cancel sent right after this run still applies.
+            manager._cancel_requested = False
+            threading.Thread(target=_run_call, args=(manager, send, *msg[1:]), daemon=True).start()
+        elif kind == 'cancel':
+            manager.cancel()
+        elif kind == 'rate':
+            manager.set_rate_limit(msg[1])
+        elif kind == 'stop':
+            break
+
+
+def _run_call(manager, send, method, args, kwargs):
+    if method == 'download_stream':
+        args = args + (_progress_forwarder(send),)
+    try:
+        result = getattr(manager, method)(*args, **kwargs)
+    except Exception as e:
+        send('error', type(e).__name__, str(e))
+        return
+    try:
+        send('result', result)
+    except Exception:
+        # yt-dlp info dicts can hold unpicklable values; same treatment as the analysis cache
+        send('result', json.loads(json.dumps(result, default=str)))
+
+
+def _progress_forwarder(send):
+    """Progress hook that forwards plain values only, rate limited to PROGRESS_INTERVAL."""
+    last = [0.0]
+
+    def hook(d):
+        now = time.monotonic()
+        if d.get('status') == 'downloading' and now - last[0] < PROGRESS_INTERVAL:
+            return
+        last[0] = now
+        send('progress', {k: v for k, v in d.items() if isinstance(v, (str, int, float, bool, type(None)))})
+    return hook
@@ -0,0 +1,81 @@
+import queue
+import time
+
+
+class ProgressBus:
+    """
+    Decouples download workers from whoever displays progress.
+
+    Workers publish small numeric events (bytes, total, speed, ETA) into a
+    lock-free SimpleQueue; they never touch the UI. A consumer (the Tk main
+    loop via after(), or a headless printer) drains the queue at its own frame
+    rate and gets at most one merged progress update per job per frame, plus
+    every status change in order.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+
+    def publish(self, job_id, status='downloading', downloaded=0, total=None, speed=None, eta=None):
+        # Plain tuple: this runs on every yt-dlp tick, keep it cheap
+        self._queue.put((job_id, status, downloaded, total, speed, eta, time.monotonic()))
+
+    def hook_for(self, job_id):
+        """Returns a yt-dlp style progress_hook that publishes into this bus."""
+        put = self._queue.put
+
+        def hook(d):
+            status = d.get('status')
+            if status == 'downloading':
+                total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                put((job_id, 'downloading', d.get('downloaded_bytes') or 0, total,
+                     d.get('speed'), d.get('eta'), time.monotonic()))
+            elif status == 'finished':
+                put((job_id, 'finished', d.get('downloaded_bytes') or 0, d.get('total_bytes'),
+                     None, 0, time.monotonic()))
+        return hook
+
+    def drain(self):
+        """
+        Pulls everything published since the last call.
+        Returns (progress, statuses): progress maps job_id to its latest
+        'downloading'/'finished' event dict, statuses lists every other
+        (job_id, status) change in publish order.
+        """
+        progress = {}
+        statuses = []
+        while True:
+            try:
+                job_id, status, downloaded, total, speed, eta, ts = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if status in ('downloading', 'finished'):
+                progress[job_id] = {
+                    'status': status,
+                    'downloaded': downloaded,
+                    'total': total,
+                    'speed': speed,
+                    'eta': eta,
+                    'time': ts,
+                }
+            else:
+                statuses.append((job_id, status))
+        return progress, statuses
+
+
+def format_bytes(n):
+    """1536 -> '1.5 KiB'"""
+    if n is None:
+        return '?'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TiB"
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return 'Unknown'
+    return time.strftime('%H:%M:%S', time.gmtime(int(seconds)))
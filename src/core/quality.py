@@ -0,0 +1,138 @@
+import re
+import time
+from src.core import http_client
+from src.core.playlist import is_master_playlist, parse_media_playlist
+from src.utils.logger import log
+
+
+class QualitySelector:
+    """
+    Automatic quality ('auto' format): measures the real throughput to the
+    stream host and picks the highest variant that can finish in time.
+
+    The probe reads the first segment of the best variant (HLS) or the first
+    bytes of a direct file for at most PROBE_SECONDS, timing only the body so
+    connection setup doesn't count. Each format's required rate comes from its
+    tbr (plus the best audio-only rendition for video-only formats) or its
+    filesize and duration.
+
+    Limits, whichever is tighter:
+      * target_time: finish within that many seconds (needs the duration)
+      * budget:      bytes/s this job may use (its bandwidth share)
+    Without either, the variant must merely keep up with playback.
+    """
+
+    PROBE_BYTES = 4 * 1024 * 1024
+    PROBE_SECONDS = 3.0
+    READ_SIZE = 64 * 1024
+    SAFETY = 0.8            # Use this share of the measured throughput, CDNs fluctuate
+
+    def __init__(self, headers=None, timeout=http_client.DEFAULT_TIMEOUT):
+        self.session = http_client.get_session()
+        self.headers = http_client.merge_headers(http_client.DEFAULT_HEADERS, headers)
+        self.timeout = timeout
+
+    def select(self, info, target_time=None, budget=None):
+        """
+        Returns (format, measured bytes/s) for an analyze_url info dict, or
+        (None, None) if it has no video formats to choose from.
+        """
+        videos = [f for f in info.get('formats') or [] if f.get('vcodec') != 'none' and f.get('url')]
+        if not videos:
+            return None, None
+        videos.sort(key=lambda f: (f.get('height') or 0, f.get('tbr') or 0))
+        audio_tbr = max((f.get('tbr') or 0 for f in info.get('formats') or []
+                         if f.get('vcodec') == 'none' and f.get('url')), default=0)
+
+        duration = info.get('duration')
+        try:
+            throughput, probed_duration = self.probe(videos[-1])
+        except Exception as e:
+            log.warning(f"Throughput probe failed ({e}), picking the best quality.")
+            return videos[-1], None
+        duration = duration or probed_duration
+
+        usable = throughput * self.SAFETY
+        if budget:
+            usable = min(usable, budget)
+
+        chosen = None
+        for f in videos:
+            rate = self.required_rate(f, audio_tbr, duration)
+            if rate is None:
+                continue
+            need = rate * duration / target_time if target_time and duration else rate
+            if need <= usable or chosen is None:
+                chosen = f  # The smallest variant stays the fallback even if nothing fits
+
+        if chosen is None:
+            log.info("No bitrate information in the formats, picking the best quality.")
+            chosen = videos[-1]
+        log.info(f"Auto quality: {chosen.get('height')}p ({chosen['format_id']}) "
+                 f"at {throughput / 1024 / 1024:.2f} MiB/s measured")
+        return chosen, throughput
+
+    @staticmethod
+    def required_rate(f, audio_tbr=0, duration=None):
+        """Bytes/s needed to download format f in real time, or None if unknown."""
+        tbr = f.get('tbr')
+        if tbr:
+            if f.get('acodec') == 'none':
+                tbr += audio_tbr
+            return tbr * 1000 / 8
+        size = f.get('filesize') or f.get('filesize_approx')
+        if size and duration:
+            return size / duration
+        return None
+
+    def probe(self, f):
+        """Measures throughput to the host of format f. Returns (bytes/s, duration or None)."""
+        url = f['url']
+        duration = None
+        if f.get('protocol', '').startswith('m3u8') or url.split('?', 1)[0].endswith('.m3u8'):
+            url, duration = self._first_segment(url)
+        return self._measure(url), duration
+
+    def _first_segment(self, playlist_url):
+        res = self.session.get(playlist_url, headers=self.headers, timeout=self.timeout)
+        res.raise_for_status()
+        if is_master_playlist(res.text):
+            raise ValueError("Expected a media playlist.")
+        playlist = parse_media_playlist(res.text, res.url)
+        if not playlist['segments']:
+            raise ValueError("Media playlist contains no segments.")
+        duration = sum(seg['duration'] for seg in playlist['segments']) if playlist['endlist'] else None
+        return playlist['segments'][0]['url'], duration
+
+    def _measure(self, url):
+        headers = http_client.merge_headers(self.headers, {'Range': f'bytes=0-{self.PROBE_BYTES - 1}'})
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as res:
+            res.raise_for_status()
+            received = 0
+            started = None
+            for chunk in res.iter_content(chunk_size=self.READ_SIZE):
+                if started is None:
+                    # Time from the first byte: TTFB is latency, not bandwidth
+                    started = time.perf_counter()
+                    continue
+                received += len(chunk)
+                if received >= self.PROBE_BYTES or time.perf_counter() - started >= self.PROBE_SECONDS:
+                    break
+            elapsed = time.perf_counter() - started if started else 0
+        if not received or elapsed <= 0:
+            raise ValueError("Probe response too small to measure.")
+        return received / elapsed
+
+
+DURATION_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*$', re.IGNORECASE)
+
+
+def parse_duration(text):
+    """'90' / '90s' / '45m' / '2h' -> seconds. Empty -> None."""
+    if text is None or str(text).strip() == '':
+        return None
+    m = DURATION_PATTERN.match(str(text))
+    if not m:
+        raise ValueError(f"Invalid duration: {text!r} (use e.g. 90s, 45m, 2h)")
+    number, unit = m.groups()
+    return float(number) * {'': 1, 's': 1, 'm': 60, 'h': 3600}[unit.lower()]
@@ -0,0 +1,192 @@
+import os
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.core import http_client
+from src.core.integrity import backoff_delay
+from src.utils.logger import log
+
+
+class RangeDownloader:
+    """
+    Multi-connection downloader for direct media files (e.g. decoded vidrame .mp4 links).
+    Probes Accept-Ranges / Content-Length, preallocates the output file and fetches
+    fixed-size chunks over several pooled connections, each worker writing at its
+    own offset. A failed chunk is retried on its own with backoff; once one has
+    failed for good the other workers stop too. Servers without range support
+    fall back to a single stream.
+    """
+
+    CHUNK_SIZE = 8 * 1024 * 1024
+    MIN_SPLIT_SIZE = 4 * 1024 * 1024   # Not worth splitting below this
+    READ_SIZE = 256 * 1024
+
+    def __init__(self, connections=8, headers=None, progress_hook=None, metrics=None, retries=5, timeout=http_client.DEFAULT_TIMEOUT,
+                 throttle=None):
+        self.connections = max(1, int(connections))
+        self.progress_hook = progress_hook
+        self.metrics = metrics
+        self.throttle = throttle    # Optional bandwidth.JobThrottle shared by all connections
+        self.retries = retries
+        self.timeout = timeout
+        self._cancel = threading.Event()
+        self._halt = threading.Event()  # Set on cancel and when a chunk has failed for good
+        self._failure = None            # The error that made a chunk fail for good
+        self._lock = threading.Lock()
+        self._downloaded = 0
+
+        # Shared keep-alive pool; our headers go on each request
+        self.session = http_client.get_session()
+        self.headers = http_client.merge_headers(http_client.DEFAULT_HEADERS, headers)
+
+    def cancel(self):
+        self._cancel.set()
+        self._halt.set()
+
+    def probe(self, url):
+        """
+        Returns (size, supports_ranges). Uses a one-byte range GET because many
+        CDNs answer HEAD incorrectly or not at all.
+        """
+        with self.session.get(url, headers=self._headers({'Range': 'bytes=0-0'}), timeout=self.timeout, stream=True) as res:
+            res.raise_for_status()
+            if res.status_code == 206:
+                # Content-Range: bytes 0-0/123456
+                total = res.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+                return (int(total) if total.isdigit() else None), True
+            length = res.headers.get('Content-Length')
+            accepts = res.headers.get('Accept-Ranges', '').lower() == 'bytes'
+            return (int(length) if length and length.isdigit() else None), accepts
+
+    def download(self, url, output_path):
+        """Downloads url to output_path. Blocking (should be called in a thread)."""
+        size, ranges = self.probe(url)
+        part = f"{output_path}.part"
+        start = time.time()
+        self._downloaded = 0
+
+        if ranges and size and size >= self.MIN_SPLIT_SIZE and self.connections > 1:
+            log.info(f"Range download: {size} bytes over {self.connections} connections -> {output_path}")
+            self._download_ranges(url, part, size, start)
+        else:
+            log.info(f"Range requests unavailable (ranges={ranges}, size={size}), using a single stream.")
+            self._download_single(url, part, size, start)
+
+        os.replace(part, output_path)
+        self._emit({
+            'status': 'finished',
+            'downloaded_bytes': self._downloaded,
+            'total_bytes': self._downloaded,
+            'filename': output_path,
+            'elapsed': time.time() - start,
+        })
+        return self._downloaded
+
+    def _download_ranges(self, url, part, size, start):
+        # Preallocate so every worker can seek straight to its offset
+        with open(part, 'wb') as f:
+            f.truncate(size)
+
+        chunks = [(offset, min(offset + self.CHUNK_SIZE, size) - 1) for offset in range(0, size, self.CHUNK_SIZE)]
+        with ThreadPoolExecutor(max_workers=self.connections) as pool:
+            futures = [pool.submit(self._fetch_chunk, url, part, first, last, size, start) for first, last in chunks]
+            try:
+                for fut in as_completed(futures):
+                    try:
+                        fut.result()
+                    except Exception:
+                        # Other workers stop with "Download stopped."; report the chunk that caused it
+                        if self._failure and not self._cancel.is_set():
+                            raise self._failure from None
+                        raise
+            finally:
+                for fut in futures:
+                    fut.cancel()
+
+    def _fetch_chunk(self, url, part, first, last, size, start):
+        """Fetches bytes first..last into place, retrying only this chunk."""
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if self._halt.is_set():
+                raise Exception("Download cancelled." if self._cancel.is_set() else "Download stopped.")
+            written = 0
+            started = time.perf_counter()
+            try:
+                headers = {'Range': f"bytes={first}-{last}"}
+                with self.session.get(url, headers=self._headers(headers), timeout=self.timeout, stream=True) as res:
+                    res.raise_for_status()
+                    if res.status_code != 206:
+                        raise requests.RequestException(f"Server ignored range request (HTTP {res.status_code})")
+                    with open(part, 'r+b') as f:
+                        f.seek(first)
+                        for data in res.iter_content(chunk_size=self.READ_SIZE):
+                            if self._halt.is_set():
+                                raise Exception("Download cancelled." if self._cancel.is_set() else "Download stopped.")
+                            if self.throttle:
+                                self.throttle.consume(len(data), self._cancel)
+                            f.write(data)
+                            written += len(data)
+                            self._add_progress(len(data), size, start, part)
+
+                if written != last - first + 1:
+                    raise requests.RequestException(f"Short chunk: got {written} of {last - first + 1} bytes")
+                if self.metrics:
+                    self.metrics.observe('chunk_latency', time.perf_counter() - started)
+                    self.metrics.incr('bytes', written)
+                return
+            except requests.RequestException as e:
+                last_error = e
+                if self.metrics:
+                    self.metrics.incr('retries')
+                self._add_progress(-written, size, start, part)
+                log.warning(f"Chunk {first}-{last} failed ({attempt + 1}/{self.retries + 1}): {e}")
+                if attempt < self.retries:
+                    self._halt.wait(backoff_delay(attempt))
+        # No point in the other connections finishing a file that can't be completed
+        self._failure = self._failure or last_error
+        self._halt.set()
+        raise last_error
+
+    def _download_single(self, url, part, size, start):
+        with self.session.get(url, headers=self.headers, timeout=self.timeout, stream=True) as res:
+            res.raise_for_status()
+            with open(part, 'wb') as f:
+                for data in res.iter_content(chunk_size=self.READ_SIZE):
+                    if self._cancel.is_set():
+                        raise Exception("Download cancelled.")
+                    if self.throttle:
+                        self.throttle.consume(len(data), self._cancel)
+                    f.write(data)
+                    self._add_progress(len(data), size, start, part)
+        if self.metrics:
+            self.metrics.incr('bytes', self._downloaded)
+
+    def _add_progress(self, n, size, start, filename):
+        with self._lock:
+            self._downloaded += n
+            downloaded = self._downloaded
+
+        elapsed = max(time.time() - start, 1e-6)
+        speed = downloaded / elapsed
+        d = {
+            'status': 'downloading',
+            'downloaded_bytes': downloaded,
+            'total_bytes': size,
+            'elapsed': elapsed,
+            'speed': speed,
+            'filename': filename,
+        }
+        if size:
+            eta = int((size - downloaded) / speed) if speed else None
+            d['eta'] = eta
+            d['_percent_str'] = f"{downloaded / size * 100:.1f}%"
+            d['_eta_str'] = time.strftime('%H:%M:%S', time.gmtime(eta)) if eta is not None else 'Unknown'
+        self._emit(d)
+
+    def _headers(self, extra):
+        return http_client.merge_headers(self.headers, extra)
+
+    def _emit(self, d):
+        if self.progress_hook:
+            self.progress_hook(d)
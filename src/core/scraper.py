@@ -1,200 +1,170 @@
-import requests
-import re
-import base64
-import codecs
-from urllib.parse import urljoin
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urldefrag
+from src.core import http_client
+from src.core.extractors.registry import registry
 from src.utils.logger import log
 
 class SmartScraper:
     """
     Attempts to find .m3u8 and subtitle links in the HTML source using Regex.
     Includes recursive iframe scanning.
+    Site specific rules live in src/core/extractors and are picked per page by host.
     """
     
-    M3U8_PATTERNS = [
-        r'["\']((?:https?:)?(?://|\\/\\/)[^"\']+\.m3u8[^"\']*)["\']',
-        r'source\s*:\s*["\']((?:https?:)?(?://|\\/\\/)[^"\']+\.m3u8[^"\']*)["\']',
-        r'file\s*:\s*["\']((?:https?:)?(?://|\\/\\/)[^"\']+\.m3u8[^"\']*)["\']',
-    ]
-
-    SUB_PATTERNS = [
-        r'["\']((?:https?:)?(?://|\\/\\/)[^"\']+\.(?:vtt|srt)[^"\']*)["\']',
-        r'kind\s*:\s*["\']captions["\'].*?src\s*:\s*["\']([^"\']+)["\']', 
-    ]
-    
-    IFRAME_PATTERN = r'<iframe[^>]+(?:src|data-src)=["\']([^"\']+)["\']'
+    # Crawl limits for embedded candidates (iframes / JS links)
+    MAX_DEPTH = 1          # Root page is depth 0
+    MAX_FANOUT = 8         # Candidates followed per page
+    MAX_WORKERS = 6
+    TIMEOUT = (5, 10)
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Referer': 'https://google.com/'
-        })
+    def __init__(self, metrics=None):
+        self.session = http_client.get_session()
+        self.metrics = metrics   # Optional JobMetrics; gets per-depth scan timings
 
     def deep_scan(self, url, depth=0, referer=None):
         """
-        Fetches URL, scans for media. If iframes found, scans them too (recursion limit 2).
+        Fetches URL, scans for media. If nothing is found, the embedded candidates
+        (iframes + JS links) are crawled concurrently up to MAX_DEPTH. The first
+        candidate that yields a video wins and the rest are abandoned.
+        'mirrors' lists other URLs known to serve the same stream.
         """
-        if depth > 1: return {'video_url': None, 'subs': []}
-        
-        log.info(f"Deep Scanning (Depth {depth}): {url}")
+        empty = {'video_url': None, 'subs': [], 'mirrors': []}
+        if depth > self.MAX_DEPTH: return empty
+
+        stop = threading.Event()
         try:
-            # Set Referer if provided
-            if referer:
-                self.session.headers.update({'Referer': referer})
-                log.info(f"Set Referer to: {referer}")
+            page = self._scan_page(url, depth, referer, stop)
+        except Exception as e:
+            log.error(f"Deep scan failed at {url}: {e}")
+            return empty
 
-                
-            res = self.session.get(url, timeout=10)
-            res.raise_for_status()
-            html = res.text
-            
-            found_m3u8 = None
-            found_subs = []
-
-            # 1. Search M3U8 in current page
-            found_m3u8 = self._find_m3u8(html, url)
-            
-            # 2. Search Subs in current page
-            found_subs = self._find_subs(html, url)
-
-            # 2.5 Fallback: Infer video from subtitles (Photostack specific)
-            if not found_m3u8:
-                for sub in found_subs:
-                    m = re.search(r'photostack\.net/v/([^/]+)/', sub)
-                    if m:
-                        vid_id = m.group(1)
-                        # Infer master.m3u8 link. Use split to get https://p2.photostack.net
-                        base_host = sub.split('/v/')[0]
-                        inferred = f"{base_host}/v/{vid_id}/master.m3u8"
-                        log.info(f"Inferred video from subtitles: {inferred}")
-                        found_m3u8 = inferred
-                        break
+        if page['video_url'] or depth >= self.MAX_DEPTH:
+            return {'video_url': page['video_url'], 'subs': page['subs'], 'mirrors': page['mirrors']}
 
-            
-            # 3. If no video, check Iframes
-            # 3. If no video, check Iframes AND JS variables
-            if not found_m3u8:
-                # Standard Iframes
-                iframes = re.findall(self.IFRAME_PATTERN, html)
-                
-                # Hidden JS Links (hdfilmizle/vidrame support)
-                js_links = self._extract_from_js(html)
-                
-                all_candidates = iframes + js_links
-                
-                for src in all_candidates:
-                    if not src: continue
-                    src = src.replace(r'\/', '/') # Clean escaped slashes
-                    
-                    if not src.startswith('http'):
-                        src = urljoin(url, src)
-                    
-                    # Avoid re-scanning parent or same url to prevent cycles (basic check)
-                    if src == url: continue
-                    
-                    log.info(f"Checking embedded source: {src}")
-                    sub_result = self.deep_scan(src, depth=depth+1, referer=url)
-                    
-                    if sub_result['video_url']:
-                        found_m3u8 = sub_result['video_url']
-                        found_subs.extend(sub_result['subs'])
-                        break # Found it, stop scanning
-            
-            return {
-                'video_url': found_m3u8,
-                'subs': found_subs
-            }
+        visited = {urldefrag(url)[0]}
+        return self._crawl(page, url, depth, visited, stop)
 
-        except Exception as e:
-            log.error(f"Deep scan failed at {url}: {e}")
-            return {'video_url': None, 'subs': []}
-
-    def _find_m3u8(self, html, base_url):
-        for pattern in self.M3U8_PATTERNS:
-            match = re.search(pattern, html)
-            if match:
-                m3u8 = match.group(1)
-                if not m3u8.startswith('http'):
-                    m3u8 = urljoin(base_url, m3u8)
-                return m3u8.replace(r'\/', '/')
-        return None
-
-    def _find_subs(self, html, base_url):
-        subs = []
-        for pattern in self.SUB_PATTERNS:
-            matches = re.findall(pattern, html)
-            for sub in matches:
-                if not sub.startswith('http'):
-                    sub = urljoin(base_url, sub)
-                sub = sub.replace(r'\/', '/')
-                if sub not in subs:
-                    subs.append(sub)
-        return subs
-
-    def _extract_from_js(self, html):
+    def _crawl(self, root, root_url, depth, visited, stop):
         """
-        Extracts links hidden in JS variables (e.g. 'parts' JSON or 'configs' object).
+        Concurrent crawl of the candidate frontier.
+        Each task carries the subtitles collected along its path so the winner
+        returns them together with its own.
         """
-        links = []
-        
-        # 1. hdfilmizle.to 'parts' variable
-        # let parts = [{"id":..., "data":"<iframe src=\"...\" ... >"}]
-        parts_match = re.search(r'let\s+parts\s*=\s*(\[\{.*?\}\]);', html, re.DOTALL | re.IGNORECASE)
-        if parts_match:
-            # Extract src="..." inside the JSON string
-            srcs = re.findall(r'src=\\"(https?:[^"\\]+)\\"', parts_match.group(1))
-            links.extend(srcs)
-
-        # 2. vidrame.pro 'configs' or file: "..."
-        # Pattern A: file: EE.dd("...")
-        ee_matches = re.findall(r'EE\.dd\(\s*["\']([^"\']+)["\']\s*\)', html)
-        for enc_str in ee_matches:
-            try:
-                decrypted = self._decode_vidrame(enc_str)
-                if decrypted and ('.m3u8' in decrypted or '.mp4' in decrypted):
-                    links.append(decrypted)
-            except Exception as e:
-                log.error(f"Failed to decrypt Vidrame string: {e}")
-
-        # Pattern B: file: "https://..."
-        # We look for file: "http..." or source: "http..."
-        # Pattern: file\s*:\s*["'](https?://[^"']+)["']
-        file_matches = re.findall(r'(?:file|source)\s*:\s*["\'](https?://[^"\']+)["\']', html, re.IGNORECASE)
-        links.extend(file_matches)
-        
-        return links
-
-    def _decode_vidrame(self, encoded_str):
+        result = {'video_url': None, 'subs': list(root['subs']), 'mirrors': []}
+        pool = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
+        pending = {}
+
+        def submit(candidates, parent_url, parent_depth, path_subs):
+            for src in self._select_candidates(candidates, parent_url, visited):
+                log.info(f"Checking embedded source: {src}")
+                fut = pool.submit(self._scan_page, src, parent_depth + 1, parent_url, stop)
+                pending[fut] = (src, parent_depth + 1, path_subs)
+
+        try:
+            submit(root['candidates'], root_url, depth, root['subs'])
+
+            while pending and not stop.is_set():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    src, fut_depth, path_subs = pending.pop(fut)
+                    try:
+                        page = fut.result()
+                    except Exception as e:
+                        log.error(f"Deep scan failed at {src}: {e}")
+                        continue
+                    if page is None:  # Abandoned mid-fetch
+                        continue
+
+                    subs = path_subs + [s for s in page['subs'] if s not in path_subs]
+                    if page['video_url']:
+                        result = {'video_url': page['video_url'], 'subs': subs, 'mirrors': page['mirrors']}
+                        stop.set()  # Found it, abandon the others
+                        break
+
+                    if fut_depth < self.MAX_DEPTH:
+                        submit(page['candidates'], src, fut_depth, subs)
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return result
+
+    def _select_candidates(self, candidates, base_url, visited):
+        """Cleans, resolves and de-duplicates candidate links, capped at MAX_FANOUT."""
+        selected = []
+        for src in candidates:
+            if not src: continue
+            src = src.replace(r'\/', '/') # Clean escaped slashes
+
+            if not src.startswith('http'):
+                src = urljoin(base_url, src)
+
+            # Visited set across the whole crawl prevents cycles and duplicate work
+            key = urldefrag(src)[0]
+            if key in visited: continue
+            visited.add(key)
+
+            selected.append(src)
+            if len(selected) >= self.MAX_FANOUT:
+                break
+        return selected
+
+    def _scan_page(self, url, depth, referer, stop):
         """
-        Decodes the Vidrame/Player obfuscation.
-        Logic: Reverse(ROT13(Base64Decode(str.replace('d', '/'))))
+        Fetches a single page and scans it.
+        Returns {'video_url', 'subs', 'mirrors', 'candidates'} or None if the crawl was stopped.
         """
-        # 1. Custom replacement
-        # The JS replacement was .replace(/d/g, '/')
-        # But wait, Base64 output can contain 'd'. 
-        # The obfuscator probably replaced '/' with 'd' AFTER encoding.
-        # So we reverse it here.
-        s = encoded_str.replace('-', '+').replace('d', '/')
-        
-        # 2. Padding
-        padding = 4 - (len(s) % 4)
-        if padding != 4:
-            s += '=' * padding
-            
-        try:
-            # 3. Base64 Decode
-            decoded_bytes = base64.b64decode(s)
-            decoded_str = decoded_bytes.decode('latin1')
-            
-            # 4. ROT13
-            rot13_str = codecs.decode(decoded_str, 'rot_13')
-            
-            # 5. Reverse
-            final_url = rot13_str[::-1]
-            return final_url
-        except Exception as e:
-            # log.warning(f"Decoding failed for {encoded_str}: {e}")
+        log.info(f"Deep Scanning (Depth {depth}): {url}")
+        started = time.perf_counter()
+        html = self._fetch(url, referer, stop)
+        if html is None:
             return None
+        if self.metrics:
+            self.metrics.observe(f'scrape_fetch_depth{depth}', time.perf_counter() - started)
+
+        chain = registry.chain(url, html)
+
+        # 1. Search M3U8 in current page
+        found_m3u8 = next(filter(None, (e.find_video(html, url) for e in chain)), None)
 
+        # 2. Search Subs in current page
+        found_subs = []
+        for extractor in chain:
+            found_subs += [s for s in extractor.find_subs(html, url) if s not in found_subs]
 
+        # 2.5 Fallback: Infer video from subtitles (e.g. Photostack)
+        if not found_m3u8 and found_subs:
+            found_m3u8 = next(filter(None, (e.infer_video(found_subs) for e in registry.chain_for_subs(found_subs))), None)
+
+        # 3. Same stream on sibling hosts, raced before the download (see mirrors.MirrorRace)
+        mirrors = registry.mirrors(found_m3u8) if found_m3u8 else []
+
+        # 4. If no video, collect Iframes AND JS variables for the crawl
+        candidates = []
+        if not found_m3u8:
+            for extractor in chain:
+                candidates.extend(extractor.find_candidates(html, url))
+
+        if self.metrics:
+            self.metrics.add_phase(f'scrape_depth{depth}', time.perf_counter() - started)
+        return {'video_url': found_m3u8, 'subs': found_subs, 'mirrors': mirrors, 'candidates': candidates}
+
+    def _fetch(self, url, referer, stop):
+        """
+        Streams the page body so an abandoned request stops reading as soon as
+        another candidate has won. Returns None in that case.
+        """
+        if referer:
+            log.info(f"Set Referer to: {referer}")
+        headers = {'Referer': referer or http_client.PAGE_REFERER}
+
+        with self.session.get(url, headers=headers, timeout=self.TIMEOUT, stream=True) as res:
+            res.raise_for_status()
+            chunks = []
+            for chunk in res.iter_content(chunk_size=65536):
+                if stop.is_set():
+                    return None
+                chunks.append(chunk)
+            return b''.join(chunks).decode(res.encoding or 'utf-8', errors='replace')
@@ -0,0 +1,108 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag
+from src.core import http_client
+from src.utils.logger import log
+
+
+class SubtitleFetcher:
+    """
+    Downloads subtitle files concurrently, streaming each one to disk.
+    Runs as a background stage next to the video download, so slow subtitle
+    hosts no longer add latency at the end of a job.
+    """
+
+    MAX_WORKERS = 4
+    SNIFF_SIZE = 512
+
+    def __init__(self, headers=None, throttle=None):
+        self.headers = http_client.merge_headers(http_client.STREAM_HEADERS, headers)
+        self.throttle = throttle    # Optional bandwidth.JobThrottle of the owning download
+
+    def start(self, urls, base_path):
+        """
+        Starts fetching every unique URL in the background.
+        Files are saved as '<base_path>_sub_<idx>.<ext>'. Returns a SubtitleBatch.
+        """
+        unique = []
+        seen = set()
+        for url in urls or []:
+            key = urldefrag(url)[0]
+            if url and key not in seen:
+                seen.add(key)
+                unique.append(url)
+
+        pool = ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, max(1, len(unique))))
+        futures = [pool.submit(self._fetch, url, f"{base_path}_sub_{idx}") for idx, url in enumerate(unique)]
+        pool.shutdown(wait=False)
+        return SubtitleBatch(futures)
+
+    def _fetch(self, url, out_base):
+        """Streams one subtitle to a temp file and names it after the sniffed format."""
+        tmp = f"{out_base}.part"
+        head = b''
+        with http_client.get(url, headers=self.headers, stream=True) as r:
+            r.raise_for_status()
+            content_type = r.headers.get('Content-Type', '')
+            with open(tmp, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=16384):
+                    if self.throttle:
+                        self.throttle.consume(len(chunk))
+                    if len(head) < self.SNIFF_SIZE:
+                        head += chunk[:self.SNIFF_SIZE - len(head)]
+                    f.write(chunk)
+
+        ext = detect_format(head, content_type, url)
+        out_name = f"{out_base}.{ext}"
+        os.replace(tmp, out_name)
+        log.info(f"Saved subtitle: {out_name}")
+        return out_name
+
+
+class SubtitleBatch:
+    """Handle for a running SubtitleFetcher.start() call."""
+
+    def __init__(self, futures):
+        self.futures = futures
+
+    def wait(self):
+        """Blocks until all subtitles are done. Returns the saved paths; failures are logged."""
+        saved = []
+        for fut in self.futures:
+            try:
+                saved.append(fut.result())
+            except Exception as e:
+                log.error(f"Failed to download subtitle: {e}")
+        return saved
+
+
+SRT_TIMING = re.compile(rb'^\s*\d+\s*\r?\n\d{1,2}:\d{2}:\d{2},\d{3}\s*-->', re.MULTILINE)
+
+
+def detect_format(head, content_type='', url=''):
+    """
+    Guesses the subtitle format from the first bytes of the file, then the
+    Content-Type, then the URL. Returns a file extension.
+    """
+    text = head.lstrip(b'\xef\xbb\xbf').lstrip()
+    if text.startswith(b'WEBVTT'):
+        return 'vtt'
+    if text.startswith(b'[Script Info]'):
+        return 'ass'
+    if text.startswith(b'<?xml') or text.startswith(b'<tt'):
+        return 'ttml'
+    if SRT_TIMING.search(text):
+        return 'srt'
+
+    content_type = content_type.lower()
+    if 'vtt' in content_type:
+        return 'vtt'
+    if 'srt' in content_type or 'subrip' in content_type:
+        return 'srt'
+
+    path = url.split('?', 1)[0].lower()
+    for ext in ('vtt', 'srt', 'ass', 'ttml'):
+        if path.endswith(f'.{ext}'):
+            return ext
+    return 'vtt'
@@ -0,0 +1,147 @@
+import threading
+from contextlib import contextmanager
+from src.utils.logger import log
+
+
+class YdlPool:
+    """
+    Pool of warm yt_dlp.YoutubeDL instances shared by analyses and downloads.
+
+    Building a YoutubeDL loads the extractor registry, processes options and
+    sets up cookies and the request director, which is a large part of a short
+    analysis. Instances are keyed by the options that are bound at construction
+    (headers, cookies, proxy); every other option is overlaid on the instance's
+    params for the duration of one call and restored afterwards, including the
+    format selector, output template and hooks.
+
+    An instance serves one call at a time and is closed after MAX_USES calls
+    (or an interrupted one) so caches like _printed_messages can't grow without
+    bound; at most MAX_IDLE instances per option set are kept.
+    """
+
+    MAX_IDLE = 2
+    MAX_USES = 50
+
+    # Read once in YoutubeDL.__init__ or by the cached request director
+    BOUND_OPTIONS = ('http_headers', 'cookiefile', 'cookiesfrombrowser', 'proxy', 'source_address',
+                     'nocheckcertificate', 'restrictfilenames', 'logger')
+    BASE_OPTIONS = {'quiet': True, 'no_warnings': True}
+
+    def __init__(self, max_idle=MAX_IDLE, max_uses=MAX_USES):
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self, opts):
+        """
+        Yields a YoutubeDL configured with opts, e.g.
+            with ydl_pool.borrow({'skip_download': True}) as ydl:
+                info = ydl.extract_info(url, download=False)
+        """
+        key = self._key(opts)
+        ydl = self._take(key, opts)
+        overlay = {k: v for k, v in opts.items() if k not in self.BOUND_OPTIONS}
+        saved = self._apply(ydl, overlay)
+        ok = True
+        try:
+            yield ydl
+        except BaseException as e:
+            # Extraction/download errors leave the instance usable, interrupts may not
+            ok = isinstance(e, Exception)
+            raise
+        finally:
+            self._restore(ydl, saved)
+            self._give_back(key, ydl, ok)
+
+    def warm(self, opts=None):
+        """Builds an instance ahead of time (call from a background thread)."""
+        opts = opts or {}
+        key = self._key(opts)
+        with self._lock:
+            if self._idle.get(key):
+                return
+        self._give_back(key, self._build(opts), True)
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for instances in idle.values():
+            for ydl in instances:
+                ydl.close()
+
+    # --- Instances ---
+
+    def _key(self, opts):
+        return repr(sorted((k, repr(opts[k])) for k in self.BOUND_OPTIONS if k in opts))
+
+    def _take(self, key, opts):
+        with self._lock:
+            instances = self._idle.get(key)
+            if instances:
+                return instances.pop()
+        return self._build(opts)
+
+    def _build(self, opts):
+        import yt_dlp  # Heavy import, deferred so headless/scrape-only runs start fast
+        params = dict(self.BASE_OPTIONS)
+        params.update({k: v for k, v in opts.items() if k in self.BOUND_OPTIONS})
+        ydl = yt_dlp.YoutubeDL(params)
+        ydl._pool_uses = 0
+        return ydl
+
+    def _give_back(self, key, ydl, ok):
+        ydl._pool_uses += 1
+        if ok and ydl._pool_uses < self.max_uses:
+            with self._lock:
+                instances = self._idle.setdefault(key, [])
+                if len(instances) < self.max_idle:
+                    instances.append(ydl)
+                    return
+        log.debug(f"Recycling YoutubeDL instance after {ydl._pool_uses} uses")
+        ydl.close()
+
+    # --- Per-call overlay ---
+
+    def _apply(self, ydl, overlay):
+        params = ydl.params
+        saved = {
+            'params': {k: params[k] for k in overlay if k in params},
+            'missing': [k for k in overlay if k not in params],
+            'outtmpl': dict(params['outtmpl']),
+            'format_selector': ydl.format_selector,
+            'progress_hooks': list(ydl._progress_hooks),
+            'postprocessor_hooks': list(ydl._postprocessor_hooks),
+        }
+
+        for k, v in overlay.items():
+            if k in ('progress_hooks', 'postprocessor_hooks'):
+                continue
+            params[k] = v
+        for ph in overlay.get('progress_hooks', []):
+            ydl.add_progress_hook(ph)
+        for ph in overlay.get('postprocessor_hooks', []):
+            ydl.add_postprocessor_hook(ph)
+        if 'outtmpl' in overlay:
+            params['outtmpl'] = overlay['outtmpl'] if isinstance(overlay['outtmpl'], dict) else {'default': overlay['outtmpl']}
+            ydl._parse_outtmpl()
+        if 'format' in overlay:
+            fmt = overlay['format']
+            ydl.format_selector = fmt if fmt in (None, '-') or callable(fmt) else ydl.build_format_selector(fmt)
+        return saved
+
+    @staticmethod
+    def _restore(ydl, saved):
+        params = ydl.params
+        params.update(saved['params'])
+        for k in saved['missing']:
+            params.pop(k, None)
+        params['outtmpl'] = saved['outtmpl']
+        ydl.format_selector = saved['format_selector']
+        ydl._progress_hooks[:] = saved['progress_hooks']
+        ydl._postprocessor_hooks[:] = saved['postprocessor_hooks']
+        ydl._download_retcode = 0
+
+
+ydl_pool = YdlPool()
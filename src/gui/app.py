@@ -1,16 +1,20 @@
 import customtkinter as ctk
 import threading
 import os
-import requests
-import re
 import tkinter.messagebox as msgbox
 from tkinter import filedialog
 from src.gui.frames import UrlInputFrame, VideoInfoFrame, SubtitleSelectionFrame, DownloadControlFrame
-from src.core.down_manager import DownloadManager
+from src.core.bulk import BulkAnalyzer, download_target, episode_filename
+from src.core.download_queue import DownloadQueue
+from src.core.progress import ProgressBus, format_bytes, format_eta
 from src.core.dep_checker import DependencyManager
+from src.core.process_pool import ProcessDownloadManager, default_pool
 from src.utils.logger import log
 
 class App(ctk.CTk):
+    # Progress redraw interval; worker events in between are merged per job
+    PROGRESS_FRAME_MS = 100
+
     def __init__(self):
         super().__init__()
 
@@ -18,20 +22,30 @@ class App(ctk.CTk):
         self.geometry("600x650") # Taller for subs
         
         # Managers
-        self.down_manager = DownloadManager()
+        # Analyses and downloads run in worker processes so busy jobs don't freeze the UI
+        self.down_manager = ProcessDownloadManager()
         self.dep_manager = DependencyManager()
+        self.progress_bus = ProgressBus()
+        self.queue = DownloadQueue(max_concurrent=3, per_host_limit=2, progress_bus=self.progress_bus,
+                                   manager_factory=ProcessDownloadManager)
+        self._job_progress = {}
+        self._batch_results = []    # (job, error) of jobs finished since the queue was last idle
+        self._bulk_running = False  # A bulk analysis is still adding jobs; hold the summary until it ends
         
         # UI Setup
         self._setup_ui()
         
         # Check dependencies after UI load
         self.after(100, self._check_dependencies)
+        # Start a worker (and its YoutubeDL) while the user is still pasting a link
+        threading.Thread(target=default_pool().warm, daemon=True).start()
+        self.after(self.PROGRESS_FRAME_MS, self._poll_progress)
 
     def _setup_ui(self):
         self.grid_columnconfigure(0, weight=1)
 
         # 1. URL Input
-        self.input_frame = UrlInputFrame(self, on_analyze_callback=self.run_analysis)
+        self.input_frame = UrlInputFrame(self, on_analyze_callback=self.run_analysis, on_bulk_callback=self.run_bulk)
         self.input_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
 
         # 2. Video Info
@@ -43,7 +57,8 @@ class App(ctk.CTk):
         self.sub_frame.grid(row=2, column=0, sticky="ew", padx=20, pady=5)
 
         # 4. Download Controls
-        self.download_frame = DownloadControlFrame(self, on_download_callback=self.run_download)
+        self.download_frame = DownloadControlFrame(self, on_download_callback=self.run_download,
+                                                   on_cancel_callback=self.cancel_downloads)
         self.download_frame.grid(row=3, column=0, sticky="ew", padx=20, pady=20)
         
         # Status Bar
@@ -51,8 +66,15 @@ class App(ctk.CTk):
         self.status_bar.grid(row=4, column=0, sticky="ew", pady=5)
 
     def _check_dependencies(self):
-        """Runs in background to check/download FFmpeg."""
-        if not self.dep_manager.check_ffmpeg():
+        """Checks FFmpeg in a worker thread; verifying the binaries can hash ~160 MB."""
+        def check():
+            ok = self.dep_manager.check_ffmpeg()
+            self.after(0, self._on_ffmpeg_checked, ok)
+        threading.Thread(target=check, daemon=True).start()
+
+    def _on_ffmpeg_checked(self, ok):
+        """Result of _check_dependencies, on the Tk main loop. Offers to download FFmpeg."""
+        if not ok:
             response = msgbox.askyesno("Missing Components", 
                                        "FFmpeg is required for high-quality downloads.\n"
                                        "Would you like to download it now? (~80MB)")
@@ -111,6 +133,9 @@ class App(ctk.CTk):
             
             if not clean_formats:
                 clean_formats.append({'id': 'best', 'label': 'Best Available'})
+            elif len(clean_formats) > 1:
+                # Measures the connection at download time and picks the highest height that keeps up
+                clean_formats.insert(0, {'id': 'auto', 'label': 'Auto (fits connection)'})
                 
             self.input_frame.set_input_state("normal")
             
@@ -142,11 +167,15 @@ class App(ctk.CTk):
             
             # Update UI
             self.sub_frame.update_subs(subs_to_display)
-            self.info_frame.update_info(info.get('title', 'Unknown Title'), clean_formats)
+            title = info.get('title', 'Unknown Title')
+            if info.get('is_live'):
+                # Recorded until the stream ends or Cancel is pressed
+                title = f"[LIVE] {title}"
+            self.info_frame.update_info(title, clean_formats)
             
-            self.current_dl_target = info.get('original_url', info.get('webpage_url', url))
-            if info.get('url', '').endswith('.m3u8'):
-                 self.current_dl_target = info['url']
+            self.current_dl_target = download_target(info, url)
+            self.current_mirrors = info.get('_mirrors') or []
+            self.current_is_live = bool(info.get('is_live'))
 
             self.status_bar.configure(text="Analysis complete.", text_color="green")
             
@@ -155,13 +184,64 @@ class App(ctk.CTk):
             self.status_bar.configure(text=f"Error: {str(e)[:50]}...", text_color="red")
             msgbox.showerror("Error", str(e))
 
+    def run_bulk(self, url):
+        folder = filedialog.askdirectory(title="Save episodes to")
+        if not folder:
+            return
+        self.input_frame.set_input_state("disabled")
+        self.status_bar.configure(text="Looking for episodes...", text_color="yellow")
+        self._bulk_running = True
+        threading.Thread(target=self._bulk_thread, args=(url, folder), daemon=True).start()
+
+    def _bulk_thread(self, url, folder):
+        """
+        Analyzes every episode of a listing and queues each one as soon as its analysis is done.
+        Runs in a worker thread: widgets are only touched through self.after (Tk main loop).
+        """
+        analyzer = BulkAnalyzer(manager_factory=ProcessDownloadManager)
+        queued = failed = 0
+        try:
+            urls = analyzer.expand(url)
+            for result in analyzer.analyze(urls):
+                if result['error']:
+                    failed += 1
+                else:
+                    info = result['info']
+                    self.queue.add(download_target(info, result['url']), "bestvideo+bestaudio/best",
+                                   os.path.join(folder, episode_filename(result)),
+                                   subtitles=info.get('_external_subs') or [], mirrors=info.get('_mirrors') or [],
+                                   is_live=bool(info.get('is_live')))
+                    queued += 1
+                self.after(0, self._set_status, f"Analyzed {queued + failed}/{len(urls)} episodes ({failed} failed)",
+                           "yellow")
+            if queued:
+                self.after(0, lambda: self.download_frame.start_progress(lock=False))
+            self.after(0, self._set_status, f"Queued {queued} episodes, {failed} could not be analyzed.",
+                       "green" if queued else "red")
+        except Exception as e:
+            self.after(0, self._set_status, f"Error: {str(e)[:50]}...", "red")
+            self.after(0, msgbox.showerror, "Error", str(e))
+        finally:
+            self.after(0, self._bulk_finished)
+
+    def _bulk_finished(self):
+        self._bulk_running = False
+        self.input_frame.set_input_state("normal")
+        if self._batch_results and not any(j.status in ('queued', 'running') for j in self.queue.jobs()):
+            self._finish_batch()
+
+    def _set_status(self, text, color):
+        self.status_bar.configure(text=text, text_color=color)
+
     def run_download(self):
         if not hasattr(self, 'current_dl_target'):
             msgbox.showwarning("Warning", "Please analyze a link first.")
             return
 
         fmt_id = self.info_frame.get_selected_format_id()
-        if fmt_id != 'best':
+        if fmt_id == 'auto':
+            final_fmt = 'auto'
+        elif fmt_id != 'best':
             final_fmt = f"{fmt_id}+bestaudio/best"
         else:
             final_fmt = "bestvideo+bestaudio/best"
@@ -175,82 +255,112 @@ class App(ctk.CTk):
         if not save_path:
             return
 
-        self.download_frame.start_progress()
-        
-        t = threading.Thread(target=self._download_thread, args=(self.current_dl_target, final_fmt, save_path, selected_subs))
-        t.start()
-
-    def _download_thread(self, url, fmt, path, sub_urls):
-        def progress_hook(d):
-            if d['status'] == 'downloading':
-                try:
-                    # 1. Clean ANSI codes from strings (yt-dlp can include colors)
-                    def clean_ansi(s):
-                        if not s: return ""
-                        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-                        return ansi_escape.sub('', str(s))
-
-                    p_str = clean_ansi(d.get('_percent_str', ''))
-                    eta_str = clean_ansi(d.get('_eta_str', 'Unknown'))
-                    p_str = p_str.replace('%','')
-
-                    # 2. Smart Percentage Calculation
-                    # If percent string is empty, N/A, or 0.0 while we have bytes, try manual calc
-                    p_val = 0.0
-                    try:
-                        p_val = float(p_str)
-                    except:
-                        pass
-                        
-                    if p_val == 0.0 or 'N/A' in p_str:
-                        done = d.get('downloaded_bytes', 0)
-                        total = d.get('total_bytes') or d.get('total_bytes_estimate')
-                        if total and total > 0:
-                            p_val = (done / total) * 100
-                    
-                    # 3. Format Output
-                    pct_display = f"{p_val:.1f}%"
-                    self.download_frame.update_progress(p_val/100, f"Downloading: {pct_display} | {eta_str} left")
-                    
-                except Exception as e:
-                    # Fallback
-                    self.download_frame.update_progress(0, "Downloading...")
-                    # log.error(f"Progress Error: {e}") # Reduce log spam
-            elif d['status'] == 'finished':
-                self.download_frame.update_progress(1.0, "Merging / Finalizing...")
+        self.download_frame.start_progress(lock=False)
+        self.queue.add(self.current_dl_target, final_fmt, save_path,
+                       subtitles=selected_subs, mirrors=self.current_mirrors, is_live=self.current_is_live)
+        self._update_queue_status()
 
-        try:
-            self.down_manager.download_stream(url, fmt, path, progress_hook)
-            
-            # Download Selected Subtitles
-            if sub_urls:
-                self.download_frame.status_label.configure(text="Downloading Subtitles...")
-                base_name = os.path.splitext(path)[0]
-                for idx, sub_url in enumerate(sub_urls):
-                    try:
-                        # Determine extension
-                        ext = 'vtt'
-                        if 'srt' in sub_url: ext = 'srt'
-                        
-                        r = requests.get(sub_url)
-                        out_name = f"{base_name}_sub_{idx}.{ext}"
-                        with open(out_name, 'wb') as f:
-                            f.write(r.content)
-                        log.info(f"Saved subtitle: {out_name}")
-                    except Exception as sx:
-                        log.error(f"Failed to download sub {sub_url}: {sx}")
+    def _finish_batch(self):
+        """Reports every job finished since the queue was last idle and opens their folder(s) once."""
+        results, self._batch_results = self._batch_results, []
+        done = [job for job, error in results if error is None]
+        failed = [(job, error) for job, error in results if error is not None]
 
+        if failed and not done:
+            self.download_frame.error_progress("Download failed.")
+        else:
             self.download_frame.finish_progress()
-            msgbox.showinfo("Success", "Download completed successfully!")
-            self.status_bar.configure(text="Done.", text_color="green")
-            
-            # Open folder
-            folder = os.path.dirname(path)
+
+        if len(results) == 1:
+            if done:
+                self.status_bar.configure(text="Done.", text_color="green")
+                msgbox.showinfo("Success", f"Download completed successfully!\n{done[0].output_path}")
+            else:
+                msgbox.showerror("Error", str(failed[0][1]))
+        else:
+            text = f"{len(done)} of {len(results)} downloads completed."
+            self.status_bar.configure(text=text, text_color="red" if failed else "green")
+            if failed:
+                lines = [f"{os.path.basename(job.output_path)}: {str(error)[:80]}" for job, error in failed[:10]]
+                if len(failed) > 10:
+                    lines.append(f"... and {len(failed) - 10} more")
+                msgbox.showwarning("Downloads finished", text + "\n\nFailed:\n" + "\n".join(lines))
+            else:
+                msgbox.showinfo("Downloads finished", text)
+
+        # Open folder
+        for folder in sorted({os.path.dirname(job.output_path) for job in done}):
             try:
                 os.startfile(folder)
             except: pass
-            
+
+    def cancel_downloads(self):
+        self.queue.cancel_all()
+
+    def _update_queue_status(self):
+        jobs = self.queue.jobs()
+        running = sum(1 for j in jobs if j.status == 'running')
+        waiting = sum(1 for j in jobs if j.status == 'queued')
+        self.status_bar.configure(text=f"Downloads: {running} running, {waiting} queued", text_color="yellow")
+
+    def _poll_progress(self):
+        """
+        Runs on the Tk main loop every PROGRESS_FRAME_MS. Drains the progress bus
+        (workers never touch widgets directly) and redraws once per frame.
+        """
+        try:
+            progress, statuses = self.progress_bus.drain()
+            # Progress first: a job's last 'finished' event often comes in the same drain as
+            # its final status, and must not re-add the entry that status just removed
+            self._job_progress.update(progress)
+            for job_id, status in statuses:
+                self._on_job_status(job_id, status)
+            if progress:
+                self._render_progress()
         except Exception as e:
-            self.download_frame.error_progress("Download failed.")
-            self.status_bar.configure(text=f"Error: {e}", text_color="red")
-            msgbox.showerror("Error", str(e))
+            log.error(f"Progress update failed: {e}")
+        finally:
+            self.after(self.PROGRESS_FRAME_MS, self._poll_progress)
+
+    def _render_progress(self):
+        """Shows one aggregate bar for all running jobs."""
+        events = list(self._job_progress.values())
+        if not events:
+            return
+        if all(e['status'] == 'finished' for e in events):
+            self.download_frame.update_progress(1.0, "Merging / Finalizing...")
+            return
+
+        done = sum(e['downloaded'] for e in events)
+        total = sum(e['total'] or 0 for e in events)
+        speed = sum(e['speed'] or 0 for e in events)
+        etas = [e['eta'] for e in events if e['eta'] is not None]
+
+        pct = done / total if total and all(e['total'] for e in events) else 0.0
+        text = f"Downloading: {pct * 100:.1f}% | {format_bytes(speed)}/s | {format_eta(max(etas) if etas else None)} left"
+        if len(events) > 1:
+            text += f" ({len(events)} jobs)"
+        self.download_frame.update_progress(min(pct, 1.0), text)
+
+    def _on_job_status(self, job_id, status):
+        """Job status change from the download queue, delivered on the Tk main loop."""
+        job = self.queue.get(job_id)
+        if status in ('done', 'failed', 'cancelled', 'paused'):
+            self._job_progress.pop(job_id, None)
+
+        if status in ('queued', 'running', 'paused'):
+            self._update_queue_status()
+            return
+
+        if status in ('done', 'failed'):
+            # One summary once the queue is idle, not a dialog per episode of a bulk run
+            self._batch_results.append((job, job.error if status == 'failed' else None))
+            if status == 'failed':
+                self.status_bar.configure(text=f"Error: {job.error}", text_color="red")
+            if not self._bulk_running and not any(j.status in ('queued', 'running') for j in self.queue.jobs()):
+                self._finish_batch()
+            elif status == 'done':
+                self._update_queue_status()
+        elif status == 'cancelled':
+            self.download_frame.error_progress("Download cancelled.")
+            self._update_queue_status()
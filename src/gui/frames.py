@@ -3,10 +3,11 @@ from tkinter import filedialog
 import threading
 
 class UrlInputFrame(ctk.CTkFrame):
-    def __init__(self, master, on_analyze_callback, **kwargs):
+    def __init__(self, master, on_analyze_callback, on_bulk_callback=None, **kwargs):
         super().__init__(master, **kwargs)
         self.grid_columnconfigure(0, weight=1)
         self.on_analyze = on_analyze_callback
+        self.on_bulk = on_bulk_callback
 
         self.label = ctk.CTkLabel(self, text="Video / Page URL:")
         self.label.grid(row=0, column=0, sticky="w", padx=10, pady=(10, 0))
@@ -17,14 +18,26 @@ class UrlInputFrame(ctk.CTkFrame):
         self.btn_analyze = ctk.CTkButton(self, text="Analyze", command=self.on_analyze_click)
         self.btn_analyze.grid(row=1, column=1, padx=10, pady=(5, 10))
 
+        if self.on_bulk:
+            # Season / playlist page: analyze every episode and queue them all
+            self.btn_bulk = ctk.CTkButton(self, text="Queue All", command=self.on_bulk_click, width=90, fg_color="gray30")
+            self.btn_bulk.grid(row=1, column=2, padx=(0, 10), pady=(5, 10))
+
     def on_analyze_click(self):
         url = self.entry.get()
         if url:
             self.on_analyze(url)
 
+    def on_bulk_click(self):
+        url = self.entry.get()
+        if url:
+            self.on_bulk(url)
+
     def set_input_state(self, state):
         self.entry.configure(state=state)
         self.btn_analyze.configure(state=state)
+        if self.on_bulk:
+            self.btn_bulk.configure(state=state)
 
 class VideoInfoFrame(ctk.CTkFrame):
     def __init__(self, master, **kwargs):
@@ -106,14 +119,19 @@ class SubtitleSelectionFrame(ctk.CTkScrollableFrame):
         return selected
 
 class DownloadControlFrame(ctk.CTkFrame):
-    def __init__(self, master, on_download_callback, **kwargs):
+    def __init__(self, master, on_download_callback, on_cancel_callback=None, **kwargs):
         super().__init__(master, **kwargs)
         self.grid_columnconfigure(0, weight=1)
         self.on_download = on_download_callback
+        self.on_cancel = on_cancel_callback
 
         self.btn_download = ctk.CTkButton(self, text="Download", command=self.on_download_click, fg_color="green", hover_color="darkgreen")
         self.btn_download.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
 
+        if self.on_cancel:
+            self.btn_cancel = ctk.CTkButton(self, text="Cancel All", command=self.on_cancel, fg_color="gray30", hover_color="darkred", width=90)
+            self.btn_cancel.grid(row=0, column=1, padx=(0, 10), pady=10)
+
         self.progress_bar = ctk.CTkProgressBar(self)
         self.progress_bar.set(0)
         self.progress_bar.grid(row=1, column=0, sticky="ew", padx=10, pady=5)
@@ -125,8 +143,10 @@ class DownloadControlFrame(ctk.CTkFrame):
     def on_download_click(self):
         self.on_download()
 
-    def start_progress(self):
-        self.btn_download.configure(state="disabled")
+    def start_progress(self, lock=True):
+        # Queued downloads keep the button usable so more jobs can be added
+        if lock:
+            self.btn_download.configure(state="disabled")
         self.progress_bar.grid()
         self.progress_bar.set(0)
         self.status_label.configure(text="Initializing...")
@@ -1,4 +1,5 @@
 import customtkinter as ctk
+import multiprocessing
 import sys
 import os
 
@@ -15,4 +16,6 @@ def main():
     app.mainloop()
 
 if __name__ == "__main__":
+    # Worker processes of the frozen exe re-run this file; let them start their worker instead
+    multiprocessing.freeze_support()
     main()
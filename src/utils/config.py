@@ -1,5 +1,6 @@
 import os
 import sys
+import shutil
 
 # Application Metadata
 APP_NAME = "StreamDownloader"
@@ -14,14 +15,28 @@ else:
     DATA_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", APP_NAME)
 
 BIN_DIR = os.path.join(DATA_DIR, "bin")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+METRICS_DIR = os.path.join(DATA_DIR, "metrics")
 
 # FFmpeg Paths
-FFMPEG_EXE = os.path.join(BIN_DIR, "ffmpeg.exe")
-FFPROBE_EXE = os.path.join(BIN_DIR, "ffprobe.exe")
+# The bundled copy in BIN_DIR (downloaded by DependencyManager on Windows) wins;
+# otherwise an ffmpeg on PATH is used, e.g. the distro package on Linux.
+EXE_SUFFIX = ".exe" if os.name == 'nt' else ""
+BUNDLED_FFMPEG = os.path.join(BIN_DIR, "ffmpeg" + EXE_SUFFIX)
+BUNDLED_FFPROBE = os.path.join(BIN_DIR, "ffprobe" + EXE_SUFFIX)
+
+
+def find_binary(bundled, name):
+    """Bundled path if it exists, else the one on PATH, else the bundled path (not installed yet)."""
+    if os.path.exists(bundled):
+        return bundled
+    return shutil.which(name) or bundled
+
 
 # URL for FFmpeg (Windows 64-bit Essentials Build from gyan.dev)
 # This is a static 'release' link ensuring we get a consistent structure.
 FFMPEG_ZIP_URL = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
+FFMPEG_SHA256_URL = FFMPEG_ZIP_URL + ".sha256"
 
 def ensure_dires():
     """Creates the necessary directories if they don't exist."""
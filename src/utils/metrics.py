@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import itertools
+import threading
+from contextlib import contextmanager
+from src.utils.config import METRICS_DIR
+from src.utils.logger import log
+
+
+class JobMetrics:
+    """
+    Timing and throughput record for one analysis or download job.
+
+    phase(name) times a block (repeated phases accumulate), observe(name, value)
+    collects samples such as segment latencies for percentiles, and incr(name)
+    counts things like retries or bytes. Safe to use from worker threads.
+    """
+
+    def __init__(self, kind, target=None):
+        self.kind = kind            # 'analyze' or 'download'
+        self.target = target
+        self.status = 'running'
+        self.started_at = time.time()
+        self.finished_at = None
+        self.phases = {}
+        self.samples = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def observe(self, name, value):
+        with self._lock:
+            self.samples.setdefault(name, []).append(value)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self, status='done'):
+        self.status = status
+        self.finished_at = time.time()
+
+    @property
+    def duration(self):
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self):
+        with self._lock:
+            summary = {name: summarize(values) for name, values in self.samples.items()}
+            counters = dict(self.counters)
+            phases = {name: round(sec, 4) for name, sec in self.phases.items()}
+
+        record = {
+            'kind': self.kind,
+            'target': self.target,
+            'status': self.status,
+            'started_at': self.started_at,
+            'duration': round(self.duration, 4),
+            'phases': phases,
+            'counters': counters,
+            'samples': summary,
+        }
+        if counters.get('bytes') and self.duration > 0:
+            record['throughput_bps'] = round(counters['bytes'] / self.duration, 1)
+        return record
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[idx]
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 4) if ordered else None,
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1] if ordered else None,
+    }
+
+
+class MetricsExporter:
+    """
+    Writes finished JobMetrics as one JSON file per job under METRICS_DIR and,
+    if a textfile path is configured, a Prometheus textfile for the node
+    exporter's textfile collector (gauges for the latest job of each kind plus
+    per-process job counters).
+    """
+
+    KEEP_RECORDS = 500
+
+    def __init__(self, directory=METRICS_DIR, textfile=None):
+        self.directory = directory
+        self.textfile = textfile or os.environ.get('STREAMDL_PROM_TEXTFILE')
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._job_counts = {}
+        self._seq = itertools.count(1)
+        self.sink = None    # Set in worker processes: callback(data) that forwards records to the parent
+
+    def record(self, metrics):
+        return self.record_data(metrics.to_dict())
+
+    def record_data(self, data):
+        """Records a JobMetrics.to_dict() result, e.g. one received from a worker process."""
+        if self.sink:
+            self.sink(data)
+            return data
+        with self._lock:
+            self._latest[data['kind']] = data
+            key = (data['kind'], data['status'])
+            self._job_counts[key] = self._job_counts.get(key, 0) + 1
+            try:
+                self._write_json(data)
+                if self.textfile:
+                    self._write_textfile()
+            except OSError as e:
+                log.warning(f"Could not write metrics: {e}")
+        log.info(f"{data['kind']} finished in {data['duration']:.2f}s ({data['status']}), phases: {data['phases']}")
+        return data
+
+    def _write_json(self, data):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(data['started_at']))
+        name = f"{stamp}-{data['kind']}-{os.getpid()}-{next(self._seq)}.json"
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=str)
+
+        records = sorted(n for n in os.listdir(self.directory) if n.endswith('.json'))
+        for old in records[:-self.KEEP_RECORDS]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass
+
+    def _write_textfile(self):
+        families = {
+            'streamdl_jobs_total': ('counter', 'Jobs finished by this process.', []),
+            'streamdl_last_job_duration_seconds': ('gauge', 'Wall time of the latest job.', []),
+            'streamdl_last_job_phase_seconds': ('gauge', 'Time spent per phase in the latest job.', []),
+            'streamdl_last_job_counter': ('gauge', 'Counters (bytes, retries, ...) of the latest job.', []),
+            'streamdl_last_job_sample': ('gauge', 'Sample quantiles (e.g. segment latency) of the latest job.', []),
+            'streamdl_last_job_throughput_bytes_per_second': ('gauge', 'Average throughput of the latest job.', []),
+        }
+
+        def add(family, labels, value):
+            label_str = ','.join(f'{k}="{v}"' for k, v in labels.items())
+            families[family][2].append(f'{family}{{{label_str}}} {value}')
+
+        for (kind, status), count in sorted(self._job_counts.items()):
+            add('streamdl_jobs_total', {'kind': kind, 'status': status}, count)
+
+        for kind, data in sorted(self._latest.items()):
+            add('streamdl_last_job_duration_seconds', {'kind': kind}, data['duration'])
+            for phase, sec in sorted(data['phases'].items()):
+                add('streamdl_last_job_phase_seconds', {'kind': kind, 'phase': phase}, sec)
+            for name, value in sorted(data['counters'].items()):
+                add('streamdl_last_job_counter', {'kind': kind, 'name': name}, value)
+            for name, summary in sorted(data['samples'].items()):
+                for q in ('p50', 'p90', 'p99'):
+                    if summary[q] is not None:
+                        add('streamdl_last_job_sample', {'kind': kind, 'name': name, 'quantile': q}, summary[q])
+            if 'throughput_bps' in data:
+                add('streamdl_last_job_throughput_bytes_per_second', {'kind': kind}, data['throughput_bps'])
+
+        # Samples of one metric family must stay together in the exposition format
+        lines = []
+        for family, (mtype, help_text, samples) in families.items():
+            if samples:
+                lines.append(f'# HELP {family} {help_text}')
+                lines.append(f'# TYPE {family} {mtype}')
+                lines.extend(samples)
+
+        # Write-then-rename so the collector never reads a half-written file
+        tmp = f"{self.textfile}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp, self.textfile)
+
+
+metrics_exporter = MetricsExporter()
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+# The fixture server is local; never send it through a system proxy
+os.environ['NO_PROXY'] = os.environ['no_proxy'] = '127.0.0.1,localhost'
+
+
+@pytest.fixture
+def fixture_server():
+    """benchmarks/server.py on a free port; tweak server.config in the test."""
+    from server import FixtureServer, StreamConfig
+    server = FixtureServer(StreamConfig(segments=6, segment_size=188 * 100, latency=0.0, page_latency=0.0,
+                                        file_size=256 * 1024)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """A DownloadManager whose metrics, analysis cache and media store live under tmp_path."""
+    from src.core.analysis_cache import AnalysisCache
+    from src.core.down_manager import DownloadManager
+    from src.core.media_store import MediaStore
+    from src.utils.metrics import metrics_exporter
+    monkeypatch.setattr(metrics_exporter, 'directory', str(tmp_path / 'metrics'))
+    monkeypatch.setattr(metrics_exporter, 'textfile', None)
+    return DownloadManager(cache=AnalysisCache(str(tmp_path / 'cache')), store=MediaStore(str(tmp_path / 'store')))
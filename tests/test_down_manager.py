@@ -0,0 +1,18 @@
+import pytest
+
+from src.core.down_manager import DownloadCancelled
+
+
+@pytest.mark.parametrize('path', ['/photostack.net/v/1/master.m3u8', '/files/video.mp4'])
+def test_cancel_before_the_engine_exists_is_not_lost(fixture_server, manager, tmp_path, monkeypatch, path):
+    # The cancel lands while the mirrors race, when there is no engine yet to pass it on to
+    def race(url, mirrors):
+        manager.cancel()
+        return url
+    monkeypatch.setattr(manager, '_race_mirrors', race)
+    out = tmp_path / 'video.mp4'
+    with pytest.raises(DownloadCancelled):
+        manager.download_stream(fixture_server.base_url + path, 'best', str(out), engine='native', reuse=False,
+                                mirrors=['http://127.0.0.1:9/unused'])
+    assert not out.exists()
+    assert manager._cancel_requested is False
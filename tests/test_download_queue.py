@@ -0,0 +1,28 @@
+import time
+
+from src.core.download_queue import DownloadQueue
+
+
+class InstantManager:
+    """Stands in for DownloadManager: every download succeeds at once."""
+
+    def download_stream(self, url, format_id, output_path, progress_hook=None, **options):
+        return []
+
+    def cancel(self):
+        pass
+
+
+def test_wait_returns_after_last_done_callback():
+    delivered = []
+
+    def on_update(job):
+        if job.status == 'done':
+            time.sleep(0.05)  # A slow consumer, e.g. the CLI printing a line
+            delivered.append(job.id)
+
+    queue = DownloadQueue(max_concurrent=2, on_update=on_update, manager_factory=InstantManager)
+    jobs = [queue.add(f"https://cdn{i}.example/video.mp4", 'best', f"/tmp/{i}.mp4") for i in range(5)]
+    assert queue.wait(timeout=10)
+    assert sorted(delivered) == [job.id for job in jobs]
+    queue.shutdown()
@@ -0,0 +1,73 @@
+import inspect
+
+import pytest
+
+from src.core.integrity import CorruptSegment, SegmentVerifier, backoff_delay
+
+TS_PACKET = bytes([0x47]) + bytes(187)
+
+
+def mp4_box(kind, payload=b''):
+    return (8 + len(payload)).to_bytes(4, 'big') + kind + payload
+
+
+@pytest.mark.parametrize('data, segment, content_length', [
+    (TS_PACKET * 10, {}, None),
+    (TS_PACKET * 10 + TS_PACKET[:50], {}, None),                # Trailing partial packet is tolerated
+    (TS_PACKET * 4, {'byterange': (188 * 4, 0)}, 188 * 4),
+    (mp4_box(b'moof', b'x' * 16) + mp4_box(b'mdat', b'y' * 32), {}, None),
+    (b'ID3\x04' + bytes(100), {}, None),                        # Unknown container: length checks only
+])
+def test_verifier_accepts_media(data, segment, content_length):
+    SegmentVerifier().check(data, segment, content_length)
+
+
+@pytest.mark.parametrize('data, segment, content_length, reason', [
+    (b'', {}, None, 'empty'),
+    (TS_PACKET * 10, {}, 188 * 11, 'truncated'),
+    (TS_PACKET * 2, {'byterange': (188 * 3, 0)}, None, 'byte range'),
+    (b'  <!DOCTYPE html><html>502</html>', {}, None, 'HTML'),
+    (b'{"error": "expired"}', {}, None, 'HTML/JSON'),
+    (TS_PACKET * 3 + b'\x00' * 188, {}, None, 'sync byte'),
+    (mp4_box(b'moof', b'x' * 16), {}, None, 'mdat'),
+    (mp4_box(b'moof', b'x' * 16)[:-4] + bytes(0), {}, None, 'truncated'),
+])
+def test_verifier_rejects_corrupt(data, segment, content_length, reason):
+    with pytest.raises(CorruptSegment, match=reason):
+        SegmentVerifier().check(data, segment, content_length)
+
+
+def test_verifier_allows_init_section_without_mdat():
+    SegmentVerifier().check(mp4_box(b'ftyp', b'isom') + mp4_box(b'moov', b'z' * 8), {}, init=True)
+
+
+def test_backoff_delay_grows_and_is_capped():
+    for n in range(12):
+        delay = backoff_delay(n)
+        assert 0.5 * min(0.5 * 2 ** n, 10.0) <= delay <= min(0.5 * 2 ** n, 10.0)
+
+
+def test_backoff_delay_accepts_ytdlp_call_signature():
+    # yt-dlp calls retry_sleep_functions as func(n=retry_number)
+    assert 'n' in inspect.signature(backoff_delay).parameters
+    assert backoff_delay(n=0) <= 0.5
+
+
+def test_backoff_delay_as_ytdlp_retry_sleep_function(monkeypatch):
+    # The helper yt-dlp's HTTP and fragment downloaders call between retries
+    from yt_dlp.utils import RetryManager
+    slept = []
+    monkeypatch.setattr('time.sleep', slept.append)
+    for count in (1, 2, 3):
+        RetryManager.report_retry(Exception("HTTP Error 503"), count, 3, sleep_func=backoff_delay,
+                                  info=lambda msg: None, warn=lambda msg: None)
+    assert len(slept) == 3 and all(0 < delay <= 2.0 for delay in slept)
+
+
+def test_ytdlp_download_survives_one_503(fixture_server, manager, tmp_path):
+    # Request 1 is yt-dlp's extraction probe, request 2 the download itself
+    fixture_server.config.file_fail_requests = {2}
+    out = tmp_path / 'video.mp4'
+    manager.download_stream(f"{fixture_server.base_url}/files/video.mp4", 'best', str(out), reuse=False)
+    assert out.stat().st_size == fixture_server.config.file_size
+    assert fixture_server.requests['/files/video.mp4'] >= 3
@@ -0,0 +1,16 @@
+from src.core.media_store import MediaStore
+
+
+def test_url_key_ignores_signatures_on_media_urls():
+    a = MediaStore.url_key("https://cdn.example/v/1/master.m3u8?token=abc&e=1700000000&q=hd", 'best')
+    b = MediaStore.url_key("https://cdn.example/v/1/master.m3u8?q=hd&token=xyz&e=1800000000", 'best')
+    assert a == b
+    assert a != MediaStore.url_key("https://cdn.example/v/1/master.m3u8?q=sd&token=abc", 'best')
+    assert a != MediaStore.url_key("https://cdn.example/v/1/master.m3u8?q=hd&token=abc", 'worst')
+
+
+def test_url_key_keeps_every_parameter_of_page_urls():
+    # On a page these may select the content, two pages must never share a stored file
+    for name in ('hash', 'md5', 'st', 'e', 'token'):
+        assert (MediaStore.url_key(f"https://site.example/watch?{name}=1", 'best')
+                != MediaStore.url_key(f"https://site.example/watch?{name}=2", 'best'))
@@ -0,0 +1,49 @@
+import pytest
+
+from src.core.bandwidth import format_rate, parse_rate
+from src.core.quality import parse_duration
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('500K', 500 * 1024),
+    ('2M', 2 * 1024 ** 2),
+    ('2.5m', int(2.5 * 1024 ** 2)),
+    ('1G', 1024 ** 3),
+    ('1000', 1000),
+    ('', None),
+    ('0', None),
+    (None, None),
+])
+def test_parse_rate(text, expected):
+    assert parse_rate(text) == expected
+
+
+@pytest.mark.parametrize('text', ['fast', '5T', '-1M', 'K'])
+def test_parse_rate_rejects_garbage(text):
+    with pytest.raises(ValueError, match='Invalid rate'):
+        parse_rate(text)
+
+
+def test_format_rate():
+    assert format_rate(None) == 'unlimited'
+    assert format_rate(512) == '512 B/s'
+    assert format_rate(2 * 1024 ** 2) == '2 MiB/s'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('90', 90.0),
+    ('90s', 90.0),
+    ('45m', 2700.0),
+    ('2H', 7200.0),
+    ('1.5h', 5400.0),
+    ('', None),
+    (None, None),
+])
+def test_parse_duration(text, expected):
+    assert parse_duration(text) == expected
+
+
+@pytest.mark.parametrize('text', ['soon', '10d', 'm'])
+def test_parse_duration_rejects_garbage(text):
+    with pytest.raises(ValueError, match='Invalid duration'):
+        parse_duration(text)
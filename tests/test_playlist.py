@@ -0,0 +1,80 @@
+from src.core.playlist import (build_formats, is_master_playlist, parse_attributes, parse_master_playlist,
+                               parse_media_playlist, split_codecs)
+
+MASTER = """#EXTM3U
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aud",NAME="English",LANGUAGE="en",DEFAULT=YES,URI="audio/en.m3u8"
+#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="Turkish",LANGUAGE="tr",URI="subs/tr.m3u8"
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2",AUDIO="aud"
+low/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,AVERAGE-BANDWIDTH=4500000,RESOLUTION=1920x1080,FRAME-RATE=29.970,CODECS="avc1.640028"
+https://other.example/hi/index.m3u8?token=abc
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-TARGETDURATION:6
+#EXT-X-MEDIA-SEQUENCE:100
+#EXT-X-MAP:URI="init.mp4",BYTERANGE="720@0"
+#EXT-X-KEY:METHOD=NONE
+#EXTINF:6.0,
+seg100.m4s
+#EXTINF:5.5,title
+#EXT-X-BYTERANGE:1000@720
+all.m4s
+#EXTINF:4,
+#EXT-X-BYTERANGE:500
+all.m4s
+"""
+
+
+def test_parse_attributes_strips_quotes_and_keeps_commas_inside():
+    attrs = parse_attributes('BANDWIDTH=1280000,CODECS="avc1.4d401f,mp4a.40.2",RESOLUTION=1280x720')
+    assert attrs == {'BANDWIDTH': '1280000', 'CODECS': 'avc1.4d401f,mp4a.40.2', 'RESOLUTION': '1280x720'}
+
+
+def test_master_playlist_variants_and_renditions():
+    assert is_master_playlist(MASTER)
+    master = parse_master_playlist(MASTER, 'https://cdn.example/show/master.m3u8')
+    low, high = master['variants']
+    assert low['url'] == 'https://cdn.example/show/low/index.m3u8'
+    assert (low['width'], low['height'], low['bandwidth'], low['audio']) == (640, 360, 800000, 'aud')
+    assert high['url'] == 'https://other.example/hi/index.m3u8?token=abc'
+    assert (high['average_bandwidth'], high['frame_rate']) == (4500000, 29.97)
+    audio, subs = master['media']
+    assert audio['default'] and audio['url'] == 'https://cdn.example/show/audio/en.m3u8'
+    assert subs['type'] == 'SUBTITLES' and subs['language'] == 'tr'
+
+
+def test_media_playlist_sequence_byterange_and_init():
+    assert not is_master_playlist(MEDIA)
+    media = parse_media_playlist(MEDIA, 'https://cdn.example/v/index.m3u8')
+    assert media['target_duration'] == 6.0 and media['media_sequence'] == 100
+    assert not media['endlist'] and media['key'] is None
+    assert media['init'] == {'url': 'https://cdn.example/v/init.mp4', 'byterange': (720, 0)}
+    assert [s['sequence'] for s in media['segments']] == [100, 101, 102]
+    assert [s['duration'] for s in media['segments']] == [6.0, 5.5, 4.0]
+    # A byte range without an offset continues where the previous one ended
+    assert [s['byterange'] for s in media['segments']] == [None, (1000, 720), (500, 1720)]
+
+
+def test_media_playlist_endlist_and_key():
+    text = '#EXTM3U\n#EXT-X-KEY:METHOD=AES-128,URI="k.bin"\n#EXTINF:4,\na.ts\n#EXT-X-ENDLIST\n'
+    media = parse_media_playlist(text, 'https://cdn.example/v/index.m3u8')
+    assert media['endlist']
+    assert media['key']['METHOD'] == 'AES-128'
+
+
+def test_split_codecs():
+    assert split_codecs('avc1.64001f,mp4a.40.2') == ('avc1.64001f', 'mp4a.40.2')
+    assert split_codecs('avc1.64001f') == ('avc1.64001f', 'none')
+    assert split_codecs('mp4a.40.2') == ('none', 'mp4a.40.2')
+    assert split_codecs(None) == (None, None)
+
+
+def test_build_formats_marks_separate_audio():
+    master = parse_master_playlist(MASTER, 'https://cdn.example/show/master.m3u8')
+    formats, subtitles = build_formats(master, 'https://cdn.example/show/master.m3u8')
+    by_id = {f['format_id']: f for f in formats}
+    assert by_id['aud-English']['vcodec'] == 'none'
+    assert by_id['800']['acodec'] == 'none'      # Audio comes from the 'aud' rendition
+    assert by_id['4500']['height'] == 1080
+    assert subtitles['tr'][0]['ext'] == 'vtt'
@@ -0,0 +1,24 @@
+import pytest
+
+from src.core.subtitles import detect_format
+
+
+@pytest.mark.parametrize('head, expected', [
+    (b'WEBVTT\n\n00:00:01.000 --> 00:00:02.000\nHi', 'vtt'),
+    (b'\xef\xbb\xbf\n  WEBVTT', 'vtt'),
+    (b'[Script Info]\nTitle: x', 'ass'),
+    (b'<?xml version="1.0"?><tt xmlns="http://www.w3.org/ns/ttml">', 'ttml'),
+    (b'<tt xml:lang="en">', 'ttml'),
+    (b'1\n00:00:01,000 --> 00:00:02,500\nHello\n', 'srt'),
+])
+def test_detect_format_from_content(head, expected):
+    # The content wins over a misleading Content-Type and URL
+    assert detect_format(head, 'text/plain', 'https://example.com/sub.ass') == expected
+
+
+def test_detect_format_falls_back_to_content_type_then_url():
+    assert detect_format(b'', 'application/x-subrip') == 'srt'
+    assert detect_format(b'', 'TEXT/VTT; charset=utf-8') == 'vtt'
+    assert detect_format(b'', '', 'https://example.com/en.SRT?sig=1.vtt') == 'srt'
+    assert detect_format(b'', '', 'https://example.com/en.ttml') == 'ttml'
+    assert detect_format(b'garbage', 'application/octet-stream', 'https://example.com/sub') == 'vtt'